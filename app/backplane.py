@@ -0,0 +1,436 @@
+"""Cross-process SSE fan-out over a Unix domain socket.
+
+One hub process owns ingestion (the JSONL tailer or the mock generator),
+the store of record and the ``PublishScheduler``. Any number of web
+workers connect to it and relay its frames to their own SSE clients, so
+connection capacity scales across cores with no external services::
+
+    python -m app.backplane /tmp/phoenix.sock          # hub: ingest + publish
+    BACKPLANE_PATH=/tmp/phoenix.sock uvicorn app.main:app --workers 4
+
+Messages are ``kind (1 byte) | u32 length | payload``:
+
+``H`` hub -> worker, JSON
+    Hello: the hub broker's ``epoch`` (its first id) and ``last_id``, plus
+    the oldest buffered events (as ``D``); the rest of the ring follows in
+    ``D`` messages of at most ``hello_chunk`` events. The worker's broker
+    continues numbering from ``last_id``, so SSE ids, and ``Last-Event-ID``
+    resumes, are the same on every worker.
+``D`` hub -> worker, JSON
+    Events appended to the hub's store since the last publish: ``seq`` of
+    the first, ``EventRecord`` tuples, and the ``extra`` render context when
+    it changed. Workers apply them to a replica ``DataStore`` (with the
+    same sequence numbers) that serves snapshots and the page/REST routes.
+    Sent before the frames of each publish.
+``F`` hub -> worker
+    ``u64 id | u16 route length | "channel\\0topic" | frame``: an encoded SSE
+    frame, stored by the worker's broker under the same id.
+``S`` worker -> hub, JSON
+    The worker's ``SSEBroker.interest()``. The hub mirrors it with
+    subscriptions of its own, so it builds and stores exactly the channels
+    and topics that some worker is serving.
+``P`` worker -> hub, JSON
+    A ``publish`` made on a worker (e.g. rental changes), numbered and
+    fanned out by the hub.
+``A`` worker -> hub, JSON
+    Events ingested by a worker (``POST /api/logs``), applied to the
+    hub's store and published from there.
+
+A worker that stops reading (socket buffer above ``max_buffer``) is
+dropped; it reconnects and receives the whole event ring again.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import struct
+import sys
+from pathlib import Path
+from typing import Optional
+
+from .data import DataStore, mock_metrics_publisher, tail_jsonl_and_broadcast
+from .eventbuffer import EventRecord
+from .publisher import PublishScheduler, is_critical
+from .render_cache import MetricsRenderCache
+from .sse import SSEBroker, Subscription
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!cI")
+_FRAME = struct.Struct("!QH")
+
+HELLO, DATA, FRAME, INTEREST, PUBLISH, APPEND = b"H", b"D", b"F", b"S", b"P", b"A"
+
+
+def pack(kind: bytes, payload: bytes) -> bytes:
+    return _HEADER.pack(kind, len(payload)) + payload
+
+
+def pack_json(kind: bytes, obj) -> bytes:
+    return pack(kind, json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[bytes, bytes]:
+    kind, length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return kind, await reader.readexactly(length)
+
+
+def pack_frame(msg_id: int, channel: str, topic: str, frame: bytes) -> bytes:
+    route = f"{channel}\0{topic}".encode("utf-8")
+    return pack(FRAME, _FRAME.pack(msg_id, len(route)) + route + frame)
+
+
+def unpack_frame(payload: bytes) -> tuple[int, str, str, bytes]:
+    msg_id, route_len = _FRAME.unpack_from(payload)
+    start = _FRAME.size
+    channel, topic = payload[start:start + route_len].decode("utf-8").split("\0", 1)
+    return msg_id, channel, topic, payload[start + route_len:]
+
+
+def data_payload(
+    store: DataStore, first: int, extra: Optional[dict] = None, end: Optional[int] = None
+) -> dict:
+    ring = store.events
+    first = max(first, ring.start_seq)
+    end = ring.next_seq if end is None else min(end, ring.next_seq)
+    out: dict = {
+        "seq": first,
+        "records": [ring.record_at(seq % ring.maxlen) for seq in range(first, end)],
+    }
+    if extra is not None:
+        out["extra"] = extra
+    return out
+
+
+class BackplaneHub:
+    """Serve the hub's store updates and SSE frames to worker processes."""
+
+    def __init__(
+        self,
+        path: str,
+        broker: SSEBroker,
+        store: DataStore,
+        scheduler: PublishScheduler,
+        max_buffer: int = 8 << 20,
+        hello_chunk: int = 1000,
+    ) -> None:
+        self.path = path
+        self.broker = broker
+        self.store = store
+        self.scheduler = scheduler
+        self.max_buffer = max_buffer
+        self.hello_chunk = hello_chunk
+        self._workers: dict[asyncio.StreamWriter, list[Subscription]] = {}
+        # Messages for workers still receiving the ring, sent once it is through
+        self._joining: dict[asyncio.StreamWriter, bytearray] = {}
+        self._shipped = store.events.next_seq
+        self._extra: dict = dict(scheduler.render_cache.extra)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        broker.taps.append(self._forward)
+        scheduler.before_flush.append(self._ship)
+
+    async def start(self) -> None:
+        Path(self.path).unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+        logger.info("Backplane hub listening on %s", self.path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        for writer in list(self._workers):
+            writer.close()
+
+    def _send_all(self, message: bytes) -> None:
+        for writer in list(self._workers):
+            if writer.is_closing():
+                continue
+            held = self._joining.get(writer)
+            if held is not None:
+                held += message
+                if len(held) > self.max_buffer:
+                    logger.warning("Dropping backplane worker: %d bytes held during hello", len(held))
+                    writer.close()
+                continue
+            writer.write(message)
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                logger.warning("Dropping backplane worker: %d bytes unsent", self.max_buffer)
+                writer.close()
+
+    def _forward(self, msg_id: int, channel: str, topic: str, frame: bytes) -> None:
+        self._send_all(pack_frame(msg_id, channel, topic, frame))
+
+    def _ship(self) -> None:
+        """Send events added since the last publish, before that publish's frames."""
+        extra = self.scheduler.render_cache.extra
+        changed = extra != self._extra
+        if self.store.events.next_seq == self._shipped and not changed:
+            return
+        self._send_all(pack_json(DATA, data_payload(self.store, self._shipped, extra if changed else None)))
+        self._shipped = self.store.events.next_seq
+        if changed:
+            self._extra = dict(extra)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._workers[writer] = []
+        try:
+            await self._greet(writer)
+            while True:
+                kind, payload = await read_message(reader)
+                try:
+                    await self._handle(writer, kind, json.loads(payload))
+                except (ValueError, TypeError, KeyError) as exc:
+                    # One bad message from a worker does not cost it the connection
+                    logger.warning("Ignoring malformed backplane %r message: %s", kind, exc)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for sub in self._workers.pop(writer, ()):
+                await self.broker.unsubscribe(sub)
+            writer.close()
+
+    async def _greet(self, writer: asyncio.StreamWriter) -> None:
+        """Send the hello and the event ring, ``hello_chunk`` events per message.
+
+        The loop runs between chunks; anything broadcast meanwhile is held
+        back and sent after the last chunk, so the worker sees it in order.
+        """
+        self._joining[writer] = bytearray()
+        try:
+            # Events from here on go out with the next publish's ``D``
+            end = self._shipped
+            first = self.store.events.start_seq
+            hello = data_payload(self.store, first, self._extra, end=first + self.hello_chunk)
+            hello.update(epoch=self.broker.first_id, last_id=self.broker.last_id)
+            writer.write(pack_json(HELLO, hello))
+            first += len(hello["records"])
+            while first < end:
+                await writer.drain()
+                # Let everything else run between chunks
+                await asyncio.sleep(0)
+                chunk = data_payload(self.store, first, end=min(first + self.hello_chunk, end))
+                writer.write(pack_json(DATA, chunk))
+                first = chunk["seq"] + len(chunk["records"])
+            writer.write(self._joining[writer])
+        finally:
+            del self._joining[writer]
+
+    async def _handle(self, writer: asyncio.StreamWriter, kind: bytes, msg) -> None:
+        if kind == INTEREST:
+            await self._mirror(writer, msg)
+        elif kind == PUBLISH:
+            await self.broker.publish(msg["data"], event=msg["event"], channel=msg["channel"])
+        elif kind == APPEND:
+            records = [EventRecord(*rec) for rec in msg]
+            if records and self.store.event_log is not None:
+                # Not reading from the worker meanwhile pushes back on its uploads
+                await self.store.event_log.wait_for_room()
+            for rec in records:
+                self.store.add_record(rec)
+            if records:
+                self.scheduler.mark(any(is_critical(r.status, r.error) for r in records))
+                if not await self.scheduler.maybe_flush():
+                    self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Publish held-back worker events when the scheduler's frame is due."""
+        if self._flush_timer is not None:
+            return
+        loop = asyncio.get_running_loop()
+
+        def fire() -> None:
+            self._flush_timer = None
+            self._flush_task = loop.create_task(self.scheduler.maybe_flush())
+
+        self._flush_timer = loop.call_later(self.scheduler.delay(), fire)
+
+    async def _mirror(self, writer: asyncio.StreamWriter, interest: dict) -> None:
+        """Replace the hub-side subscriptions standing in for one worker's clients."""
+        old = self._workers.get(writer)
+        if old is None:
+            return
+        new = []
+        for channel, wanted in interest.items():
+            if wanted.get("all"):
+                new.append(await self.broker.subscribe(channel))
+            if wanted.get("topics"):
+                new.append(await self.broker.subscribe(channel, wanted["topics"]))
+        self._workers[writer] = new
+        for sub in old:
+            await self.broker.unsubscribe(sub)
+
+
+class BackplaneRelay:
+    """Worker side: replicate the hub's store and relay its frames to local clients.
+
+    Local ``publish`` calls and ingested events are sent up to the hub.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        broker: SSEBroker,
+        store: DataStore,
+        render_cache: MetricsRenderCache,
+        retry: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.broker = broker
+        self.store = store
+        self.render_cache = render_cache
+        self.retry = retry
+        self.epoch: Optional[int] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._interest: Optional[dict] = None
+        broker.upstream = self._publish
+        broker.on_change = self._send_interest
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def run(self) -> None:
+        """Stay connected to the hub, reconnecting every ``retry`` seconds."""
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                await asyncio.sleep(self.retry)
+                continue
+            try:
+                kind, payload = await read_message(reader)
+                if kind != HELLO:
+                    raise ConnectionError(f"expected hello, got {kind!r}")
+                self._hello(json.loads(payload))
+                self._writer, self._interest = writer, None
+                self._send_interest()
+                while True:
+                    kind, payload = await read_message(reader)
+                    if kind == FRAME:
+                        self.broker.relay(*unpack_frame(payload))
+                    elif kind == DATA:
+                        self._apply(json.loads(payload))
+            except (asyncio.IncompleteReadError, ConnectionError) as exc:
+                logger.warning("Backplane hub connection lost: %s", exc)
+            finally:
+                self._writer = None
+                writer.close()
+            await asyncio.sleep(self.retry)
+
+    def _hello(self, msg: dict) -> None:
+        if msg["epoch"] != self.epoch:
+            # New hub process: its sequence numbers start over
+            self.epoch = msg["epoch"]
+            self.store.skip_to(msg["seq"])
+        self._apply(msg)
+        # Frames sent while disconnected are gone; clients get a fresh snapshot
+        self.broker.rebase(msg["last_id"])
+
+    def _apply(self, msg: dict) -> None:
+        ring = self.store.events
+        for seq, rec in enumerate(msg["records"], start=msg["seq"]):
+            if seq < ring.next_seq:
+                continue  # already replicated
+            if seq > ring.next_seq:
+                self.store.skip_to(seq)
+            self.store.add_record(EventRecord(*rec))
+        if "extra" in msg:
+            self.render_cache.update_extra(**msg["extra"])
+
+    def _send(self, message: bytes) -> asyncio.StreamWriter:
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            raise ConnectionError("backplane hub is not connected")
+        writer.write(message)
+        return writer
+
+    def _send_interest(self) -> None:
+        interest = self.broker.interest()
+        if self._writer is not None and interest != self._interest:
+            self._interest = interest
+            self._send(pack_json(INTEREST, interest))
+
+    async def _publish(self, message: str, event: str, channel: str) -> None:
+        try:
+            self._send(pack_json(PUBLISH, {"data": message, "event": event, "channel": channel}))
+        except ConnectionError:
+            logger.warning("Dropped %s publish: backplane hub is not connected", event)
+
+    async def ingest(self, records: list[EventRecord]) -> None:
+        """Hand events to the hub, which stores and publishes them to every worker.
+
+        Returns once the socket has taken them; a lost connection raises
+        ``ConnectionError``, so ``IngestQueue`` holds the batch and retries.
+        """
+        await self._send(pack_json(APPEND, records)).drain()
+
+
+async def serve_hub(path: str) -> None:
+    """Run ingestion and publishing for a pool of backplane workers."""
+    from fastapi.templating import Jinja2Templates
+
+    from .config import settings
+    from .deltas import MetricsDeltas
+    from .eventlog import EventLog
+    from .heatmap import heatmap_edges
+    from .snapshot import load_snapshot, save_snapshot
+
+    templates = Jinja2Templates(directory=str(Path(__file__).resolve().parent.parent / "templates"))
+    store = DataStore(
+        max_events=settings.max_events,
+        heatmap_edges=heatmap_edges(settings.heatmap_edges_ms, settings.heatmap_log_rows),
+    )
+    if settings.event_store_path:
+        store.event_log = EventLog(settings.event_store_path, max_pending=settings.event_store_max_pending)
+    tail_cursor: dict = {}
+    if settings.snapshot_path:
+        meta = load_snapshot(store, settings.snapshot_path)
+        if meta:
+            tail_cursor.update(meta.get("tail") or {})
+
+    broker = SSEBroker()
+    render_cache = MetricsRenderCache(lambda name, ctx: templates.env.get_template(name).render(**ctx))
+    scheduler = PublishScheduler(
+        broker, store, render_cache,
+        frame_interval=settings.publish_frame_ms / 1000,
+        deltas=MetricsDeltas(templates.env),
+    )
+    hub = BackplaneHub(path, broker, store, scheduler)
+    await hub.start()
+    if settings.silverback_log_path and not settings.force_sample:
+        ingest = tail_jsonl_and_broadcast(
+            Path(settings.silverback_log_path), broker, store, render_cache,
+            cursor=tail_cursor, scheduler=scheduler,
+        )
+    else:
+        ingest = mock_metrics_publisher(broker, store, render_cache, scheduler=scheduler)
+    task = asyncio.create_task(ingest)
+    try:
+        await task
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        await hub.close()
+        if settings.snapshot_path:
+            save_snapshot(store, settings.snapshot_path, {"tail": tail_cursor})
+        if store.event_log is not None:
+            store.event_log.close()
+
+
+if __name__ == "__main__":
+    from .config import settings
+    from .logging_config import setup_logging
+
+    setup_logging()
+    hub_path = sys.argv[1] if len(sys.argv) > 1 else settings.backplane_path
+    if not hub_path:
+        sys.exit("usage: python -m app.backplane <socket path> (or set BACKPLANE_PATH)")
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve_hub(hub_path))
@@ -0,0 +1,134 @@
+"""JSON encoding and decoding, through orjson or msgspec when installed.
+
+Ingest (``/api/logs``, the JSONL tailer) and the heavier ``/api/*``
+responses spend most of their time turning bytes into objects and back.
+This module picks the fastest available library once at import:
+
+- ``loads``/``dumps``: orjson, else msgspec, else the stdlib ``json``.
+- ``decode_silverback``/``decode_bot_log``: with msgspec, typed decoders
+  that go straight from a line to a struct holding only the fields the
+  parsers read (no intermediate dict); otherwise ``loads``. Either way the
+  result answers ``.get(key)`` like a dict, so
+  ``parse_silverback_record``/``parse_bot_log_to_record`` take both.
+
+Neither library is required; ``BACKEND`` and ``TYPED_BACKEND`` say which
+one is in use.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    DecodeError: tuple[type[Exception], ...] = (json.JSONDecodeError, UnicodeDecodeError)
+
+    def loads(data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    DecodeError = (msgspec.DecodeError, UnicodeDecodeError)
+    _decoder = msgspec.json.Decoder()
+    _encoder = msgspec.json.Encoder()
+
+    def loads(data: bytes | str) -> Any:
+        return _decoder.decode(data)
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+else:
+    BACKEND = "json"
+    DecodeError = (json.JSONDecodeError, UnicodeDecodeError)
+
+    def loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        # Same output as starlette's JSONResponse
+        return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _load_object(line: bytes | str) -> Optional[dict]:
+    """One JSON line as a dict; None for JSON that is not an object (``DecodeError`` if invalid)."""
+    obj = loads(line)
+    return obj if isinstance(obj, dict) else None
+
+
+if msgspec is not None:
+    TYPED_BACKEND = "msgspec"
+    if BACKEND != "msgspec":
+        DecodeError = DecodeError + (msgspec.DecodeError,)
+
+    class _Fields(msgspec.Struct):
+        # Fields default to UNSET, so an absent key and an explicit null differ as in a dict
+        def get(self, key: str, default: Any = None) -> Any:
+            value = getattr(self, key, msgspec.UNSET)
+            return default if value is msgspec.UNSET else value
+
+    class SilverbackLine(_Fields):
+        """The keys ``parse_silverback_record`` reads; anything else is skipped."""
+
+        timestamp: Any = msgspec.UNSET
+        time: Any = msgspec.UNSET
+        ts: Any = msgspec.UNSET
+        bot_name: Any = msgspec.UNSET
+        bot: Any = msgspec.UNSET
+        name: Any = msgspec.UNSET
+        latency_ms: Any = msgspec.UNSET
+        latency: Any = msgspec.UNSET
+        error: Any = msgspec.UNSET
+        err: Any = msgspec.UNSET
+        message: Any = msgspec.UNSET
+        status: Any = msgspec.UNSET
+        profit: Any = msgspec.UNSET
+        tx_hash: Any = msgspec.UNSET
+        hash: Any = msgspec.UNSET
+        tx: Any = msgspec.UNSET
+
+    class BotLogLine(_Fields):
+        """The keys ``parse_bot_log_to_record`` reads."""
+
+        timestamp: Any = msgspec.UNSET
+        time: Any = msgspec.UNSET
+        level: Any = msgspec.UNSET
+        message: Any = msgspec.UNSET
+
+    def _typed(struct: type) -> Any:
+        decoder = msgspec.json.Decoder(struct)
+
+        def decode(line: bytes | str):
+            try:
+                return decoder.decode(line)
+            except msgspec.ValidationError:
+                # Valid JSON, but not an object
+                return None
+        return decode
+
+    decode_silverback = _typed(SilverbackLine)
+    decode_bot_log = _typed(BotLogLine)
+else:
+    TYPED_BACKEND = BACKEND
+    decode_silverback = decode_bot_log = _load_object
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` serialized with ``dumps`` (orjson/msgspec when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -58,8 +58,51 @@ if PYDANTIC_AVAILABLE:
         # Data settings
         max_events: int = Field(default=1000, description="Maximum events to store in memory")
         silverback_log_path: Optional[str] = Field(default=None, description="Path to Silverback JSONL log file")
+        event_store_path: Optional[str] = Field(
+            default=None,
+            description="Path to the SQLite event store. If set, every ingested event is persisted there."
+        )
+        event_store_max_pending: int = Field(
+            default=100_000,
+            description="Events that may wait for the event store's disk writer before ingestion is throttled"
+        )
+        snapshot_path: Optional[str] = Field(
+            default=None,
+            description="Path of the DataStore snapshot written on shutdown and restored on startup"
+        )
+        publish_frame_ms: int = Field(
+            default=250,
+            description="Minimum interval between metrics broadcasts while tailing; critical events flush immediately"
+        )
+        backplane_path: Optional[str] = Field(
+            default=None,
+            description="Unix socket of the backplane hub (python -m app.backplane). If set, this process "
+                        "relays the hub's data and SSE frames instead of ingesting itself, so it can run "
+                        "as one of several uvicorn workers"
+        )
+        log_rules_path: Optional[str] = Field(
+            default=None,
+            description="JSON file of bot family rules for /api/logs messages "
+                        "([{\"bot_name\": ..., \"match\": [keywords]}]); see app.logrules"
+        )
+        ingest_queue_size: int = Field(
+            default=256,
+            description="Parsed /api/logs batches that may wait for the ingest worker before uploads are throttled"
+        )
+        ingest_backpressure_ms: int = Field(
+            default=2000,
+            description="How long an upload waits for room in a full ingest queue before the rest is rejected (503)"
+        )
         force_sample: bool = Field(default=False, description="Force sample/demo mode")
         clean_ui: bool = Field(default=False, description="Clean UI mode (no data publishers)")
+        heatmap_edges_ms: List[int] = Field(
+            default_factory=lambda: [0, 100, 200, 300],
+            description="Lower latency bound (ms) of each heatmap row; the last row is open-ended"
+        )
+        heatmap_log_rows: int = Field(
+            default=0,
+            description="If > 0, use this many log-scale heatmap rows (10ms-10s) instead of heatmap_edges_ms"
+        )
         
         # Rate limiting
         rate_limit_enabled: bool = Field(default=True, description="Enable rate limiting")
@@ -98,8 +141,19 @@ else:
             self.debug = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
             self.max_events = int(os.getenv("MAX_EVENTS", "1000"))
             self.silverback_log_path = os.getenv("SILVERBACK_LOG_PATH")
+            self.event_store_path = os.getenv("EVENT_STORE_PATH")
+            self.event_store_max_pending = int(os.getenv("EVENT_STORE_MAX_PENDING", "100000"))
+            self.snapshot_path = os.getenv("SNAPSHOT_PATH")
+            self.publish_frame_ms = int(os.getenv("PUBLISH_FRAME_MS", "250"))
+            self.backplane_path = os.getenv("BACKPLANE_PATH")
+            self.log_rules_path = os.getenv("LOG_RULES_PATH")
+            self.ingest_queue_size = int(os.getenv("INGEST_QUEUE_SIZE", "256"))
+            self.ingest_backpressure_ms = int(os.getenv("INGEST_BACKPRESSURE_MS", "2000"))
             self.force_sample = os.getenv("FORCE_SAMPLE", "false").lower() in ("1", "true", "yes")
             self.clean_ui = os.getenv("CLEAN_UI", "false").lower() in ("1", "true", "yes")
+            heatmap_edges_str = os.getenv("HEATMAP_EDGES_MS", "0,100,200,300")
+            self.heatmap_edges_ms = [int(x) for x in heatmap_edges_str.split(",") if x.strip()]
+            self.heatmap_log_rows = int(os.getenv("HEATMAP_LOG_ROWS", "0"))
             self.rate_limit_enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
             self.rate_limit_per_minute = int(os.getenv("RATE_LIMIT_PER_MINUTE", "120"))
             self.log_level = os.getenv("LOG_LEVEL", "INFO")
@@ -1,33 +1,288 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import logging
 import random
 from collections import deque
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Deque
 
+from .codec import DecodeError, decode_silverback
+from .eventbuffer import EventRecord, EventRing, ms_to_datetime
+from .eventlog import EventLog, utc_day_bounds_ms
+from .heatmap import LatencyHeatmap
+from .logrules import get_classifier
 from .models import MetricsEvent
+from .publisher import PublishScheduler, is_critical
+from .render_cache import MetricsRenderCache
+from .rollups import Bucket, RollupSet
+from .sketches import LatencyQuantiles
 from .sse import SSEBroker
+from .tailer import JsonlTailer
+
+logger = logging.getLogger(__name__)
 
 
 class SuccessWindow:
+    """Sliding success counters over the last ``window_seconds``.
+
+    Events are counted into per-second buckets held in a fixed ring keyed by
+    epoch second, so adding, evicting and reading are all constant time no
+    matter how many events the store holds.
+    """
+
     def __init__(self, window_seconds: int = 60) -> None:
+        self.window_seconds = window_seconds
         self.window_ms = window_seconds * 1000
-        self.events: Deque[tuple[int, bool]] = deque()
-
-    def add(self, now_ms: int, success: bool) -> float:
-        self.events.append((now_ms, success))
-        cutoff = now_ms - self.window_ms
-        while self.events and self.events[0][0] < cutoff:
-            self.events.popleft()
-        total = len(self.events)
+        # One extra slot so a full window plus the current second always fit.
+        self._size = window_seconds + 1
+        self._secs: list[int] = [-1] * self._size
+        self._totals: list[int] = [0] * self._size
+        self._successes: list[int] = [0] * self._size
+
+    def add(self, ts_ms: int, success: bool) -> None:
+        sec = ts_ms // 1000
+        i = sec % self._size
+        if self._secs[i] != sec:
+            if self._secs[i] > sec:
+                # Slot already holds a newer second; this event is too old to matter.
+                return
+            self._secs[i] = sec
+            self._totals[i] = 0
+            self._successes[i] = 0
+        self._totals[i] += 1
+        if success:
+            self._successes[i] += 1
+
+    def remove(self, ts_ms: int, success: bool) -> None:
+        sec = ts_ms // 1000
+        i = sec % self._size
+        if self._secs[i] != sec or self._totals[i] == 0:
+            return
+        self._totals[i] -= 1
+        if success and self._successes[i] > 0:
+            self._successes[i] -= 1
+
+    def counts(self, now_ms: int) -> tuple[int, int]:
+        """Return ``(total, successes)`` for events at or after ``now - window``."""
+        cutoff_sec = (now_ms - self.window_ms) // 1000
+        total = 0
+        successes = 0
+        for sec, t, s in zip(self._secs, self._totals, self._successes):
+            if sec >= cutoff_sec:
+                total += t
+                successes += s
+        return total, successes
+
+    def rate(self, now_ms: int) -> float:
+        total, successes = self.counts(now_ms)
         if total == 0:
             return 0.0
-        successes = sum(1 for _, s in self.events if s)
         return round(successes * 100.0 / total, 2)
 
+    def to_state(self) -> dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "secs": list(self._secs),
+            "totals": list(self._totals),
+            "successes": list(self._successes),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "SuccessWindow":
+        window = cls(int(state["window_seconds"]))
+        secs, totals, successes = (
+            [int(v) for v in state[key]] for key in ("secs", "totals", "successes")
+        )
+        if not len(secs) == len(totals) == len(successes) == window._size:
+            raise ValueError("success window state does not match its size")
+        window._secs, window._totals, window._successes = secs, totals, successes
+        return window
+
+
+# Profits are summed as integers in this unit so that adding and evicting the
+# same values never accumulates floating point drift.
+_PROFIT_SCALE = 10**12
+
+
+class KpiAggregator:
+    """Running aggregates behind ``DataStore.kpis()``.
+
+    Keeps latency and profit sums for every stored event plus a 60s
+    ``SuccessWindow``. ``DataStore`` calls ``add`` on insert and ``remove``
+    when the bounded buffer evicts, so reading the KPIs is O(1).
+    """
+
+    def __init__(self, window_seconds: int = 60) -> None:
+        self.count = 0
+        self.latency_sum = 0
+        self.profit_count = 0
+        self.profit_sum = 0
+        self.window = SuccessWindow(window_seconds)
+
+    def add(self, ts_ms: int, latency_ms: int, success: bool, profit: float | None) -> None:
+        self.count += 1
+        self.latency_sum += latency_ms
+        if profit is not None:
+            self.profit_count += 1
+            self.profit_sum += round(profit * _PROFIT_SCALE)
+        self.window.add(ts_ms, success)
+
+    def remove(self, ts_ms: int, latency_ms: int, success: bool, profit: float | None) -> None:
+        self.count -= 1
+        self.latency_sum -= latency_ms
+        if profit is not None:
+            self.profit_count -= 1
+            self.profit_sum -= round(profit * _PROFIT_SCALE)
+        self.window.remove(ts_ms, success)
+
+    def kpis(self, now_ms: int | None = None) -> dict:
+        if self.count <= 0:
+            return {"avg_latency_ms": 0, "success_rate_pct": 0.0, "throughput_1m": 0, "avg_profit": 0.0}
+        if now_ms is None:
+            now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        total, successes = self.window.counts(now_ms)
+        success_rate = round(successes * 100.0 / total, 2) if total else 0.0
+        avg_profit = 0.0
+        if self.profit_count > 0:
+            avg_profit = round(self.profit_sum / self.profit_count / _PROFIT_SCALE, 2)
+        return {
+            "avg_latency_ms": int(self.latency_sum / self.count),
+            "success_rate_pct": success_rate,
+            "throughput_1m": total,
+            "avg_profit": avg_profit,
+        }
+
+    def to_state(self) -> dict:
+        return {
+            "count": self.count,
+            "latency_sum": self.latency_sum,
+            "profit_count": self.profit_count,
+            "profit_sum": self.profit_sum,
+            "window": self.window.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "KpiAggregator":
+        agg = cls()
+        agg.window = SuccessWindow.from_state(state["window"])
+        agg.count = int(state["count"])
+        agg.latency_sum = int(state["latency_sum"])
+        agg.profit_count = int(state["profit_count"])
+        agg.profit_sum = int(state["profit_sum"])
+        return agg
+
+
+def bot_slug(bot_name: str) -> str:
+    """URL id used for a bot name by the rentals and profile routes."""
+    return bot_name.lower().replace(" ", "-")
+
+
+class BotStats:
+    """Per-bot counters for the events currently held in the store."""
+
+    __slots__ = ("bot_name", "total_count", "success_count", "failure_count",
+                 "latency_sum", "last_ts_ms", "last_seq")
+
+    def __init__(self, bot_name: str) -> None:
+        self.bot_name = bot_name
+        self.total_count = 0
+        self.success_count = 0
+        self.failure_count = 0
+        self.latency_sum = 0
+        self.last_ts_ms = 0
+        self.last_seq = -1
+
+    @property
+    def success_ratio(self) -> float:
+        return self.success_count * 100.0 / self.total_count if self.total_count else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.latency_sum / self.total_count if self.total_count else 0.0
+
+
+class BotIndex:
+    """Secondary index of ``BotStats`` keyed by bot name and by slug.
+
+    ``last_seq``/``last_ts_ms`` track the most recently inserted event of
+    each bot; since the store evicts oldest first, that event outlives all
+    other events of the bot and never needs to be recomputed on eviction.
+
+    Different names can share a slug ("Arb Scout" and "arb-scout"); the
+    slug maps to all of them and stays until the last one is evicted.
+    """
+
+    def __init__(self) -> None:
+        self._bots: dict[str, BotStats] = {}
+        self._slugs: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bots)
+
+    def add(self, bot_name: str, seq: int, ts_ms: int, latency_ms: int, success: bool) -> None:
+        stats = self._bots.get(bot_name)
+        if stats is None:
+            stats = self._bots[bot_name] = BotStats(bot_name)
+            self._slugs.setdefault(bot_slug(bot_name), set()).add(bot_name)
+        stats.total_count += 1
+        stats.latency_sum += latency_ms
+        if success:
+            stats.success_count += 1
+        else:
+            stats.failure_count += 1
+        stats.last_ts_ms = ts_ms
+        stats.last_seq = seq
+
+    def remove(self, bot_name: str, latency_ms: int, success: bool) -> None:
+        stats = self._bots.get(bot_name)
+        if stats is None:
+            return
+        stats.total_count -= 1
+        stats.latency_sum -= latency_ms
+        if success:
+            stats.success_count -= 1
+        else:
+            stats.failure_count -= 1
+        if stats.total_count <= 0:
+            del self._bots[bot_name]
+            slug = bot_slug(bot_name)
+            names = self._slugs.get(slug)
+            if names is not None:
+                names.discard(bot_name)
+                if not names:
+                    del self._slugs[slug]
+
+    def get(self, bot_name: str) -> BotStats | None:
+        return self._bots.get(bot_name)
+
+    def by_slug(self, slug: str) -> BotStats | None:
+        """The bot with this slug; of several, the one with the newest event."""
+        names = self._slugs.get(slug)
+        if not names:
+            return None
+        return max((self._bots[name] for name in names), key=lambda stats: stats.last_seq)
+
+    def values(self) -> list[BotStats]:
+        return list(self._bots.values())
+
+    def to_state(self) -> list[list]:
+        return [[getattr(stats, name) for name in BotStats.__slots__] for stats in self._bots.values()]
+
+    @classmethod
+    def from_state(cls, state: list[list]) -> "BotIndex":
+        index = cls()
+        for row in state:
+            if len(row) != len(BotStats.__slots__):
+                raise ValueError(f"bot stats row has {len(row)} fields")
+            stats = BotStats(str(row[0]))
+            for name, value in zip(BotStats.__slots__[1:], row[1:]):
+                setattr(stats, name, int(value))
+            index._bots[stats.bot_name] = stats
+            index._slugs.setdefault(bot_slug(stats.bot_name), set()).add(stats.bot_name)
+        return index
+
 
 def _random_tx_hash() -> str:
     s = "0x" + "".join(random.choice("0123456789abcdef") for _ in range(64))
@@ -46,121 +301,225 @@ def _random_bot() -> str:
 
 
 class DataStore:
-    """In-memory store of recent events and kpi aggregations."""
+    """In-memory store of recent events and kpi aggregations.
+
+    Events live in a columnar ``EventRing``; aggregates and the per-bot index
+    are updated from the ring's slots on insert (``_on_insert``) and on
+    overflow (``_on_evict``).
+    """
 
-    def __init__(self, max_events: int = 1000) -> None:
-        self.events: Deque[MetricsEvent] = deque(maxlen=max_events)
+    def __init__(self, max_events: int = 1000, heatmap_edges: list[int] | None = None) -> None:
+        self.events = EventRing(max_events)
+        self._kpis = KpiAggregator()
+        self.bots = BotIndex()
+        self.rollups = RollupSet()
+        self.heatmap = LatencyHeatmap(heatmap_edges)
+        self.quantiles = LatencyQuantiles()
+        # Bumped on every change; lets renders be cached per version.
+        self.version = 0
+        # Optional write-through persistence; see ``EventLog``.
+        self.event_log: EventLog | None = None
+        # ((version, minute), p50/p95/p99) last computed by ``kpis``
+        self._percentiles: tuple[tuple[int, int], dict] | None = None
+        # Set (and replaced) on the next insert; see ``wait_since``.
+        self._new_data: asyncio.Event | None = None
 
     def add(self, evt: MetricsEvent) -> None:
-        self.events.append(evt)
+        self.add_record(EventRecord.from_event(evt))
+
+    def add_record(self, rec: EventRecord) -> int:
+        """Append a parsed record without building a ``MetricsEvent``. Returns its sequence."""
+        ring = self.events
+        if ring.full:
+            self._on_evict(ring.start_seq)
+        seq = ring.append(rec)
+        self._on_insert(seq)
+        self.version += 1
+        if self.event_log is not None:
+            self.event_log.append(rec)
+        if self._new_data is not None:
+            self._new_data.set()
+            self._new_data = None
+        return seq
+
+    def since(self, seq: int, limit: int | None = None) -> tuple[int, list[EventRecord]]:
+        """Buffered events after sequence ``seq``, oldest first, and the new cursor.
+
+        The cursor is the sequence of the newest event (``seq`` if there is
+        none); pass -1 to start from the oldest buffered event. Events
+        evicted before they were read are skipped, and with ``limit`` only
+        the newest ``limit`` are returned.
+        """
+        ring = self.events
+        first = max(seq + 1, ring.start_seq)
+        if limit is not None:
+            first = max(first, ring.next_seq - limit)
+        records = [ring.record_at(s % ring.maxlen) for s in range(first, ring.next_seq)]
+        return max(seq, ring.next_seq - 1), records
+
+    async def wait_since(self, seq: int, timeout: float | None = None) -> bool:
+        """Wait until an event newer than ``seq`` is added; False on timeout.
+
+        All waiters share one ``asyncio.Event`` per insert, so a burst of
+        inserts wakes each of them once.
+        """
+        if self.events.next_seq - 1 > seq:
+            return True
+        if self._new_data is None:
+            self._new_data = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._new_data.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def skip_to(self, seq: int) -> None:
+        """Evict every buffered event and number the next one ``seq``.
+
+        Used by backplane replicas (``app.backplane``) to keep their
+        sequence numbers equal to the hub's after missing events.
+        """
+        ring = self.events
+        for old in range(ring.start_seq, ring.next_seq):
+            self._on_evict(old)
+        ring.clear()
+        ring.start_seq = ring.next_seq = seq
+        self.version += 1
+
+    def _is_healthy(self, i: int) -> bool:
+        """Bot-health success: no error and an ok (or missing) status."""
+        ring = self.events
+        return ring.error[i] < 0 and ring.status_at(i) in (None, "ok")
+
+    def _on_insert(self, seq: int) -> None:
+        ring = self.events
+        i = seq % ring.maxlen
+        ts_ms = ring.ts_ms[i]
+        latency = ring.latency_ms[i]
+        success = ring.error[i] < 0
+        profit = ring.profit_at(i)
+        self._kpis.add(ts_ms, latency, success, profit)
+        self.rollups.add(ts_ms, latency, success, profit)
+        self.heatmap.add(ts_ms, latency)
+        bot = ring.bot_at(i)
+        self.bots.add(bot, seq, ts_ms, latency, self._is_healthy(i))
+        self.quantiles.add(bot, ts_ms, latency)
+
+    def _on_evict(self, seq: int) -> None:
+        ring = self.events
+        i = seq % ring.maxlen
+        latency = ring.latency_ms[i]
+        self._kpis.remove(ring.ts_ms[i], latency, ring.error[i] < 0, ring.profit_at(i))
+        bot = ring.bot_at(i)
+        self.bots.remove(bot, latency, self._is_healthy(i))
+        self.quantiles.remove(bot, latency)
+        if self.bots.get(bot) is None:
+            self.quantiles.drop_bot(bot)
+
+    def event_at_seq(self, seq: int) -> MetricsEvent | None:
+        """Return the event with sequence ``seq`` if it is still buffered."""
+        ring = self.events
+        if not ring.start_seq <= seq < ring.next_seq:
+            return None
+        return ring.event_at(seq % ring.maxlen)
+
+    def last_bot_event(self, bot_name: str) -> MetricsEvent | None:
+        stats = self.bots.get(bot_name)
+        return self.event_at_seq(stats.last_seq) if stats is not None else None
+
+    def last_slug_event(self, slug: str) -> MetricsEvent | None:
+        """Latest event of the bot whose ``bot_slug`` is ``slug``."""
+        stats = self.bots.by_slug(slug)
+        return self.event_at_seq(stats.last_seq) if stats is not None else None
 
     def last_events(self, n: int = 25) -> list[MetricsEvent]:
-        return list(self.events)[-n:][::-1]
+        return self.events.latest(n)
 
     def kpis(self) -> dict:
-        items = list(self.events)
-        if not items:
-            return {"avg_latency_ms": 0, "success_rate_pct": 0.0, "throughput_1m": 0, "avg_profit": 0.0}
-        # Avg latency
-        avg_latency = sum(e.latency_ms for e in items) / len(items)
-        # Success rate as last 60s successes / total
+        """Return avg latency, 60s success rate/throughput, avg profit and
+        5-minute p50/p95/p99 latency.
+
+        Served from running aggregates maintained by ``add``; see
+        ``KpiAggregator`` and ``LatencyQuantiles``. The percentiles merge
+        five per-minute sketches, so they are computed once per store
+        version and minute and then reused.
+        """
+        kpis = self._kpis.kpis()
         now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-        cutoff = now_ms - 60_000
-        last_minute = [e for e in items if int(e.timestamp.timestamp() * 1000) >= cutoff]
-        if last_minute:
-            successes = sum(1 for _e in last_minute if (_e.error is None))
-            success_rate = round(successes * 100.0 / len(last_minute), 2)
-        else:
-            success_rate = 0.0
-        throughput = len(last_minute)
-        avg_profit = 0.0
-        profits = [e.profit for e in items if isinstance(e.profit, (int, float))]
-        if profits:
-            avg_profit = round(sum(profits) / len(profits), 2)
-        return {
-            "avg_latency_ms": int(avg_latency),
-            "success_rate_pct": success_rate,
-            "throughput_1m": throughput,
-            "avg_profit": avg_profit,
-        }
+        key = (self.version, now_ms // 60_000)
+        if self._percentiles is None or self._percentiles[0] != key:
+            self._percentiles = (key, self.quantiles.window.window(5, now_ms).quantiles())
+        q = self._percentiles[1]
+        for name in ("p50", "p95", "p99"):
+            kpis[f"{name}_latency_ms"] = int(q[name] or 0)
+        return kpis
 
     def latency_series(self, n: int = 50) -> tuple[list[str], list[int]]:
-        items = list(self.events)[-n:]
-        labels = [e.timestamp.strftime("%H:%M:%S") for e in items]
-        values = [e.latency_ms for e in items]
+        ring = self.events
+        slots = ring.tail_slots(n)
+        labels = [ms_to_datetime(ring.ts_ms[i]).strftime("%H:%M:%S") for i in slots]
+        values = [ring.latency_ms[i] for i in slots]
         return labels, values
 
     def throughput_series(self, minutes: int = 30) -> tuple[list[str], list[int]]:
-        # Count events per minute for recent minutes present in data (up to `minutes` samples)
-        counts: dict[str, int] = {}
-        for e in self.events:
-            key = e.timestamp.strftime("%H:%M")
-            counts[key] = counts.get(key, 0) + 1
-        # Sort by time using a reasonable reconstruction from keys
-        keys_sorted = sorted(counts.keys())
-        if len(keys_sorted) > minutes:
-            keys_sorted = keys_sorted[-minutes:]
-        values = [counts[k] for k in keys_sorted]
-        return keys_sorted, values
+        """Events per minute for the ``minutes`` minutes ending at the newest event.
+
+        Read from the 1-minute rollup, so the cost is O(minutes).
+        """
+        buckets = self.rollups.window("1m", minutes)
+        labels = [ms_to_datetime(b.start_ms).strftime("%H:%M") for b in buckets]
+        values = [b.count for b in buckets]
+        return labels, values
+
+    def series(self, resolution: str = "1m", points: int = 60, end_ms: int | None = None) -> list[Bucket]:
+        """Precomputed rollup buckets, oldest first; see ``RollupSet``."""
+        return self.rollups.window(resolution, points, end_ms)
 
     def profit_series(self, n: int = 50) -> tuple[list[str], list[float]]:
-        items = list(self.events)[-n:]
+        ring = self.events
         labels: list[str] = []
         values: list[float] = []
         cum = 0.0
-        for e in items:
-            labels.append(e.timestamp.strftime("%H:%M:%S"))
-            if isinstance(e.profit, (int, float)):
-                cum += float(e.profit)
+        for i in ring.tail_slots(n):
+            labels.append(ms_to_datetime(ring.ts_ms[i]).strftime("%H:%M:%S"))
+            profit = ring.profit_at(i)
+            if profit is not None:
+                cum += profit
             values.append(round(cum, 4))
         return labels, values
 
     def heatmap_matrix(self, cols: int = 12) -> dict:
-        """Build a simple latency heatmap for recent time windows.
+        """Latency heatmap for recent time windows.
 
-        Rows are latency buckets (ms): [0-100, 100-200, 200-300, 300+]
-        Cols are 5-second windows for the last `cols`*5 seconds.
+        Rows are the configured latency buckets (default ms: 0-100, 100-200,
+        200-300, 300+); cols are the last `cols` 5-second slots. Read from the
+        incrementally maintained ``LatencyHeatmap``.
         """
-        now = datetime.now(timezone.utc)
-        window = timedelta(seconds=5)
-        # Prepare buckets
-        bucket_edges = [0, 100, 200, 300, 10**9]
-        row_labels = ["0-100", "100-200", "200-300", "300+"]
-        # Precompute windows
-        col_starts = [now - window * (cols - i) for i in range(cols)]
-        col_ends = [start + window for start in col_starts]
-        # Initialize matrix
-        matrix = [[0 for _ in range(cols)] for _ in range(4)]
-        for e in self.events:
-            # find column
-            for j, (s, t) in enumerate(zip(col_starts, col_ends)):
-                if s <= e.timestamp <= t:
-                    # find row (bucket)
-                    lat = e.latency_ms
-                    for r in range(4):
-                        if bucket_edges[r] <= lat < bucket_edges[r+1]:
-                            matrix[r][j] += 1
-                            break
-                    break
-        # Flatten for chart.js matrix
-        cells = []
-        for r in range(4):
-            for c in range(cols):
-                cells.append({"x": c, "y": r, "v": matrix[r][c]})
-        return {"cells": cells, "rows": row_labels, "cols": cols}
-
-    def _is_same_utc_day(self, a: datetime, b: datetime) -> bool:
-        a_d = a.astimezone(timezone.utc).date()
-        b_d = b.astimezone(timezone.utc).date()
-        return a_d == b_d
+        return self.heatmap.matrix(cols)
+
+    def _day_slots(self, day: datetime | None = None) -> list[int]:
+        start_ms, end_ms = utc_day_bounds_ms(day)
+        ts_col = self.events.ts_ms
+        return [i for i in self.events.slots() if start_ms <= ts_col[i] < end_ms]
 
     def daily_events(self, day: datetime | None = None) -> list[MetricsEvent]:
-        ref = day or datetime.now(timezone.utc)
-        return [e for e in self.events if self._is_same_utc_day(e.timestamp, ref)]
+        return [self.events.event_at(i) for i in self._day_slots(day)]
+
+    async def daily_summary(self) -> dict:
+        """Summary of today's (UTC) events.
 
-    def daily_summary(self) -> dict:
-        items = self.daily_events()
-        total = len(items)
+        Served from the persistent ``EventLog`` when one is attached, so it
+        covers the whole day rather than only what is still in memory; that
+        flushes and aggregates on disk, in a worker thread.
+        """
+        if self.event_log is not None:
+            return await asyncio.to_thread(self.event_log.daily_summary)
+        return self._ring_summary()
+
+    def _ring_summary(self) -> dict:
+        ring = self.events
+        slots = self._day_slots()
+        total = len(slots)
         if total == 0:
             return {
                 "total_events": 0,
@@ -170,26 +529,30 @@ class DataStore:
                 "status_counts": {"ok": 0, "warning": 0, "critical": 0},
                 "top_bots": [],
             }
-        avg_latency = sum(e.latency_ms for e in items) / total
-        successes = sum(1 for e in items if not e.error and (e.status in (None, "ok")))
-        success_rate = round(successes * 100.0 / total, 2)
-        profit_total = round(sum(float(e.profit) for e in items if isinstance(e.profit, (int, float))), 4)
+        avg_latency = sum(ring.latency_ms[i] for i in slots) / total
+        successes = 0
+        profit_total = 0.0
         status_counts = {"ok": 0, "warning": 0, "critical": 0}
-        for e in items:
-            st = e.status or ("ok" if not e.error else "critical")
-            if st not in status_counts:
-                status_counts[st] = 0
-            status_counts[st] += 1
         bot_profit: dict[str, float] = {}
-        for e in items:
-            if isinstance(e.profit, (int, float)):
-                bot_profit[e.bot_name] = bot_profit.get(e.bot_name, 0.0) + float(e.profit)
+        for i in slots:
+            error = ring.error_at(i)
+            status = ring.status_at(i)
+            if not error and status in (None, "ok"):
+                successes += 1
+            st = status or ("ok" if not error else "critical")
+            status_counts[st] = status_counts.get(st, 0) + 1
+            profit = ring.profit_at(i)
+            if profit is not None:
+                profit_total += profit
+                bot = ring.bot_at(i)
+                bot_profit[bot] = bot_profit.get(bot, 0.0) + profit
+        success_rate = round(successes * 100.0 / total, 2)
         top_bots = sorted(bot_profit.items(), key=lambda kv: kv[1], reverse=True)[:5]
         return {
             "total_events": total,
             "avg_latency_ms": int(avg_latency),
             "success_rate_pct": success_rate,
-            "profit_total": profit_total,
+            "profit_total": round(profit_total, 4),
             "status_counts": status_counts,
             "top_bots": top_bots,
         }
@@ -244,11 +607,18 @@ class SensorStore:
         return labels, temps, hums
 
 
-async def mock_metrics_publisher(broker: SSEBroker, store: DataStore, render_html) -> None:
+async def mock_metrics_publisher(
+    broker: SSEBroker,
+    store: DataStore,
+    render_cache: MetricsRenderCache,
+    scheduler: PublishScheduler | None = None,
+) -> None:
     """Generate mock metrics and publish pre-rendered HTML to SSE broker.
 
     Throughput target: ~5–20 events per minute with jitter.
     """
+    if scheduler is None:
+        scheduler = PublishScheduler(broker, store, render_cache, frame_interval=0.0)
     # Determine a base interval with jitter to hit 5–20 events/minute (~3–12s)
     # Initialize fake sensors for the optional 5th view
     sensor = SensorData()
@@ -284,28 +654,13 @@ async def mock_metrics_publisher(broker: SSEBroker, store: DataStore, render_htm
         sensor_store.add(reading)
         sensor_store.ensure_min_samples(sensor, 20)
         s_labels, s_temp, s_hum = sensor_store.series()
-        kpis = store.kpis()
-        labels, values = store.latency_series()
-        thr_labels, thr_values = store.throughput_series()
-        prof_labels, prof_values = store.profit_series()
-        heat = store.heatmap_matrix()
-        html = render_html(
-            "partials/metrics.html",
-            {
-                "kpis": kpis,
-                "latency_series": list(zip(labels, values)),
-                "throughput_series": list(zip(thr_labels, thr_values)),
-                "profit_series": list(zip(prof_labels, prof_values)),
-                "heatmap": heat,
-                "last_events": store.last_events(25),
-                # Sensors view data
-                "sensor_labels": s_labels,
-                "sensor_temp_values": s_temp,
-                "sensor_humidity_values": s_hum,
-                "sensor_latest": reading,
-            },
+        render_cache.update_extra(
+            sensor_labels=s_labels,
+            sensor_temp_values=s_temp,
+            sensor_humidity_values=s_hum,
+            sensor_latest=reading,
         )
-        await broker.publish(html)
+        await scheduler.flush()
 
         # Sleep 3-12 seconds to simulate 5–20 events per minute
         sleep_s = random.uniform(3, 12)
@@ -322,6 +677,15 @@ def _shorten_tx_hash(tx: str) -> str:
 
 def parse_bot_log_to_event(log_obj: dict) -> MetricsEvent | None:
     """Parse bot log JSON and extract metrics to create a MetricsEvent.
+
+    See ``parse_bot_log_to_record`` for the extraction rules.
+    """
+    rec = parse_bot_log_to_record(log_obj)
+    return rec.to_event() if rec is not None else None
+
+
+def parse_bot_log_to_record(log_obj: dict) -> EventRecord | None:
+    """Parse bot log JSON into an ``EventRecord`` without pydantic validation.
     
     Extracts:
     - Timestamp from log
@@ -330,45 +694,25 @@ def parse_bot_log_to_event(log_obj: dict) -> MetricsEvent | None:
     - Status from log level
     - Bot name from message patterns
     - Fees/profit info if available
+
+    Everything but the timestamp and status comes from one pass of the
+    configured ``LogClassifier`` (see ``app.logrules``).
     """
-    import re
-    
     # Parse timestamp
-    if isinstance(log_obj.get("timestamp"), str):
-        ts = datetime.fromisoformat(log_obj["timestamp"].replace("Z", "+00:00"))
-    elif isinstance(log_obj.get("time"), str):
-        ts = datetime.fromisoformat(log_obj["time"].replace("Z", "+00:00"))
+    stamp = log_obj.get("timestamp")
+    if not isinstance(stamp, str):
+        stamp = log_obj.get("time")
+    if isinstance(stamp, str):
+        ts = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
     else:
         ts = datetime.now(timezone.utc)
     
     message = str(log_obj.get("message", ""))
     level = log_obj.get("level", 20)
+    found = get_classifier().classify(message)
     
-    # Extract transaction hash from message
-    tx_hash = ""
-    tx_pattern = r'0x[a-fA-F0-9]{64}'
-    tx_matches = re.findall(tx_pattern, message)
-    if tx_matches:
-        tx_hash = _shorten_tx_hash(tx_matches[-1])  # Use last match (most recent)
-    
-    # Extract latency from timing messages (e.g., "10.560s" or "28.330s")
-    latency_ms = 0
-    latency_pattern = r'(\d+\.?\d*)\s*s\s*\('
-    latency_match = re.search(latency_pattern, message)
-    if latency_match:
-        latency_seconds = float(latency_match.group(1))
-        latency_ms = int(latency_seconds * 1000)
-    
-    # Extract bot name from message patterns
-    bot_name = "bot"
-    if "price[" in message.lower():
-        bot_name = "price-bot"
-    elif "rsi[" in message.lower():
-        bot_name = "rsi-bot"
-    elif "trade" in message.lower() or "perform_trade" in message.lower():
-        bot_name = "trading-bot"
-    elif "amount_to_sell" in message.lower():
-        bot_name = "strategy-bot"
+    # Last transaction hash in the message (most recent)
+    tx_hash = _shorten_tx_hash(found.tx_hash) if found.tx_hash else ""
     
     # Determine status from level and message
     status = "ok"
@@ -378,27 +722,20 @@ def parse_bot_log_to_event(log_obj: dict) -> MetricsEvent | None:
         error = message[:100]  # First 100 chars
     elif level == 30:
         status = "warning"
-        if "rate-limited" in message.lower():
+        if found.rate_limited:
             error = "Rate limited"
     elif level == 20:
         status = "ok"
     
-    # Extract fees/profit if mentioned
-    profit = None
-    fee_pattern = r'total fees paid\s*=\s*(\d+)'
-    fee_match = re.search(fee_pattern, message)
-    if fee_match:
-        # Convert fees to a small negative profit impact (for visualization)
-        fees = int(fee_match.group(1))
-        # Assume fees are in wei, convert to ETH and make negative
-        profit = -float(fees) / 1e18 if fees > 0 else None
+    # Convert fees (wei) to a small negative profit impact (for visualization)
+    profit = -float(found.fees) / 1e18 if found.fees else None
     
     # Only create event if we have meaningful data
-    if tx_hash or latency_ms > 0 or "Confirmed" in message or "Submitted" in message:
-        return MetricsEvent(
-            timestamp=ts,
-            bot_name=bot_name,
-            latency_ms=latency_ms,
+    if tx_hash or found.latency_ms > 0 or found.marker:
+        return EventRecord(
+            ts_ms=int(ts.timestamp() * 1000),
+            bot_name=found.bot_name,
+            latency_ms=found.latency_ms,
             success_rate=100.0 if status == "ok" else 0.0,
             tx_hash=tx_hash,
             error=error,
@@ -410,13 +747,25 @@ def parse_bot_log_to_event(log_obj: dict) -> MetricsEvent | None:
 
 
 def parse_silverback_json(obj: dict) -> MetricsEvent:
+    return parse_silverback_record(obj).to_event()
+
+
+def parse_silverback_record(obj: dict) -> EventRecord:
+    """Parse a Silverback JSONL object into an ``EventRecord``.
+
+    ``obj`` is a dict or anything else with ``.get`` (see
+    ``app.codec.decode_silverback``).
+
+    Raises ``ValueError`` for records ``MetricsEvent`` would reject.
+    """
     # Timestamp
-    if isinstance(obj.get("timestamp"), str):
-        ts = datetime.fromisoformat(obj["timestamp"].replace("Z", "+00:00"))
-    elif isinstance(obj.get("time"), str):
-        ts = datetime.fromisoformat(obj["time"].replace("Z", "+00:00"))
+    stamp = obj.get("timestamp")
+    if not isinstance(stamp, str):
+        stamp = obj.get("time")
+    if isinstance(stamp, str):
+        ts = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
     elif isinstance(obj.get("ts"), (int, float)):
-        ts = datetime.fromtimestamp(float(obj["ts"]), tz=timezone.utc)
+        ts = datetime.fromtimestamp(float(obj.get("ts")), tz=timezone.utc)
     else:
         ts = datetime.now(timezone.utc)
 
@@ -424,96 +773,117 @@ def parse_silverback_json(obj: dict) -> MetricsEvent:
 
     # Latency
     latency_ms = None
-    if isinstance(obj.get("latency_ms"), (int, float)):
-        latency_ms = int(obj["latency_ms"])
-    elif isinstance(obj.get("latency"), (int, float)):
-        val = float(obj["latency"])  # seconds or ms
+    raw_latency_ms, raw_latency = obj.get("latency_ms"), obj.get("latency")
+    if isinstance(raw_latency_ms, (int, float)):
+        latency_ms = int(raw_latency_ms)
+    elif isinstance(raw_latency, (int, float)):
+        val = float(raw_latency)  # seconds or ms
         latency_ms = int(val * 1000 if val < 1000 else val)
     if latency_ms is None:
         latency_ms = 0
+    if latency_ms < 0:
+        raise ValueError(f"negative latency: {latency_ms}")
 
     # Error / status
     err = obj.get("error") or obj.get("err") or obj.get("message")
     status = obj.get("status")
 
     # Profit (optional)
-    profit = None
-    if isinstance(obj.get("profit"), (int, float)):
-        profit = float(obj["profit"])
+    profit = obj.get("profit")
+    profit = float(profit) if isinstance(profit, (int, float)) else None
 
     # Tx hash
     raw_tx = obj.get("tx_hash") or obj.get("hash") or obj.get("tx") or ""
     tx_hash = _shorten_tx_hash(raw_tx) if raw_tx else ""
 
-    return MetricsEvent(
-        timestamp=ts,
+    return EventRecord(
+        ts_ms=int(ts.timestamp() * 1000),
         bot_name=str(bot),
         latency_ms=int(latency_ms),
         success_rate=0.0,
-        tx_hash=tx_hash,
+        tx_hash=str(tx_hash),
         error=str(err) if err is not None else None,
         status=str(status) if status else ("ok" if not err else "critical"),
         profit=profit,
     )
 
 
-async def tail_jsonl_and_broadcast(path: Path, broker: SSEBroker, store: DataStore, render_html, from_start: bool = False) -> None:
-    """Tail a JSONL file and broadcast rendered HTML using the same partial as mock mode."""
-    last_publish = 0.0
-    while True:
-        try:
-            if not path.exists():
-                await asyncio.sleep(1.0)
-                continue
-            with path.open("r", encoding="utf-8") as f:
-                if not from_start:
-                    f.seek(0, 2)
-                while True:
-                    line = f.readline()
-                    if line == "":
-                        # No new line; periodically publish a keepalive update with latest aggregates
-                        await asyncio.sleep(0.5)
-                        now = asyncio.get_event_loop().time()
-                        if now - last_publish > 5.0:
-                            kpis = store.kpis()
-                            labels, values = store.latency_series()
-                            html = render_html(
-                                "partials/metrics.html",
-                                {
-                                    "kpis": kpis,
-                                    "latency_series": list(zip(labels, values)),
-                                    "last_events": store.last_events(25),
-                                },
-                            )
-                            await broker.publish(html)
-                            last_publish = now
+async def tail_jsonl_and_broadcast(
+    path: Path,
+    broker: SSEBroker,
+    store: DataStore,
+    render_cache: MetricsRenderCache,
+    from_start: bool = False,
+    cursor: dict | None = None,
+    frame_interval: float = 0.25,
+    batch_lines: int = 1000,
+    scheduler: PublishScheduler | None = None,
+    keepalive: float = 5.0,
+) -> None:
+    """Tail a JSONL file and broadcast rendered HTML using the same partial as mock mode.
+
+    Lines are read in blocks off the event loop and the tailer sleeps on
+    inotify between writes, following log rotation (see ``app.tailer``).
+    Each block is applied to the store ``batch_lines`` lines at a time; a
+    ``PublishScheduler`` then broadcasts at most one render per
+    ``frame_interval`` seconds, except that critical events are flushed
+    right after the batch that contained them. Pass ``scheduler`` to share
+    one with other publishers (``frame_interval`` is then ignored). With
+    nothing new for ``keepalive`` seconds, the latest aggregates are
+    broadcast anyway.
+
+    ``cursor`` (if given) is kept up to date with ``path``, ``inode`` and the
+    byte ``offset`` read so far; when it already describes the same file the
+    tailer resumes from that offset instead of the end (see ``app.snapshot``).
+    """
+    if scheduler is None:
+        scheduler = PublishScheduler(broker, store, render_cache, frame_interval=frame_interval)
+    tailer = JsonlTailer(path, cursor=cursor, from_start=from_start)
+    try:
+        while True:
+            try:
+                if store.event_log is not None:
+                    # The file is the buffer while the event store catches up
+                    await store.event_log.wait_for_room()
+                try:
+                    lines = await tailer.read_lines()
+                except OSError:
+                    logger.exception("Failed to read %s", path)
+                    await asyncio.sleep(1.0)
+                    continue
+                for start in range(0, len(lines), batch_lines):
+                    critical = False
+                    applied = 0
+                    for line in lines[start:start + batch_lines]:
                         try:
-                            if f.tell() > path.stat().st_size:
-                                break
-                        except FileNotFoundError:
-                            break
-                        continue
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        obj = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-                    evt = parse_silverback_json(obj)
-                    store.add(evt)
-                    kpis = store.kpis()
-                    labels, values = store.latency_series()
-                    html = render_html(
-                        "partials/metrics.html",
-                        {
-                            "kpis": kpis,
-                            "latency_series": list(zip(labels, values)),
-                            "last_events": store.last_events(25),
-                        },
-                    )
-                    await broker.publish(html)
-        except Exception:
-            await asyncio.sleep(1.0)
-
-
+                            obj = decode_silverback(line)
+                        except DecodeError:
+                            # Also blank lines
+                            continue
+                        if obj is None:
+                            continue
+                        try:
+                            rec = parse_silverback_record(obj)
+                        except (TypeError, ValueError):
+                            continue
+                        store.add_record(rec)
+                        applied += 1
+                        critical = critical or is_critical(rec.status, rec.error)
+                    if applied:
+                        scheduler.mark(critical)
+                    await scheduler.maybe_flush()
+                    # Let subscribers drain between batches of a large backlog
+                    await asyncio.sleep(0)
+                if lines:
+                    continue
+                # Caught up: sleep until the file changes or the pending frame or a keepalive is due
+                idle = keepalive - (scheduler.clock() - scheduler.last_publish)
+                await tailer.wait(max(0.0, scheduler.delay() if scheduler.dirty else idle))
+                if not await scheduler.maybe_flush() and scheduler.clock() - scheduler.last_publish >= keepalive:
+                    await scheduler.flush()
+            except Exception:
+                # Keep ingesting after a bad record or a failed publish
+                logger.exception("Tailing %s failed; retrying", path)
+                await asyncio.sleep(1.0)
+    finally:
+        tailer.close()
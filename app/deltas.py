@@ -0,0 +1,268 @@
+"""Incremental SSE updates for the metrics panel and JSON consumers.
+
+A client receives the full state once, on connect, and after that each
+publish carries only what changed since the previous publish.
+
+HTML channel (``/stream``), on top of the ``metrics_update`` snapshot:
+
+``metrics_kpis``
+    KPI value elements whose rendered HTML changed, marked
+    ``hx-swap-oob`` so htmx swaps them in place by id.
+``metrics_rows``
+    ``<tr>`` rows for events appended since the last publish, newest first,
+    swapped ``afterbegin`` into the recent events table.
+``metrics_series``
+    JSON with new latency points (tagged with their sequence numbers),
+    the whole profit chart when it moved (its cumulative values restart at
+    the window's first point, so every value shifts as the window
+    slides), the current throughput minute(s), and the heatmap/sensor
+    payloads when they changed; ``static/js/main.js`` merges it into the
+    chart card.
+
+JSON channel (``/stream?format=json&topics=...``), on top of the
+``snapshot`` event from ``json_snapshot``: one event per topic in
+``JSON_TOPICS``, each serialized once per publish and shared by every
+JSON subscriber. Timestamps are epoch milliseconds.
+
+Two more kinds of JSON topics are only sent to clients that ask for them
+by name: ``bot:<slug>`` carries one bot's stats and new events (built
+only for bots somebody is watching), and ``rentals`` carries rental
+changes from ``app.routers.rentals``.
+"""
+from __future__ import annotations
+
+import json
+from typing import Iterable, Optional
+
+from jinja2 import Environment
+
+from .data import bot_slug
+from .eventbuffer import ms_to_datetime
+from .sse import HTML, JSON
+
+FRAGMENTS_TEMPLATE = "partials/metrics_fragments.html"
+KPI_FRAGMENTS = ("kpi_latency", "kpi_success", "kpi_throughput", "kpi_p95", "kpi_percentiles")
+SENSOR_KEYS = ("sensor_labels", "sensor_temp_values", "sensor_humidity_values")
+JSON_TOPICS = ("kpis", "latency", "profit", "throughput", "heatmap", "events", "sensors")
+BOT_TOPIC = "bot:"
+RENTALS_TOPIC = "rentals"
+
+Frame = tuple[str, str, str]  # (channel, event, data)
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _event_json(ring, seq: int) -> dict:
+    i = seq % ring.maxlen
+    return {
+        "seq": seq,
+        "ts": ring.ts_ms[i],
+        "bot": ring.bot_at(i),
+        "latency_ms": ring.latency_ms[i],
+        "status": ring.status_at(i),
+        "error": ring.error_at(i),
+        "profit": ring.profit_at(i),
+        "tx": ring.tx_at(i),
+    }
+
+
+def _points(ring, first: int) -> dict:
+    seqs, ts, latency, profit = [], [], [], []
+    for seq in range(first, ring.next_seq):
+        i = seq % ring.maxlen
+        seqs.append(seq)
+        ts.append(ring.ts_ms[i])
+        latency.append(ring.latency_ms[i])
+        profit.append(ring.profit_at(i) or 0.0)
+    return {"seqs": seqs, "ts": ts, "latency": latency, "profit": profit}
+
+
+def is_json_topic(topic: str) -> bool:
+    return topic in JSON_TOPICS or topic == RENTALS_TOPIC or (
+        topic.startswith(BOT_TOPIC) and len(topic) > len(BOT_TOPIC)
+    )
+
+
+def _bot_json(store, stats) -> dict:
+    sketch = store.quantiles.bot(stats.bot_name)
+    q = sketch.quantiles() if sketch is not None else {}
+    return {
+        "bot_name": stats.bot_name,
+        "total_count": stats.total_count,
+        "failure_count": stats.failure_count,
+        "success_ratio": round(stats.success_ratio, 2),
+        "latency_ms": round(stats.avg_latency, 2),
+        "p50_latency_ms": round(q.get("p50") or 0, 2),
+        "p95_latency_ms": round(q.get("p95") or 0, 2),
+        "p99_latency_ms": round(q.get("p99") or 0, 2),
+        "last_ts": stats.last_ts_ms,
+    }
+
+
+def _bot_payload(store, slug: str, seqs: Iterable[int]) -> Optional[dict]:
+    stats = store.bots.by_slug(slug)
+    if stats is None:
+        return None
+    return {"bot": _bot_json(store, stats), "events": [_event_json(store.events, seq) for seq in seqs]}
+
+
+def _throughput(store, minutes: int) -> dict:
+    buckets = store.rollups.window("1m", minutes)
+    return {"ts": [b.start_ms for b in buckets], "values": [b.count for b in buckets]}
+
+
+def json_snapshot(store, topics: Optional[Iterable[str]] = None, extra: Optional[dict] = None,
+                  points: int = 50, rows: int = 25) -> str:
+    """Full JSON state for a new JSON subscriber, limited to ``topics``."""
+    wanted = set(JSON_TOPICS if topics is None else topics)
+    ring = store.events
+    out: dict = {"seq": ring.next_seq - 1}
+    if "kpis" in wanted:
+        out["kpis"] = store.kpis()
+    if wanted & {"latency", "profit"}:
+        pts = _points(ring, max(ring.start_seq, ring.next_seq - points))
+        if "latency" in wanted:
+            out["latency"] = {"seqs": pts["seqs"], "ts": pts["ts"], "values": pts["latency"]}
+        if "profit" in wanted:
+            out["profit"] = {"seqs": pts["seqs"], "ts": pts["ts"], "deltas": pts["profit"]}
+    if "throughput" in wanted:
+        out["throughput"] = _throughput(store, 30)
+    if "heatmap" in wanted:
+        out["heatmap"] = store.heatmap_matrix()
+    if "events" in wanted:
+        first = max(ring.start_seq, ring.next_seq - rows)
+        out["events"] = [_event_json(ring, seq) for seq in range(first, ring.next_seq)]
+    if "sensors" in wanted and extra:
+        out["sensors"] = {k: extra[k] for k in SENSOR_KEYS if k in extra}
+    slugs = {t[len(BOT_TOPIC):] for t in wanted if t.startswith(BOT_TOPIC)}
+    if slugs:
+        recent: dict[str, list[int]] = {slug: [] for slug in slugs}
+        for seq in range(ring.next_seq - 1, ring.start_seq - 1, -1):
+            seqs = recent.get(bot_slug(ring.bot_at(seq % ring.maxlen)))
+            if seqs is not None and len(seqs) < rows:
+                seqs.append(seq)
+        out["bots"] = {
+            slug: _bot_payload(store, slug, reversed(seqs)) for slug, seqs in recent.items()
+        }
+    return _dumps(out)
+
+
+class MetricsDeltas:
+    """Diff the store against what was last broadcast and emit SSE deltas."""
+
+    def __init__(self, env: Environment, rows: int = 25, series_points: int = 50) -> None:
+        self.env = env
+        self.rows = rows
+        self.series_points = series_points
+        self._module = env.get_template(FRAGMENTS_TEMPLATE).module
+        self.reset()
+
+    def reset(self) -> None:
+        self.seq = -1
+        self._kpis: Optional[dict] = None
+        self._kpi_html: dict[str, str] = {}
+        self._throughput: Optional[dict] = None
+        self._heatmap: Optional[dict] = None
+        self._sensors: Optional[dict] = None
+
+    def build(self, store, extra: Optional[dict] = None,
+              channels: Iterable[str] = (HTML, JSON), topics: Iterable[str] = ()) -> list[Frame]:
+        """``(channel, event, data)`` frames describing changes since the previous call.
+
+        Only ``channels`` are rendered, but the diff state always advances.
+        ``topics`` are the JSON topics subscribed to by name; a
+        ``bot:<slug>`` frame is built for each of those bots with new events.
+        """
+        channels = set(channels)
+        html, as_json = HTML in channels, JSON in channels
+        out: list[Frame] = []
+        ring = store.events
+        newest = ring.next_seq - 1
+        first = max(self.seq + 1, ring.start_seq, ring.next_seq - self.series_points)
+        self.seq = max(self.seq, newest)
+        series: dict = {"seq": newest}
+
+        if first <= newest:
+            if html:
+                rows = [
+                    str(self._module.event_row(ring.event_at(seq % ring.maxlen), seq))
+                    for seq in range(newest, max(first, ring.next_seq - self.rows) - 1, -1)
+                ]
+                out.append((HTML, "metrics_rows", "\n".join(rows)))
+            pts = _points(ring, first)
+            series["latency"] = {
+                "seqs": pts["seqs"],
+                "labels": [ms_to_datetime(t).strftime("%H:%M:%S") for t in pts["ts"]],
+                "values": pts["latency"],
+            }
+            # Same values as the snapshot render, which the client replaces wholesale
+            labels, values = store.profit_series(self.series_points)
+            series["profit"] = {"labels": labels, "values": values}
+            if as_json:
+                out.append((JSON, "latency", _dumps({"seqs": pts["seqs"], "ts": pts["ts"], "values": pts["latency"]})))
+                out.append((JSON, "profit", _dumps({"seqs": pts["seqs"], "ts": pts["ts"], "deltas": pts["profit"]})))
+                out.append((JSON, "events", _dumps([_event_json(ring, seq) for seq in range(first, newest + 1)])))
+                out.extend(self._bot_frames(store, first, topics))
+
+        kpis = store.kpis()
+        if kpis != self._kpis:
+            self._kpis = kpis
+            if as_json:
+                out.append((JSON, "kpis", _dumps(kpis)))
+            if html:
+                changed = []
+                for name in KPI_FRAGMENTS:
+                    fragment = str(getattr(self._module, name)(kpis, oob=True))
+                    if self._kpi_html.get(name) != fragment:
+                        self._kpi_html[name] = fragment
+                        changed.append(fragment)
+                if changed:
+                    out.append((HTML, "metrics_kpis", "\n".join(changed)))
+
+        throughput = _throughput(store, 2)
+        if throughput != self._throughput:
+            self._throughput = throughput
+            series["throughput"] = {
+                "labels": [ms_to_datetime(t).strftime("%H:%M") for t in throughput["ts"]],
+                "values": throughput["values"],
+            }
+            if as_json:
+                out.append((JSON, "throughput", _dumps(throughput)))
+
+        heatmap = store.heatmap_matrix()
+        if heatmap != self._heatmap:
+            self._heatmap = heatmap
+            series["heatmap"] = heatmap
+            if as_json:
+                out.append((JSON, "heatmap", _dumps(heatmap)))
+
+        if extra:
+            sensors = {k: extra[k] for k in SENSOR_KEYS if k in extra}
+            if sensors and sensors != self._sensors:
+                self._sensors = sensors
+                series["sensors"] = sensors
+                if as_json:
+                    out.append((JSON, "sensors", _dumps(sensors)))
+
+        if html and len(series) > 1:
+            out.append((HTML, "metrics_series", _dumps(series)))
+        return out
+
+    def _bot_frames(self, store, first: int, topics: Iterable[str]) -> list[Frame]:
+        watched = {t[len(BOT_TOPIC):] for t in topics if t.startswith(BOT_TOPIC)}
+        if not watched:
+            return []
+        ring = store.events
+        new: dict[str, list[int]] = {}
+        for seq in range(first, ring.next_seq):
+            slug = bot_slug(ring.bot_at(seq % ring.maxlen))
+            if slug in watched:
+                new.setdefault(slug, []).append(seq)
+        frames = []
+        for slug, seqs in new.items():
+            payload = _bot_payload(store, slug, seqs)
+            if payload is not None:
+                frames.append((JSON, BOT_TOPIC + slug, _dumps(payload)))
+        return frames
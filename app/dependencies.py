@@ -1,9 +1,16 @@
 """FastAPI dependencies."""
 from __future__ import annotations
 
+from typing import Optional
+
 from fastapi import Request
 
+from app.backplane import BackplaneRelay
 from app.data import DataStore
+from app.ingest import IngestQueue
+from app.publisher import PublishScheduler
+from app.render_cache import MetricsRenderCache
+from app.row_templates import RowTemplates
 from app.sse import SSEBroker
 
 
@@ -17,3 +24,26 @@ def get_broker(request: Request) -> SSEBroker:
     return request.app.state.broker
 
 
+def get_render_cache(request: Request) -> MetricsRenderCache:
+    """Get the shared metrics partial render cache from app state."""
+    return request.app.state.render_cache
+
+
+def get_row_templates(request: Request) -> RowTemplates:
+    """Get the shared pre-compiled row fragments from app state."""
+    return request.app.state.row_templates
+
+
+def get_publisher(request: Request) -> PublishScheduler:
+    """Get the shared metrics publisher from app state."""
+    return request.app.state.publisher
+
+
+def get_relay(request: Request) -> Optional[BackplaneRelay]:
+    """Get the backplane relay when this process is a worker fed by a hub."""
+    return request.app.state.relay
+
+
+def get_ingest_queue(request: Request) -> IngestQueue:
+    """Get the queue feeding uploaded log batches to the ingest worker."""
+    return request.app.state.ingest_queue
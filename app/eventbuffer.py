@@ -0,0 +1,322 @@
+"""Columnar, array-backed ring buffer for metrics events.
+
+``EventRing`` keeps one typed ``array`` per field instead of one pydantic
+object per event. Strings (bot names, errors, statuses and non-canonical tx
+hashes) are interned in refcounted tables, and shortened tx hashes of the
+usual ``0x12345678...abcdef`` form are packed straight into an int64.
+``MetricsEvent`` objects are only built when a caller asks for rows.
+
+Every appended event gets a global sequence number; the ring holds the
+sequences ``[start_seq, next_seq)`` and a sequence lives in slot
+``seq % maxlen``.
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from datetime import datetime, timezone
+from typing import Iterator, NamedTuple, Optional
+
+from .models import MetricsEvent
+
+
+class EventRecord(NamedTuple):
+    """Plain-tuple event as produced by the ingest parsers."""
+
+    ts_ms: int
+    bot_name: str
+    latency_ms: int
+    success_rate: float = 0.0
+    tx_hash: str = ""
+    error: Optional[str] = None
+    status: Optional[str] = None
+    profit: Optional[float] = None
+
+    @classmethod
+    def from_event(cls, evt: MetricsEvent) -> "EventRecord":
+        profit = float(evt.profit) if isinstance(evt.profit, (int, float)) else None
+        return cls(
+            int(evt.timestamp.timestamp() * 1000),
+            evt.bot_name,
+            int(evt.latency_ms),
+            float(evt.success_rate),
+            evt.tx_hash,
+            evt.error,
+            evt.status,
+            profit,
+        )
+
+    def to_event(self) -> MetricsEvent:
+        """Build a validated ``MetricsEvent`` from this record."""
+        return MetricsEvent(
+            timestamp=ms_to_datetime(self.ts_ms),
+            bot_name=self.bot_name,
+            latency_ms=self.latency_ms,
+            success_rate=self.success_rate,
+            tx_hash=self.tx_hash,
+            error=self.error,
+            status=self.status,
+            profit=self.profit,
+        )
+
+
+def ms_to_datetime(ts_ms: int) -> datetime:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
+
+
+class StringTable:
+    """Refcounted intern table mapping strings to small integer ids.
+
+    ``None`` is always id ``-1``. Ids are recycled once their refcount drops
+    to zero, so the table never grows past the number of distinct live values.
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._strings: list[Optional[str]] = []
+        self._refs: list[int] = []
+        self._free: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        idx = self._ids.get(value)
+        if idx is not None:
+            self._refs[idx] += 1
+            return idx
+        if self._free:
+            idx = self._free.pop()
+            self._strings[idx] = value
+            self._refs[idx] = 1
+        else:
+            idx = len(self._strings)
+            self._strings.append(value)
+            self._refs.append(1)
+        self._ids[value] = idx
+        return idx
+
+    def release(self, idx: int) -> None:
+        if idx < 0:
+            return
+        self._refs[idx] -= 1
+        if self._refs[idx] <= 0:
+            value = self._strings[idx]
+            self._strings[idx] = None
+            self._refs[idx] = 0
+            if value is not None:
+                self._ids.pop(value, None)
+            self._free.append(idx)
+
+    def get(self, idx: int) -> Optional[str]:
+        if idx < 0:
+            return None
+        return self._strings[idx]
+
+    def lookup(self, value: str) -> int:
+        """Return the id of ``value`` without taking a reference (``-1`` if absent)."""
+        return self._ids.get(value, -1)
+
+    def to_state(self) -> dict:
+        return {"strings": list(self._strings), "refs": list(self._refs)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StringTable":
+        strings, refs = list(state["strings"]), [int(n) for n in state["refs"]]
+        if len(strings) != len(refs):
+            raise ValueError("string table has mismatched lengths")
+        table = cls()
+        table._strings, table._refs = strings, refs
+        for idx, (value, n) in enumerate(zip(strings, refs)):
+            if n > 0 and isinstance(value, str):
+                table._ids[value] = idx
+            else:
+                strings[idx], refs[idx] = None, 0
+                table._free.append(idx)
+        return table
+
+
+# Shortened hashes look like "0x" + 8 hex + "..." + 6 hex (see _shorten_tx_hash).
+_TX_PACKED = 1 << 60
+_TX_EMPTY = -1
+_HEX = frozenset("0123456789abcdef")
+
+
+def _pack_tx(tx: str) -> int:
+    """Return the packed form of a canonical short hash, or ``-1`` if not packable."""
+    if len(tx) != 19 or not tx.startswith("0x") or tx[10:13] != "...":
+        return -1
+    digits = tx[2:10] + tx[13:]
+    if not _HEX.issuperset(digits):
+        return -1
+    return _TX_PACKED + int(digits, 16)
+
+
+def _unpack_tx(value: int) -> str:
+    digits = format(value - _TX_PACKED, "014x")
+    return f"0x{digits[:8]}...{digits[8:]}"
+
+
+class EventRing:
+    """Fixed-capacity columnar ring of events addressed by sequence number."""
+
+    def __init__(self, maxlen: int = 1000) -> None:
+        if maxlen <= 0:
+            raise ValueError("maxlen must be positive")
+        self.maxlen = maxlen
+        self.ts_ms = array("q", bytes(8 * maxlen))
+        self.latency_ms = array("I", bytes(array("I").itemsize * maxlen))
+        self.success_rate = array("d", bytes(8 * maxlen))
+        self.profit = array("d", bytes(8 * maxlen))
+        self.tx = array("q", bytes(8 * maxlen))
+        self.bot = array("i", bytes(4 * maxlen))
+        self.error = array("i", bytes(4 * maxlen))
+        self.status = array("i", bytes(4 * maxlen))
+        self.bots = StringTable()
+        self.errors = StringTable()
+        self.statuses = StringTable()
+        self.tx_hashes = StringTable()
+        self.start_seq = 0
+        self.next_seq = 0
+
+    def __len__(self) -> int:
+        return self.next_seq - self.start_seq
+
+    @property
+    def full(self) -> bool:
+        return len(self) == self.maxlen
+
+    def append(self, rec: EventRecord) -> int:
+        """Store ``rec``, overwriting the oldest event when full. Returns its sequence."""
+        seq = self.next_seq
+        i = seq % self.maxlen
+        if self.full:
+            self._release(i)
+            self.start_seq += 1
+        self.ts_ms[i] = rec.ts_ms
+        self.latency_ms[i] = min(max(int(rec.latency_ms), 0), 0xFFFFFFFF)
+        self.success_rate[i] = rec.success_rate
+        self.profit[i] = math.nan if rec.profit is None else rec.profit
+        tx = rec.tx_hash
+        if not tx:
+            self.tx[i] = _TX_EMPTY
+        else:
+            packed = _pack_tx(tx)
+            self.tx[i] = packed if packed >= 0 else self.tx_hashes.intern(tx)
+        self.bot[i] = self.bots.intern(rec.bot_name)
+        self.error[i] = self.errors.intern(rec.error)
+        self.status[i] = self.statuses.intern(rec.status)
+        self.next_seq = seq + 1
+        return seq
+
+    def _release(self, i: int) -> None:
+        tx = self.tx[i]
+        if 0 <= tx < _TX_PACKED:
+            self.tx_hashes.release(tx)
+        self.bots.release(self.bot[i])
+        self.errors.release(self.error[i])
+        self.statuses.release(self.status[i])
+
+    def validate(self) -> None:
+        """Raise ``ValueError`` unless every buffered event's string ids are in their tables."""
+        slots = list(self.slots())
+        for column, table in (("bot", self.bots), ("error", self.errors),
+                              ("status", self.statuses), ("tx", self.tx_hashes)):
+            col = getattr(self, column)
+            ids = [col[i] for i in slots]
+            if column == "tx":
+                # Empty (-1) and packed hashes are not table ids
+                ids = [v for v in ids if v < _TX_PACKED]
+            if ids and not -1 <= min(ids) <= max(ids) < len(table._strings):
+                raise ValueError(f"{column} column refers to missing string table entries")
+
+    def clear(self) -> None:
+        for seq in range(self.start_seq, self.next_seq):
+            self._release(seq % self.maxlen)
+        self.start_seq = self.next_seq
+
+    def slot(self, seq: int) -> int:
+        if not self.start_seq <= seq < self.next_seq:
+            raise IndexError(f"sequence {seq} is not in the buffer")
+        return seq % self.maxlen
+
+    # Column accessors by slot -------------------------------------------------
+
+    def tx_at(self, i: int) -> str:
+        value = self.tx[i]
+        if value == _TX_EMPTY:
+            return ""
+        if value >= _TX_PACKED:
+            return _unpack_tx(value)
+        return self.tx_hashes.get(value) or ""
+
+    def bot_at(self, i: int) -> str:
+        return self.bots.get(self.bot[i]) or ""
+
+    def profit_at(self, i: int) -> Optional[float]:
+        value = self.profit[i]
+        return None if value != value else value
+
+    def error_at(self, i: int) -> Optional[str]:
+        return self.errors.get(self.error[i])
+
+    def status_at(self, i: int) -> Optional[str]:
+        return self.statuses.get(self.status[i])
+
+    def record_at(self, i: int) -> EventRecord:
+        return EventRecord(
+            self.ts_ms[i],
+            self.bot_at(i),
+            self.latency_ms[i],
+            self.success_rate[i],
+            self.tx_at(i),
+            self.error_at(i),
+            self.status_at(i),
+            self.profit_at(i),
+        )
+
+    def event_at(self, i: int) -> MetricsEvent:
+        """Materialize slot ``i`` as a ``MetricsEvent`` (no validation; data was stored already)."""
+        return MetricsEvent.model_construct(
+            timestamp=ms_to_datetime(self.ts_ms[i]),
+            bot_name=self.bot_at(i),
+            latency_ms=self.latency_ms[i],
+            success_rate=self.success_rate[i],
+            tx_hash=self.tx_at(i),
+            error=self.error_at(i),
+            status=self.status_at(i),
+            profit=self.profit_at(i),
+        )
+
+    # Iteration ----------------------------------------------------------------
+
+    def slots(self, start_seq: Optional[int] = None) -> Iterator[int]:
+        """Yield slot indexes oldest to newest, optionally from ``start_seq``."""
+        first = self.start_seq if start_seq is None else max(start_seq, self.start_seq)
+        m = self.maxlen
+        for seq in range(first, self.next_seq):
+            yield seq % m
+
+    def tail_slots(self, n: int) -> list[int]:
+        """Slot indexes of the newest ``n`` events, oldest first."""
+        first = max(self.start_seq, self.next_seq - max(n, 0))
+        m = self.maxlen
+        return [seq % m for seq in range(first, self.next_seq)]
+
+    def __iter__(self) -> Iterator[MetricsEvent]:
+        for i in self.slots():
+            yield self.event_at(i)
+
+    def __getitem__(self, index: int) -> MetricsEvent:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("event index out of range")
+        return self.event_at((self.start_seq + index) % self.maxlen)
+
+    def latest(self, n: int) -> list[MetricsEvent]:
+        """Newest ``n`` events, newest first."""
+        return [self.event_at(i) for i in reversed(self.tail_slots(n))]
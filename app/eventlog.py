@@ -0,0 +1,342 @@
+"""Persistent append-only event store backed by SQLite in WAL mode."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+from .eventbuffer import EventRecord
+
+logger = logging.getLogger(__name__)
+
+_INSERT = """
+    INSERT INTO events (ts_ms, bot_name, latency_ms, success_rate, tx_hash, error, status, profit)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class EventLogFull(BufferError):
+    """``max_pending`` records are waiting for the disk; see ``EventLog.full``."""
+
+
+class EventLog:
+    """Append-only on-disk event store with group commit.
+
+    ``append`` only buffers the record; a background writer thread inserts
+    buffered records with one ``executemany`` per transaction, either when
+    ``batch_size`` records are waiting or every ``flush_interval`` seconds.
+    Readers open their own connections, which WAL lets run concurrently
+    with the writer.
+
+    A batch that fails to commit is put back in front of the buffer and
+    retried with back-off, up to ``max_retry`` seconds apart. While
+    ``max_pending`` records are waiting, ``full`` is true; producers wait
+    for room (``wait_for_room``, ``IngestQueue``) instead of appending.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 5000,
+        flush_interval: float = 0.05,
+        max_pending: int = 100_000,
+        retry: float = 0.1,
+        max_retry: float = 5.0,
+    ):
+        """Open (or create) the event store.
+
+        Args:
+            db_path: Path to the SQLite database file.
+            batch_size: Records per group commit before the writer wakes early.
+            flush_interval: Maximum seconds a record waits in memory.
+            max_pending: Buffered records at which ``full`` becomes true.
+            retry: Seconds before retrying a failed commit, doubled per failure.
+            max_retry: Upper bound of the retry interval.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retry = retry
+        self.max_retry = max_retry
+        self._pending: list[tuple] = []
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._init_database()
+        self._writer = threading.Thread(target=self._run_writer, name="event-log-writer", daemon=True)
+        self._writer.start()
+
+    def _init_database(self) -> None:
+        """Initialize database schema and WAL mode."""
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY,
+                    ts_ms INTEGER NOT NULL,
+                    bot_name TEXT NOT NULL,
+                    latency_ms INTEGER NOT NULL,
+                    success_rate REAL NOT NULL,
+                    tx_hash TEXT NOT NULL,
+                    error TEXT,
+                    status TEXT,
+                    profit REAL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts_ms)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_events_bot_ts ON events(bot_name, ts_ms)
+            """)
+            conn.commit()
+
+    @contextmanager
+    def _get_connection(self):
+        """Get database connection with proper error handling."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # Writing ------------------------------------------------------------------
+
+    def append(self, rec: EventRecord) -> None:
+        """Queue a record for the next group commit."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("event log is closed")
+            self._pending.append(tuple(rec))
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def extend(self, records: List[EventRecord]) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("event log is closed")
+            self._pending.extend(tuple(r) for r in records)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _run_writer(self) -> None:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        delay = self.retry
+        try:
+            while True:
+                with self._cond:
+                    if not self._pending and not self._closed:
+                        self._cond.wait(self.flush_interval)
+                    if not self._pending:
+                        if self._closed:
+                            return
+                        continue
+                    batch, self._pending = self._pending, []
+                    self._in_flight = len(batch)
+                try:
+                    with conn:
+                        conn.executemany(_INSERT, batch)
+                except sqlite3.Error:
+                    with self._cond:
+                        self._in_flight = 0
+                        if self._closed:
+                            # Nobody is left to retry for
+                            logger.exception("Dropped %d events: failed to write to %s", len(batch), self.db_path)
+                            self._cond.notify_all()
+                            return
+                        logger.exception(
+                            "Failed to write %d events to %s; retrying in %.1fs", len(batch), self.db_path, delay
+                        )
+                        # Back in front, so commit order stays append order
+                        self._pending[:0] = batch
+                        self._cond.wait_for(lambda: self._closed, timeout=delay)
+                    delay = min(delay * 2, self.max_retry)
+                    continue
+                delay = self.retry
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+        finally:
+            conn.close()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything appended so far is committed."""
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._in_flight, timeout=timeout
+            )
+
+    def close(self) -> None:
+        """Flush pending records and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending) + self._in_flight
+
+    @property
+    def full(self) -> bool:
+        return self.pending >= self.max_pending
+
+    async def wait_for_room(self, poll: float = 0.05) -> None:
+        """Sleep until the writer has caught up below ``max_pending``."""
+        while self.full:
+            await asyncio.sleep(poll)
+
+    # Reading ------------------------------------------------------------------
+
+    def open_range(
+        self,
+        start_ms: int,
+        end_ms: int,
+        bot_name: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> "RangeReader":
+        """Start a query for records with ``start_ms <= ts_ms < end_ms`` in time order.
+
+        The returned reader owns its connection, which is not tied to the
+        opening thread, so its batches may be fetched from any (one at a
+        time) thread, e.g. with ``asyncio.to_thread``. Close it when done.
+        """
+        sql = "SELECT ts_ms, bot_name, latency_ms, success_rate, tx_hash, error, status, profit FROM events"
+        if bot_name is not None:
+            sql += " WHERE bot_name = ? AND ts_ms >= ? AND ts_ms < ?"
+            params: tuple = (bot_name, start_ms, end_ms)
+        else:
+            sql += " WHERE ts_ms >= ? AND ts_ms < ?"
+            params = (start_ms, end_ms)
+        sql += " ORDER BY ts_ms"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            return RangeReader(conn, conn.execute(sql, params))
+        except Exception:
+            conn.close()
+            raise
+
+    def iter_range(
+        self,
+        start_ms: int,
+        end_ms: int,
+        bot_name: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[EventRecord]:
+        """Yield records with ``start_ms <= ts_ms < end_ms`` in time order.
+
+        Rows are streamed from a cursor, so arbitrarily large ranges never
+        need to fit in memory. The whole iteration must stay on one thread;
+        see ``open_range`` otherwise.
+        """
+        reader = self.open_range(start_ms, end_ms, bot_name, limit)
+        try:
+            while True:
+                rows = reader.fetch(1000)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            reader.close()
+
+    def query(
+        self,
+        start_ms: int,
+        end_ms: int,
+        bot_name: Optional[str] = None,
+        limit: int = 1000,
+    ) -> List[EventRecord]:
+        return list(self.iter_range(start_ms, end_ms, bot_name, limit))
+
+    def summary(self, start_ms: int, end_ms: int) -> dict:
+        """Aggregate ``[start_ms, end_ms)`` in the shape of ``DataStore.daily_summary``."""
+        ok_expr = "((error IS NULL OR error = '') AND (status IS NULL OR status = 'ok'))"
+        status_expr = (
+            "CASE WHEN status IS NULL OR status = '' THEN "
+            "(CASE WHEN error IS NULL OR error = '' THEN 'ok' ELSE 'critical' END) "
+            "ELSE status END"
+        )
+        with self._get_connection() as conn:
+            total, avg_latency, successes, profit_total = conn.execute(
+                f"""
+                SELECT COUNT(*), AVG(latency_ms), SUM(CASE WHEN {ok_expr} THEN 1 ELSE 0 END), SUM(profit)
+                FROM events WHERE ts_ms >= ? AND ts_ms < ?
+                """,
+                (start_ms, end_ms),
+            ).fetchone()
+            status_counts = {"ok": 0, "warning": 0, "critical": 0}
+            top_bots: list[tuple[str, float]] = []
+            if total:
+                for status, n in conn.execute(
+                    f"""
+                    SELECT {status_expr} AS st, COUNT(*) FROM events
+                    WHERE ts_ms >= ? AND ts_ms < ? GROUP BY st
+                    """,
+                    (start_ms, end_ms),
+                ):
+                    status_counts[status] = n
+                top_bots = [
+                    (name, float(p))
+                    for name, p in conn.execute(
+                        """
+                        SELECT bot_name, SUM(profit) AS p FROM events
+                        WHERE ts_ms >= ? AND ts_ms < ? AND profit IS NOT NULL
+                        GROUP BY bot_name ORDER BY p DESC LIMIT 5
+                        """,
+                        (start_ms, end_ms),
+                    )
+                ]
+        return {
+            "total_events": total or 0,
+            "avg_latency_ms": int(avg_latency or 0),
+            "success_rate_pct": round((successes or 0) * 100.0 / total, 2) if total else 0.0,
+            "profit_total": round(profit_total or 0.0, 4),
+            "status_counts": status_counts,
+            "top_bots": top_bots,
+        }
+
+    def daily_summary(self, day: Optional[datetime] = None) -> dict:
+        start_ms, end_ms = utc_day_bounds_ms(day)
+        self.flush(timeout=1.0)
+        return self.summary(start_ms, end_ms)
+
+    def count(self) -> int:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def utc_day_bounds_ms(day: Optional[datetime] = None) -> tuple[int, int]:
+    """``[start, end)`` epoch milliseconds of the UTC day containing ``day`` (default today)."""
+    ref = (day or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    start = datetime(ref.year, ref.month, ref.day, tzinfo=timezone.utc)
+    start_ms = int(start.timestamp() * 1000)
+    return start_ms, start_ms + 86_400_000
+
+
+class RangeReader:
+    """An open ``EventLog.open_range`` query, read in batches."""
+
+    def __init__(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor) -> None:
+        self._conn = conn
+        self._cursor = cursor
+
+    def fetch(self, n: int = 1000) -> List[EventRecord]:
+        """Up to ``n`` more records; an empty list once the range is exhausted."""
+        return [EventRecord(*row) for row in self._cursor.fetchmany(n)]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,127 @@
+"""Incrementally maintained latency heatmap.
+
+Time is cut into fixed slots keyed by integer epoch slot
+(``ts_ms // slot_ms``, 5s by default) kept in a ring; each slot holds one
+counter per latency row. Inserts touch a single cell and rendering reads
+the last N slots, independent of how many events the store holds.
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+DEFAULT_EDGES_MS: tuple[int, ...] = (0, 100, 200, 300)
+
+
+def log_edges(min_ms: int = 10, max_ms: int = 10_000, rows: int = 8) -> list[int]:
+    """Row lower bounds spaced geometrically from ``min_ms`` to ``max_ms``.
+
+    The first row always starts at 0 and the last row is open-ended.
+    """
+    if rows < 2:
+        return [0]
+    ratio = (max_ms / min_ms) ** (1.0 / (rows - 2)) if rows > 2 else 1.0
+    edges = [0]
+    for k in range(rows - 1):
+        edge = int(round(min_ms * ratio ** k))
+        if edge <= edges[-1]:
+            edge = edges[-1] + 1
+        edges.append(edge)
+    return edges
+
+
+def row_labels(edges: Sequence[int]) -> list[str]:
+    labels = [f"{lo}-{hi}" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f"{edges[-1]}+")
+    return labels
+
+
+class LatencyHeatmap:
+    """Ring of time slots x latency rows counters."""
+
+    def __init__(
+        self,
+        edges: Optional[Sequence[int]] = None,
+        slot_seconds: int = 5,
+        slots: int = 720,
+    ) -> None:
+        self.edges = list(edges or DEFAULT_EDGES_MS)
+        if sorted(self.edges) != self.edges:
+            raise ValueError("heatmap edges must be increasing")
+        self.rows = len(self.edges)
+        self.labels = row_labels(self.edges)
+        self.slot_ms = slot_seconds * 1000
+        self.slots = slots
+        self.slot_tag = array("q", [-1]) * slots
+        self.counts = array("I", [0]) * (slots * self.rows)
+        self.latest = -1
+
+    def _row(self, latency_ms: int) -> int:
+        return max(bisect_right(self.edges, latency_ms) - 1, 0)
+
+    def add(self, ts_ms: int, latency_ms: int) -> None:
+        s = ts_ms // self.slot_ms
+        if s <= self.latest - self.slots:
+            return
+        i = s % self.slots
+        base = i * self.rows
+        if self.slot_tag[i] != s:
+            if self.slot_tag[i] > s:
+                return
+            self.slot_tag[i] = s
+            for r in range(self.rows):
+                self.counts[base + r] = 0
+        self.counts[base + self._row(latency_ms)] += 1
+        if s > self.latest:
+            self.latest = s
+
+    def column(self, slot: int) -> list[int]:
+        i = slot % self.slots
+        if self.slot_tag[i] != slot:
+            return [0] * self.rows
+        base = i * self.rows
+        return list(self.counts[base:base + self.rows])
+
+    def matrix(self, cols: int = 12, now_ms: Optional[int] = None) -> dict:
+        """Chart.js matrix payload for the ``cols`` slots ending at ``now``."""
+        if now_ms is None:
+            now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        cols = max(0, min(cols, self.slots))
+        end = now_ms // self.slot_ms
+        columns = [self.column(s) for s in range(end - cols + 1, end + 1)]
+        cells = []
+        for r in range(self.rows):
+            for c in range(cols):
+                cells.append({"x": c, "y": r, "v": columns[c][r]})
+        return {"cells": cells, "rows": list(self.labels), "cols": cols}
+
+    def to_state(self) -> dict:
+        return {
+            "edges": self.edges,
+            "slot_seconds": self.slot_ms // 1000,
+            "slots": self.slots,
+            "latest": self.latest,
+            "slot_tag": self.slot_tag.tolist(),
+            "counts": self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "LatencyHeatmap":
+        heatmap = cls(state["edges"], int(state["slot_seconds"]), int(state["slots"]))
+        slot_tag, counts = array("q", state["slot_tag"]), array("I", state["counts"])
+        if len(slot_tag) != heatmap.slots or len(counts) != heatmap.slots * heatmap.rows:
+            raise ValueError("heatmap state does not match its geometry")
+        heatmap.slot_tag, heatmap.counts, heatmap.latest = slot_tag, counts, int(state["latest"])
+        return heatmap
+
+
+def heatmap_edges(edges_ms: Optional[Sequence[int]] = None, log_rows: int = 0) -> list[int]:
+    """Resolve configured heatmap rows: explicit edges, log-scale rows, or the default."""
+    if log_rows and log_rows > 0:
+        return log_edges(rows=log_rows)
+    if edges_ms:
+        return sorted(int(e) for e in edges_ms)
+    return list(DEFAULT_EDGES_MS)
+
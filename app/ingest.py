@@ -0,0 +1,279 @@
+"""Incremental parsing and queued application of bot log uploads (``POST /api/logs``).
+
+Bodies are read chunk by chunk from ``request.stream()`` and split into
+newline-delimited JSON objects, so memory stays at one batch plus one
+partial line however large the upload is. A body whose first byte is
+``[`` is taken as a single JSON array (the older upload format); that has
+to be buffered whole, so it is capped at ``MAX_ARRAY_BYTES``.
+
+Parsed batches go into an ``IngestQueue``; its worker task applies them
+to the store and publishes, so the upload handler never waits on
+aggregation or rendering.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+from .codec import DecodeError, decode_bot_log, loads
+from .data import DataStore, parse_bot_log_to_record
+from .eventbuffer import EventRecord
+from .eventlog import EventLogFull
+from .publisher import PublishScheduler, is_critical
+
+if TYPE_CHECKING:
+    from .backplane import BackplaneRelay
+
+logger = logging.getLogger(__name__)
+
+MAX_LINE_BYTES = 1 << 20
+MAX_ARRAY_BYTES = 16 << 20
+
+
+class IngestError(ValueError):
+    """The upload cannot be parsed incrementally (see ``MAX_ARRAY_BYTES``)."""
+
+
+def _parse(obj) -> EventRecord | None:
+    # A dict, a decoded BotLogLine (see app.codec), or None for a non-object
+    if obj is None:
+        return None
+    try:
+        return parse_bot_log_to_record(obj)
+    except Exception:
+        # Unparseable logs are skipped, not fatal to the upload
+        return None
+
+
+async def ndjson_batches(
+    chunks: AsyncIterator[bytes],
+    batch_lines: int = 1000,
+    max_line: int = MAX_LINE_BYTES,
+) -> AsyncIterator[tuple[int, list[EventRecord]]]:
+    """Yield ``(logs parsed, records)`` for every ``batch_lines`` JSON lines of ``chunks``.
+
+    Blank lines, invalid JSON and lines longer than ``max_line`` bytes are
+    skipped; logs that are valid JSON but not metrics events count as
+    parsed without producing a record.
+    """
+    pending = b""
+    received = 0
+    records: list[EventRecord] = []
+    oversized = False
+    first = True
+    async for chunk in chunks:
+        if first:
+            stripped = chunk.lstrip()
+            if not stripped:
+                continue
+            first = False
+            if stripped[:1] == b"[":
+                async for batch in _array_batches(stripped, chunks, batch_lines):
+                    yield batch
+                return
+        lines = chunk.split(b"\n")
+        lines[0] = pending + lines[0]
+        pending = lines.pop()
+        for line in lines:
+            if oversized:
+                # Tail of a line that was already too long
+                oversized = False
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = decode_bot_log(line)
+            except DecodeError:
+                continue
+            received += 1
+            rec = _parse(obj)
+            if rec is not None:
+                records.append(rec)
+            if received >= batch_lines:
+                yield received, records
+                received, records = 0, []
+        if len(pending) > max_line:
+            pending, oversized = b"", True
+    if pending.strip() and not oversized:
+        try:
+            obj = decode_bot_log(pending)
+        except DecodeError:
+            obj = None
+        else:
+            received += 1
+        rec = _parse(obj)
+        if rec is not None:
+            records.append(rec)
+    if received:
+        yield received, records
+
+
+async def _array_batches(
+    head: bytes, chunks: AsyncIterator[bytes], batch_lines: int
+) -> AsyncIterator[tuple[int, list[EventRecord]]]:
+    parts = [head]
+    size = len(head)
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > MAX_ARRAY_BYTES:
+            raise IngestError(
+                f"JSON array uploads are limited to {MAX_ARRAY_BYTES >> 20}MB; "
+                "send newline-delimited JSON for larger bodies"
+            )
+        parts.append(chunk)
+    try:
+        logs = loads(b"".join(parts))
+    except DecodeError:
+        return
+    if not isinstance(logs, list):
+        return
+    for start in range(0, len(logs), batch_lines):
+        batch = logs[start:start + batch_lines]
+        records = (_parse(obj) for obj in batch if isinstance(obj, dict))
+        yield len(batch), [rec for rec in records if rec is not None]
+
+
+class IngestQueue:
+    """Bounded queue of parsed batches between upload handlers and the store.
+
+    ``put`` waits up to ``timeout`` for room (backpressure: the handler stops
+    reading the request body, which slows the sender over TCP) and returns
+    False if the queue is still full, so the caller can shed the rest of
+    the upload. The worker drains every queued batch per wakeup, applies
+    them (or hands them to the backplane hub), and marks the publisher, so
+    any number of uploads cost one coalesced publish per frame.
+
+    Batches the backplane hub could not take (``ConnectionError``), or that
+    found the store's ``EventLog`` full, are kept and retried with back-off,
+    up to ``max_retry`` seconds apart; the queue stays full meanwhile, so
+    new uploads get backpressure and then 503.
+    """
+
+    def __init__(
+        self,
+        store: DataStore,
+        publisher: PublishScheduler,
+        maxsize: int = 256,
+        relay: Optional["BackplaneRelay"] = None,
+        retry: float = 0.1,
+        max_retry: float = 5.0,
+    ) -> None:
+        self.store = store
+        self.publisher = publisher
+        self.relay = relay
+        self.maxsize = maxsize
+        self._queue: asyncio.Queue[list[EventRecord]] = asyncio.Queue(maxsize)
+        self._task: Optional[asyncio.Task] = None
+        # Taken off the queue but not yet accepted by the hub or the event log
+        self._held: list[list[EventRecord]] = []
+        self.retry = retry
+        self.max_retry = max_retry
+        self.accepted = 0
+        self.shed = 0
+        self.applied = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() + len(self._held)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "maxsize": self.maxsize,
+            "accepted_batches": self.accepted,
+            "shed_batches": self.shed,
+            "applied_events": self.applied,
+        }
+
+    async def put(self, records: list[EventRecord], timeout: float = 2.0) -> bool:
+        """Queue ``records``; False (and counted as shed) if no room within ``timeout``."""
+        try:
+            await asyncio.wait_for(self._queue.put(records), timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            return False
+        self.accepted += 1
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the worker, applying whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.depth:
+            batches, self._held = self._held + self._drain(), []
+            try:
+                # Past the cap if need be: the event log still commits on close
+                await self._apply(batches, check_room=False)
+                if self.publisher.dirty:
+                    await self.publisher.flush()
+            except Exception:
+                logger.exception(
+                    "Dropped %d queued events at shutdown", sum(len(batch) for batch in batches)
+                )
+
+    def _drain(self) -> list[list[EventRecord]]:
+        batches = []
+        while not self._queue.empty():
+            batches.append(self._queue.get_nowait())
+        return batches
+
+    async def _apply(self, batches: list[list[EventRecord]], check_room: bool = True) -> None:
+        records = [rec for batch in batches for rec in batch]
+        if self.relay is not None:
+            # Backplane worker: the hub stores and broadcasts to every worker
+            await self.relay.ingest(records)
+        else:
+            event_log = self.store.event_log
+            if check_room and event_log is not None and event_log.full:
+                raise EventLogFull(f"{event_log.pending} events waiting for {event_log.db_path}")
+            for rec in records:
+                self.store.add_record(rec)
+            self.publisher.mark(any(is_critical(r.status, r.error) for r in records))
+        self.applied += len(records)
+
+    async def run(self) -> None:
+        delay = self.retry
+        while True:
+            if self._held:
+                # The hub or the event log had no room: retry the same batches before taking more
+                await asyncio.sleep(delay)
+                batches, self._held = self._held, []
+                try:
+                    await self._apply(batches)
+                except (ConnectionError, EventLogFull):
+                    self._held = batches
+                    delay = min(delay * 2, self.max_retry)
+                    continue
+                except Exception:
+                    logger.exception("Failed to apply ingested batch")
+                delay = self.retry
+                await self.publisher.maybe_flush()
+                continue
+            if self.publisher.dirty:
+                # Hold the next frame until it is due, unless more data arrives first
+                try:
+                    batch = await asyncio.wait_for(self._queue.get(), self.publisher.delay())
+                except asyncio.TimeoutError:
+                    await self.publisher.maybe_flush()
+                    continue
+            else:
+                batch = await self._queue.get()
+            batches = [batch] + self._drain()
+            try:
+                await self._apply(batches)
+            except (ConnectionError, EventLogFull) as exc:
+                logger.warning("Cannot store events yet, holding %d batches: %s", len(batches), exc)
+                self._held = batches
+            except Exception:
+                logger.exception("Failed to apply ingested batch")
+            await self.publisher.maybe_flush()
@@ -0,0 +1,133 @@
+"""Single-pass classification of free-text bot log messages.
+
+``parse_bot_log_to_record`` needs four things from a message: the last
+transaction hash, the first timing (``10.560s (528.0%)``), the fees paid
+and which bot family wrote it. ``LogClassifier`` compiles all of them,
+plus the family keywords, into one alternation and walks the message once
+with ``finditer``; each match says which alternative it was through
+``lastgroup``.
+
+Families are data, not code: a list of ``{"bot_name": ..., "match":
+[keywords]}`` rules, checked in order, with keywords matched
+case-insensitively as plain substrings. ``load_rules`` reads the same
+shape from a JSON file (``LOG_RULES_PATH``), so a new bot family only
+needs a config change.
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+
+DEFAULT_RULES: tuple[dict, ...] = (
+    {"bot_name": "price-bot", "match": ["price["]},
+    {"bot_name": "rsi-bot", "match": ["rsi["]},
+    {"bot_name": "trading-bot", "match": ["trade"]},
+    {"bot_name": "strategy-bot", "match": ["amount_to_sell"]},
+)
+DEFAULT_BOT = "bot"
+
+# Fixed fields; family keywords are appended as f0, f1, ... in rule order
+_FIELDS = (
+    r"(?P<tx>0x[a-fA-F0-9]{64})",
+    # Only from the start of a digit run: same leftmost match, without
+    # retrying every suffix of a long number
+    r"(?P<latency>(?<!\d)(?P<seconds>\d+\.?\d*)\s*s\s*\()",
+    r"(?P<fees>total fees paid\s*=\s*(?P<wei>\d+))",
+    r"(?P<marker>Confirmed|Submitted)",
+    r"(?P<rate_limited>(?i:rate-limited))",
+)
+# Characters a fixed field can start with
+_FIELD_STARTS = r"\dtCSrR"
+
+
+class Classified(NamedTuple):
+    bot_name: str
+    tx_hash: Optional[str]
+    latency_ms: int
+    fees: Optional[int]
+    marker: bool
+    rate_limited: bool
+
+
+class LogClassifier:
+    """Extract tx hash, latency, fees and bot family from a message in one scan.
+
+    Matches do not overlap: a keyword that only occurs inside a transaction
+    hash or a timing, say, is not seen.
+    """
+
+    def __init__(self, rules: Sequence[dict] = DEFAULT_RULES, default_bot: str = DEFAULT_BOT) -> None:
+        self.default_bot = default_bot
+        self.bot_names: list[str] = []
+        families = []
+        starts = set()
+        for i, rule in enumerate(rules):
+            keywords = rule.get("match") or []
+            if isinstance(keywords, str):
+                keywords = [keywords]
+            keywords = [str(k) for k in keywords if k]
+            if not rule.get("bot_name") or not keywords:
+                raise ValueError(f"log rule needs bot_name and match: {rule!r}")
+            self.bot_names.append(str(rule["bot_name"]))
+            starts.update(c for k in keywords for c in (k[0].lower(), k[0].upper()))
+            # Longest first, so a keyword never hides a longer one it prefixes
+            alternation = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            families.append(f"(?P<f{i}>(?i:{alternation}))")
+        # The lookahead rejects most positions with one character test
+        # instead of trying every alternative there
+        first = _FIELD_STARTS + "".join(re.escape(c) for c in sorted(starts))
+        self.pattern = re.compile(f"(?=[{first}])(?:{'|'.join(_FIELDS + tuple(families))})")
+
+    def classify(self, message: str) -> Classified:
+        tx = None
+        latency_ms = 0
+        fees = None
+        marker = rate_limited = False
+        family = len(self.bot_names)
+        seen_latency = seen_fees = False
+        for m in self.pattern.finditer(message):
+            kind = m.lastgroup
+            if kind == "tx":
+                tx = m.group("tx")
+            elif kind == "latency":
+                if not seen_latency:
+                    seen_latency = True
+                    latency_ms = int(float(m.group("seconds")) * 1000)
+            elif kind == "fees":
+                if not seen_fees:
+                    seen_fees = True
+                    fees = int(m.group("wei"))
+            elif kind == "marker":
+                marker = True
+            elif kind == "rate_limited":
+                rate_limited = True
+            else:
+                # Earlier rules win, wherever in the message they match
+                family = min(family, int(kind[1:]))
+        bot_name = self.bot_names[family] if family < len(self.bot_names) else self.default_bot
+        return Classified(bot_name, tx, latency_ms, fees, marker, rate_limited)
+
+
+def load_rules(path: str | Path) -> list[dict]:
+    """Read classifier rules from a JSON file: a list, or ``{"rules": [...]}``."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        data = data.get("rules")
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of log rules")
+    return data
+
+
+_classifier = LogClassifier()
+
+
+def get_classifier() -> LogClassifier:
+    return _classifier
+
+
+def set_classifier(classifier: LogClassifier) -> None:
+    """Use ``classifier`` for every log parsed from now on (see ``app.main``)."""
+    global _classifier
+    _classifier = classifier
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import logging
 from pathlib import Path
 from typing import Optional
 
@@ -13,9 +14,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
 from dotenv import load_dotenv
 
+from app.backplane import BackplaneRelay
 from app.sse import SSEBroker
 from app.data import mock_metrics_publisher, DataStore, tail_jsonl_and_broadcast
 from app.downloads import router as downloads_router
+from app.eventlog import EventLog
+from app.deltas import MetricsDeltas
+from app.heatmap import heatmap_edges
+from app.ingest import IngestQueue
+from app.logrules import LogClassifier, load_rules, set_classifier
+from app.publisher import PublishScheduler
+from app.render_cache import MetricsRenderCache
+from app.row_templates import RowTemplates
+from app.snapshot import load_snapshot, save_snapshot
 from app.config import settings
 from app.logging_config import setup_logging
 from app.middleware.rate_limit import RateLimitMiddleware
@@ -26,6 +37,7 @@ from app.routers import dashboard, streaming, api, rentals, health
 
 # Setup logging
 setup_logging()
+logger = logging.getLogger(__name__)
 
 # Import version info
 try:
@@ -91,14 +103,52 @@ if DOWNLOADS_DIR.exists():
 # Templates
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
+# Bot families for /api/logs messages, when configured beyond the built-in rules
+if settings.log_rules_path:
+    set_classifier(LogClassifier(load_rules(settings.log_rules_path)))
+
 # Initialize broker and store
 broker = SSEBroker()
-store = DataStore(max_events=settings.max_events)
+store = DataStore(
+    max_events=settings.max_events,
+    heatmap_edges=heatmap_edges(settings.heatmap_edges_ms, settings.heatmap_log_rows),
+)
+
+# Persist every ingested event when an event store is configured
+# (backplane workers hold a replica; the hub persists)
+if settings.event_store_path and not settings.backplane_path:
+    store.event_log = EventLog(settings.event_store_path, max_pending=settings.event_store_max_pending)
 
 # Store in app state for access in routes
 app.state.broker = broker
 app.state.store = store
 
+
+def render_html(name: str, context: dict) -> str:
+    # Use Jinja2 environment to render partial to string
+    template = templates.env.get_template(name)
+    return template.render(**context)
+
+
+# Metrics partial rendered once per store version, shared by publishers and pages
+render_cache = MetricsRenderCache(render_html)
+app.state.render_cache = render_cache
+# Shared publisher: frame-rate-limited, sends only changed fragments after the connect snapshot
+publisher = PublishScheduler(
+    broker, store, render_cache,
+    frame_interval=settings.publish_frame_ms / 1000,
+    deltas=MetricsDeltas(templates.env),
+)
+app.state.publisher = publisher
+# Row fragments for the HTML streams, compiled once
+app.state.row_templates = RowTemplates(templates.env).load()
+# Tailer file position; saved with the snapshot so ingestion resumes where it stopped
+app.state.tail_cursor = {}
+# Set when running as one of several workers fed by a backplane hub (app.backplane)
+app.state.relay = BackplaneRelay(settings.backplane_path, broker, store, render_cache) if settings.backplane_path else None
+# /api/logs only parses and enqueues; this worker applies batches and publishes
+app.state.ingest_queue = IngestQueue(store, publisher, settings.ingest_queue_size, relay=app.state.relay)
+
 # Include all routers
 app.include_router(dashboard.router)
 app.include_router(streaming.router)
@@ -110,10 +160,22 @@ app.include_router(health.router)
 @app.on_event("startup")
 async def _on_startup() -> None:
     """Startup event handler - initialize data publishers."""
-    def render_html(name: str, context: dict) -> str:
-        # Use Jinja2 environment to render partial to string
-        template = templates.env.get_template(name)
-        return template.render(**context)
+    app.state.ingest_queue.start()
+    if app.state.relay is not None:
+        # The hub ingests, publishes and snapshots; this worker only relays
+        app.state.sample_mode = False
+        app.state.publisher_task = asyncio.create_task(app.state.relay.run())
+        return
+
+    # Warm restart: restore the previous DataStore snapshot, if any
+    if settings.snapshot_path:
+        try:
+            meta = load_snapshot(store, settings.snapshot_path)
+            if meta:
+                app.state.tail_cursor.update(meta.get("tail") or {})
+                logger.info("Restored %d events from %s", len(store.events), settings.snapshot_path)
+        except Exception:
+            logger.exception("Failed to restore snapshot from %s", settings.snapshot_path)
 
     # Decide between sample mode (mock) and real tailing
     if settings.clean_ui:
@@ -123,12 +185,16 @@ async def _on_startup() -> None:
     log_path = settings.silverback_log_path
     if log_path and not settings.force_sample:
         app.state.publisher_task = asyncio.create_task(
-            tail_jsonl_and_broadcast(Path(log_path), broker, store, render_html)
+            tail_jsonl_and_broadcast(
+                Path(log_path), broker, store, render_cache,
+                cursor=app.state.tail_cursor,
+                scheduler=publisher,
+            )
         )
         app.state.sample_mode = False
     else:
         app.state.publisher_task = asyncio.create_task(
-            mock_metrics_publisher(broker, store, render_html)
+            mock_metrics_publisher(broker, store, render_cache, scheduler=publisher)
         )
         app.state.sample_mode = True
 
@@ -136,9 +202,18 @@ async def _on_startup() -> None:
 @app.on_event("shutdown")
 async def _on_shutdown() -> None:
     """Shutdown event handler - cleanup background tasks."""
+    # Apply uploads that were already accepted before snapshotting
+    await app.state.ingest_queue.stop()
     task: Optional[asyncio.Task] = getattr(app.state, "publisher_task", None)
     if task is not None:
         task.cancel()
         # CancelledError inherits from BaseException, not Exception; suppress explicitly.
         with contextlib.suppress(asyncio.CancelledError):
             await task
+    if settings.snapshot_path and app.state.relay is None:
+        try:
+            save_snapshot(store, settings.snapshot_path, {"tail": app.state.tail_cursor})
+        except Exception:
+            logger.exception("Failed to write snapshot to %s", settings.snapshot_path)
+    if store.event_log is not None:
+        await asyncio.to_thread(store.event_log.close)
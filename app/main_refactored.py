@@ -18,6 +18,7 @@ from app.logging_config import setup_logging
 from app.sse import SSEBroker
 from app.data import DataStore, mock_metrics_publisher, tail_jsonl_and_broadcast
 from app.downloads import router as downloads_router
+from app.render_cache import MetricsRenderCache
 from app.routers import dashboard
 from app.middleware.error_handler import exception_handler_middleware
 from app.middleware.rate_limit import RateLimitMiddleware
@@ -90,6 +91,15 @@ app.state.broker = broker
 app.state.store = store
 
 
+def render_html(name: str, context: dict) -> str:
+    template = templates.env.get_template(name)
+    return template.render(**context)
+
+
+render_cache = MetricsRenderCache(render_html)
+app.state.render_cache = render_cache
+
+
 # Health and version endpoints
 @app.get("/health")
 async def health() -> JSONResponse:
@@ -112,10 +122,6 @@ def version():
 @app.on_event("startup")
 async def _on_startup() -> None:
     """Startup event handler."""
-    def render_html(name: str, context: dict) -> str:
-        template = templates.env.get_template(name)
-        return template.render(**context)
-
     # Decide between sample mode (mock) and real tailing
     if settings.clean_ui:
         app.state.sample_mode = False
@@ -124,12 +130,15 @@ async def _on_startup() -> None:
     log_path = settings.silverback_log_path
     if log_path and not settings.force_sample:
         app.state.publisher_task = asyncio.create_task(
-            tail_jsonl_and_broadcast(Path(log_path), broker, store, render_html)
+            tail_jsonl_and_broadcast(
+                Path(log_path), broker, store, render_cache,
+                frame_interval=settings.publish_frame_ms / 1000,
+            )
         )
         app.state.sample_mode = False
     else:
         app.state.publisher_task = asyncio.create_task(
-            mock_metrics_publisher(broker, store, render_html)
+            mock_metrics_publisher(broker, store, render_cache)
         )
         app.state.sample_mode = True
 
@@ -0,0 +1,90 @@
+"""Frame-rate-limited publishing of the metrics partial.
+
+Ingest paths mark the store dirty after applying a batch of events;
+``PublishScheduler`` renders and broadcasts at most once per frame
+interval, so a burst of 10k log lines costs a handful of renders and
+fan-outs instead of 10k. Critical events skip the wait and flush on the
+next ``maybe_flush``. With a ``MetricsDeltas`` attached, each publish
+carries only the fragments that changed (see ``app.deltas``).
+"""
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+from .render_cache import MetricsRenderCache
+from .sse import JSON, SSEBroker
+
+if TYPE_CHECKING:
+    from .deltas import MetricsDeltas
+
+
+def is_critical(status: str | None, error: str | None) -> bool:
+    return status == "critical" or (status is None and bool(error))
+
+
+class PublishScheduler:
+    """Coalesce store updates into at most one broadcast per ``frame_interval``."""
+
+    def __init__(
+        self,
+        broker: SSEBroker,
+        store,
+        render_cache: MetricsRenderCache,
+        frame_interval: float = 0.25,
+        clock: Callable[[], float] = time.monotonic,
+        deltas: Optional[MetricsDeltas] = None,
+    ) -> None:
+        self.broker = broker
+        self.store = store
+        self.render_cache = render_cache
+        self.deltas = deltas
+        self.frame_interval = frame_interval
+        self.clock = clock
+        self.dirty = False
+        self.urgent = False
+        self.last_publish = float("-inf")
+        self.publishes = 0
+        self.marks = 0
+        # Run before each broadcast (``app.backplane`` ships new events to workers)
+        self.before_flush: list[Callable[[], None]] = []
+
+    def mark(self, critical: bool = False) -> None:
+        """Record that the store changed since the last publish."""
+        self.dirty = True
+        self.marks += 1
+        if critical:
+            self.urgent = True
+
+    def delay(self) -> float:
+        """Seconds until a pending update may be published (0 if due now)."""
+        if self.urgent:
+            return 0.0
+        return max(0.0, self.last_publish + self.frame_interval - self.clock())
+
+    def due(self) -> bool:
+        return self.dirty and self.delay() <= 0.0
+
+    async def flush(self) -> None:
+        """Broadcast now: the changed fragments when ``deltas`` is set,
+        otherwise the full partial (via the shared render cache)."""
+        self.dirty = False
+        self.urgent = False
+        self.last_publish = self.clock()
+        self.publishes += 1
+        for hook in self.before_flush:
+            hook()
+        if self.deltas is None:
+            await self.broker.publish(self.render_cache.html(self.store))
+            return
+        frames = self.deltas.build(
+            self.store, self.render_cache.extra, self.broker.channels(), self.broker.topics(JSON)
+        )
+        for channel, event, data in frames:
+            await self.broker.publish(data, event=event, channel=channel)
+
+    async def maybe_flush(self) -> bool:
+        if self.due():
+            await self.flush()
+            return True
+        return False
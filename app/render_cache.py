@@ -0,0 +1,101 @@
+"""Render-once cache for the ``partials/metrics.html`` fragment.
+
+``DataStore.version`` increases on every insert. ``MetricsRenderCache``
+keeps the last rendered fragment together with the store version (and a
+coarse clock bucket, because the 60s KPIs and heatmap depend on "now")
+it was rendered for, so every publisher and page load in between shares
+one render and one gzip.
+"""
+from __future__ import annotations
+
+import gzip
+import time
+from typing import Callable, Optional
+
+METRICS_TEMPLATE = "partials/metrics.html"
+
+
+def metrics_context(store, **extra) -> dict:
+    """Template context for ``partials/metrics.html`` from the store's aggregates."""
+    labels, values = store.latency_series()
+    thr_labels, thr_values = store.throughput_series()
+    prof_labels, prof_values = store.profit_series()
+    context = {
+        "kpis": store.kpis(),
+        "latency_series": list(zip(labels, values)),
+        "throughput_series": list(zip(thr_labels, thr_values)),
+        "profit_series": list(zip(prof_labels, prof_values)),
+        "heatmap": store.heatmap_matrix(),
+        "last_events": store.last_events(25),
+        # Newest event sequence; rows and chart points carry it so SSE deltas can be de-duplicated
+        "seq": store.events.next_seq - 1,
+    }
+    context.update(extra)
+    return context
+
+
+class RenderedMetrics:
+    """One rendered fragment plus lazily built gzip bytes."""
+
+    __slots__ = ("html", "version", "etag", "_gzip")
+
+    def __init__(self, html: str, version: int, etag: str) -> None:
+        self.html = html
+        self.version = version
+        self.etag = etag
+        self._gzip: Optional[bytes] = None
+
+    @property
+    def gzip(self) -> bytes:
+        if self._gzip is None:
+            self._gzip = gzip.compress(self.html.encode("utf-8"), compresslevel=6)
+        return self._gzip
+
+
+class MetricsRenderCache:
+    """Serve the metrics partial rendered at most once per store version.
+
+    ``extra`` context (e.g. the mock publisher's sensor readings) is sticky:
+    it is merged into every render until replaced with ``update_extra``.
+    """
+
+    def __init__(
+        self,
+        render_html: Callable[[str, dict], str],
+        template: str = METRICS_TEMPLATE,
+        max_age: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.render_html = render_html
+        self.template = template
+        self.max_age = max_age
+        self.clock = clock
+        self.renders = 0
+        self.hits = 0
+        self._extra: dict = {}
+        self._key: Optional[tuple] = None
+        self._entry: Optional[RenderedMetrics] = None
+
+    @property
+    def extra(self) -> dict:
+        return self._extra
+
+    def update_extra(self, **context) -> None:
+        self._extra.update(context)
+        self._key = None
+
+    def get(self, store) -> RenderedMetrics:
+        key = (id(store), store.version, int(self.clock() // self.max_age))
+        entry = self._entry
+        if entry is not None and key == self._key:
+            self.hits += 1
+            return entry
+        html = self.render_html(self.template, metrics_context(store, **self._extra))
+        self.renders += 1
+        entry = RenderedMetrics(html, store.version, f'W/"metrics-{store.version}-{key[2]}"')
+        self._key = key
+        self._entry = entry
+        return entry
+
+    def html(self, store) -> str:
+        return self.get(store).html
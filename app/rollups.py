@@ -0,0 +1,172 @@
+"""Multi-resolution time-series rollups.
+
+Each ``Rollup`` is a fixed-size ring of time buckets at one resolution,
+keyed by integer bucket number (``ts_ms // resolution_ms``) so ordering
+is correct across midnight and across days. Buckets hold count, success
+count, latency sum/min/max and profit sum, and are updated on every
+insert. Rollups record every ingested event and are not reduced when
+the store's event buffer evicts, so a 24h chart stays available with a
+small ``max_events``.
+"""
+from __future__ import annotations
+
+from array import array
+from typing import NamedTuple, Optional
+
+
+class Bucket(NamedTuple):
+    start_ms: int
+    count: int
+    success_count: int
+    latency_sum: int
+    latency_min: int
+    latency_max: int
+    profit_sum: float
+
+    @property
+    def avg_latency(self) -> Optional[float]:
+        return self.latency_sum / self.count if self.count else None
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        return self.success_count * 100.0 / self.count if self.count else None
+
+
+_COLUMNS = ("bucket", "count", "success", "latency_sum", "latency_min", "latency_max", "profit_sum")
+
+
+class Rollup:
+    """Ring of ``slots`` buckets of ``resolution_s`` seconds each."""
+
+    def __init__(self, resolution_s: int, slots: int) -> None:
+        self.resolution_s = resolution_s
+        self.resolution_ms = resolution_s * 1000
+        self.slots = slots
+        self.bucket = array("q", [-1]) * slots
+        self.count = array("q", bytes(8 * slots))
+        self.success = array("q", bytes(8 * slots))
+        self.latency_sum = array("q", bytes(8 * slots))
+        self.latency_min = array("q", bytes(8 * slots))
+        self.latency_max = array("q", bytes(8 * slots))
+        self.profit_sum = array("d", bytes(8 * slots))
+        self.latest = -1
+
+    def add(self, ts_ms: int, latency_ms: int, success: bool, profit: Optional[float]) -> None:
+        b = ts_ms // self.resolution_ms
+        if b <= self.latest - self.slots:
+            return  # older than the retained range
+        i = b % self.slots
+        if self.bucket[i] != b:
+            if self.bucket[i] > b:
+                return
+            self.bucket[i] = b
+            self.count[i] = 0
+            self.success[i] = 0
+            self.latency_sum[i] = 0
+            self.latency_min[i] = latency_ms
+            self.latency_max[i] = latency_ms
+            self.profit_sum[i] = 0.0
+        self.count[i] += 1
+        if success:
+            self.success[i] += 1
+        self.latency_sum[i] += latency_ms
+        if latency_ms < self.latency_min[i]:
+            self.latency_min[i] = latency_ms
+        if latency_ms > self.latency_max[i]:
+            self.latency_max[i] = latency_ms
+        if profit is not None:
+            self.profit_sum[i] += profit
+        if b > self.latest:
+            self.latest = b
+
+    def window(self, points: int, end_ms: Optional[int] = None) -> list[Bucket]:
+        """Return up to ``points`` contiguous buckets, oldest first.
+
+        The window ends at the bucket containing ``end_ms`` (default: the
+        newest bucket with data). Buckets without data are returned with
+        zero counts.
+        """
+        if end_ms is None:
+            end = self.latest
+        else:
+            end = end_ms // self.resolution_ms
+        if end < 0:
+            return []
+        points = max(0, min(points, self.slots))
+        res = self.resolution_ms
+        out: list[Bucket] = []
+        for b in range(end - points + 1, end + 1):
+            i = b % self.slots
+            if self.bucket[i] == b:
+                out.append(Bucket(
+                    b * res,
+                    self.count[i],
+                    self.success[i],
+                    self.latency_sum[i],
+                    self.latency_min[i],
+                    self.latency_max[i],
+                    self.profit_sum[i],
+                ))
+            else:
+                out.append(Bucket(b * res, 0, 0, 0, 0, 0, 0.0))
+        return out
+
+    def to_state(self) -> dict:
+        return {
+            "resolution_s": self.resolution_s,
+            "slots": self.slots,
+            "latest": self.latest,
+            **{name: getattr(self, name).tolist() for name in _COLUMNS},
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Rollup":
+        rollup = cls(int(state["resolution_s"]), int(state["slots"]))
+        for name in _COLUMNS:
+            col = array(getattr(rollup, name).typecode, state[name])
+            if len(col) != rollup.slots:
+                raise ValueError(f"rollup column {name} has {len(col)} buckets, expected {rollup.slots}")
+            setattr(rollup, name, col)
+        rollup.latest = int(state["latest"])
+        return rollup
+
+
+# name -> (bucket seconds, bucket count)
+DEFAULT_RESOLUTIONS: dict[str, tuple[int, int]] = {
+    "1s": (1, 3600),       # 1 hour
+    "10s": (10, 8640),     # 24 hours
+    "1m": (60, 1440),      # 24 hours
+    "1h": (3600, 24 * 30),  # 30 days
+}
+
+
+class RollupSet:
+    """One ``Rollup`` per named resolution, all fed by ``add``."""
+
+    def __init__(self, resolutions: Optional[dict[str, tuple[int, int]]] = None) -> None:
+        spec = resolutions or DEFAULT_RESOLUTIONS
+        self.rollups: dict[str, Rollup] = {
+            name: Rollup(seconds, slots) for name, (seconds, slots) in spec.items()
+        }
+
+    def __getitem__(self, resolution: str) -> Rollup:
+        return self.rollups[resolution]
+
+    def __contains__(self, resolution: str) -> bool:
+        return resolution in self.rollups
+
+    def add(self, ts_ms: int, latency_ms: int, success: bool, profit: Optional[float]) -> None:
+        for rollup in self.rollups.values():
+            rollup.add(ts_ms, latency_ms, success, profit)
+
+    def window(self, resolution: str, points: int, end_ms: Optional[int] = None) -> list[Bucket]:
+        return self.rollups[resolution].window(points, end_ms)
+
+    def to_state(self) -> dict:
+        return {name: rollup.to_state() for name, rollup in self.rollups.items()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "RollupSet":
+        out = cls()
+        out.rollups = {name: Rollup.from_state(rollup) for name, rollup in state.items()}
+        return out
@@ -1,28 +1,28 @@
 """API endpoints for JSON data."""
 from __future__ import annotations
 
-import json
+import asyncio
 import os
 import random
 from datetime import datetime, timezone
+from typing import Optional
 
 from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
-from fastapi.templating import Jinja2Templates
-from pathlib import Path
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from app.dependencies import get_store, get_broker
-from app.data import parse_bot_log_to_event
-
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-TEMPLATES_DIR = BASE_DIR / "templates"
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+from app.codec import FastJSONResponse, dumps
+from app.config import settings
+from app.dependencies import get_store, get_ingest_queue, get_relay
+from app.ingest import IngestError, ndjson_batches
+from app.eventbuffer import ms_to_datetime
 
 router = APIRouter()
 
+PERCENTILE_METRICS = {"p50_latency": 0.50, "p95_latency": 0.95, "p99_latency": 0.99}
+
 
 @router.get("/api/bots/status")
-async def get_bots_status(request: Request) -> JSONResponse:
+async def get_bots_status(request: Request) -> FastJSONResponse:
     """Get aggregated health status for all bots.
     
     Returns bot name, last heartbeat, success ratio, failure count, 
@@ -30,55 +30,32 @@ async def get_bots_status(request: Request) -> JSONResponse:
     """
     store = get_store(request)
     
-    # Aggregate events by bot name
-    bot_stats = {}
-    events = list(store.events)
-    
-    for event in events:
-        bot_name = event.bot_name
-        if bot_name not in bot_stats:
-            bot_stats[bot_name] = {
-                "bot_name": bot_name,
-                "last_heartbeat": None,
-                "success_count": 0,
-                "failure_count": 0,
-                "total_count": 0,
-                "latencies": [],
-                "last_block": None,  # Not available in current model
-            }
-        
-        stats = bot_stats[bot_name]
-        stats["total_count"] += 1
-        stats["last_heartbeat"] = event.timestamp.isoformat()
-        stats["latencies"].append(event.latency_ms)
-        
-        if event.error is None and event.status in (None, "ok"):
-            stats["success_count"] += 1
-        else:
-            stats["failure_count"] += 1
-    
-    # Calculate success ratio and average latency for each bot
+    # Per-bot counters are maintained incrementally by the store's BotIndex;
+    # sort by last heartbeat (most recent first)
     bots = []
-    for bot_name, stats in bot_stats.items():
-        success_ratio = (stats["success_count"] / stats["total_count"] * 100) if stats["total_count"] > 0 else 0.0
-        avg_latency = sum(stats["latencies"]) / len(stats["latencies"]) if stats["latencies"] else 0
+    for stats in sorted(store.bots.values(), key=lambda s: s.last_ts_ms, reverse=True):
+        success_ratio = stats.success_ratio
+        avg_latency = stats.avg_latency
+        last_heartbeat = ms_to_datetime(stats.last_ts_ms).isoformat() if stats.total_count else None
+        sketch = store.quantiles.bot(stats.bot_name)
+        q = sketch.quantiles() if sketch is not None else {}
         
         bots.append({
-            "bot_name": bot_name,
-            "name": bot_name,  # Alias for compatibility
-            "last_heartbeat": stats["last_heartbeat"],
+            "bot_name": stats.bot_name,
+            "name": stats.bot_name,  # Alias for compatibility
+            "last_heartbeat": last_heartbeat,
             "success_ratio": round(success_ratio, 2),
             "success_rate": round(success_ratio, 2),  # Alias
-            "failure_count": stats["failure_count"],
+            "failure_count": stats.failure_count,
             "latency_ms": round(avg_latency, 2),
             "avg_latency": round(avg_latency, 2),  # Alias
-            "last_block": stats["last_block"],
+            "p50_latency_ms": round(q.get("p50") or 0, 2),
+            "p95_latency_ms": round(q.get("p95") or 0, 2),
+            "p99_latency_ms": round(q.get("p99") or 0, 2),
+            "last_block": None,  # Not available in current model
         })
     
-    # Sort by last heartbeat (most recent first)
-    bots.sort(key=lambda x: x["last_heartbeat"] or "", reverse=True)
-    
-    return JSONResponse({
+    return FastJSONResponse({
         "status": "success",
         "bots": bots,
         "count": len(bots)
@@ -86,7 +63,7 @@ async def get_bots_status(request: Request) -> JSONResponse:
 
 
 @router.get("/api/charts/data")
-async def get_charts_data(request: Request) -> JSONResponse:
+async def get_charts_data(request: Request) -> FastJSONResponse:
     """Get chart data in JSON format for 3D visualizations.
     
     Returns recent events with all metrics for chart rendering.
@@ -109,7 +86,7 @@ async def get_charts_data(request: Request) -> JSONResponse:
             "tx_hash": event.tx_hash if hasattr(event, 'tx_hash') else None,
         })
     
-    return JSONResponse({
+    return FastJSONResponse({
         "events": chart_data,
         "count": len(chart_data),
         "kpis": store.kpis()
@@ -117,96 +94,117 @@ async def get_charts_data(request: Request) -> JSONResponse:
 
 
 @router.post("/api/logs")
-async def receive_bot_logs(request: Request) -> JSONResponse:
+async def receive_bot_logs(request: Request, batch_size: int = 1000) -> JSONResponse:
     """API endpoint to receive live JSON log data from bots.
     
-    Accepts JSONL (newline-delimited JSON) in request body.
-    Extracts metrics and updates dashboard in real-time.
+    Accepts JSONL (newline-delimited JSON) in request body, parsed as it
+    streams in and queued every ``batch_size`` lines (see ``app.ingest``);
+    a JSON array body is also accepted, up to 16MB. The ingest worker
+    applies queued batches and updates the dashboard, so this returns 202
+    as soon as the body is parsed. While the queue is full, reading the
+    body pauses; if it stays full for ``ingest_backpressure_ms`` the rest
+    of the upload is rejected with 503.
     """
-    store = get_store(request)
-    broker = get_broker(request)
+    queue = get_ingest_queue(request)
+    relay = get_relay(request)
+    if relay is not None and not relay.connected:
+        # Accepting now would queue events nothing can store
+        return JSONResponse(
+            {"status": "error", "message": "Backplane hub is not connected; retry later"},
+            status_code=503,
+            headers={"Retry-After": "1"},
+        )
+    batch_size = max(1, min(batch_size, 10_000))
+    timeout = settings.ingest_backpressure_ms / 1000
+    batches = []
+    
+    def summary(status: str) -> dict:
+        return {
+            "status": status,
+            "logs_received": sum(b["logs"] for b in batches),
+            "metrics_created": sum(b["metrics"] for b in batches),
+            "batches": batches,
+            "queue_depth": queue.depth,
+        }
     
     try:
-        body = await request.body()
-        logs_text = body.decode('utf-8')
-        
-        # Parse JSONL (newline-delimited JSON) or JSON array
-        logs = []
-        try:
-            # Try as JSON array first
-            logs = json.loads(logs_text)
-            if not isinstance(logs, list):
-                logs = []
-        except json.JSONDecodeError:
-            # Parse as JSONL (one JSON per line)
-            for line in logs_text.strip().split('\n'):
-                if not line.strip():
-                    continue
-                try:
-                    log_obj = json.loads(line)
-                    logs.append(log_obj)
-                except json.JSONDecodeError:
-                    continue
-        
-        # Process each log and try to extract metrics
-        metrics_created = 0
-        for log_obj in logs:
-            if not isinstance(log_obj, dict):
-                continue
-            # Try to parse as a metrics event if it has the right structure
-            try:
-                event = parse_bot_log_to_event(log_obj)
-                if event:
-                    store.add(event)
-                    metrics_created += 1
-            except Exception:
-                # If parsing fails, just skip it, don't fail the request
-                pass
-        
-        # Trigger a metrics update broadcast if we created metrics
-        if metrics_created > 0:
-            kpis = store.kpis()
-            labels, values = store.latency_series()
-            thr_labels, thr_values = store.throughput_series()
-            prof_labels, prof_values = store.profit_series()
-            heat = store.heatmap_matrix()
-            
-            def render_html(name: str, context: dict) -> str:
-                template = templates.env.get_template(name)
-                return template.render(**context)
-            
-            html = render_html(
-                "partials/metrics.html",
-                {
-                    "kpis": kpis,
-                    "latency_series": list(zip(labels, values)),
-                    "throughput_series": list(zip(thr_labels, thr_values)),
-                    "profit_series": list(zip(prof_labels, prof_values)),
-                    "heatmap": heat,
-                    "last_events": store.last_events(25),
-                }
-            )
-            await broker.publish(html)
-        
-        return JSONResponse({
-            "status": "success",
-            "logs_received": len(logs),
-            "metrics_created": metrics_created
-        })
+        async for received, records in ndjson_batches(request.stream(), batch_size):
+            if records and not await queue.put(records, timeout):
+                body = summary("error")
+                body["message"] = "Ingest queue is full; retry the remaining logs later"
+                return JSONResponse(body, status_code=503, headers={"Retry-After": "1"})
+            batches.append({"logs": received, "metrics": len(records)})
+    except IngestError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=413)
     except Exception as e:
         return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+    
+    return JSONResponse(summary("success"), status_code=202)
+
+
+@router.get("/api/logs/queue")
+async def get_ingest_queue_status(request: Request) -> JSONResponse:
+    """Depth and counters of the /api/logs ingest queue."""
+    return JSONResponse({"status": "success", **get_ingest_queue(request).stats()})
 
 
 @router.get("/api/live/{metric}")
-async def get_live_metric(request: Request, metric: str) -> JSONResponse:
+async def get_live_metric(
+    request: Request,
+    metric: str,
+    resolution: Optional[str] = None,
+    points: int = 60,
+    bot: Optional[str] = None,
+) -> JSONResponse:
     """Get live metric data for charts.
     
-    Supported metrics: latency, throughput, profit, success_rate
+    Supported metrics: latency, throughput, profit, success_rate,
+    p50_latency, p95_latency, p99_latency
     Returns: { timestamps: [...], values: [...] }
+    
+    Percentile metrics are per-minute values from the store's latency
+    sketches (last hour), optionally for a single ``bot``.
+    
+    With ``resolution`` (1s, 10s, 1m, 1h) values come from the store's
+    precomputed rollup buckets: ``points`` buckets ending at the newest one.
+    Throughput is always bucketed (10s by default).
     """
     store = get_store(request)
+    if metric in PERCENTILE_METRICS:
+        window = store.quantiles.bot_window(bot) if bot else store.quantiles.window
+        if window is None:
+            return JSONResponse({"timestamps": [], "values": []})
+        timestamps, raw = window.series(PERCENTILE_METRICS[metric], max(1, points))
+        return JSONResponse({
+            "timestamps": timestamps,
+            "values": [round(v, 2) if v is not None else None for v in raw]
+        })
+    if resolution is None and metric == "throughput":
+        resolution = "10s"
+    if resolution is not None:
+        if resolution not in store.rollups:
+            return JSONResponse(
+                {"status": "error", "message": f"Unknown resolution: {resolution}"},
+                status_code=400,
+            )
+        buckets = store.series(resolution, max(1, points))
+        timestamps = [b.start_ms for b in buckets]
+        if metric == "throughput":
+            values = [b.count for b in buckets]
+        elif metric == "profit":
+            values = [round(b.profit_sum, 6) for b in buckets]
+        elif metric == "success_rate":
+            values = [round(b.success_rate, 2) if b.count else None for b in buckets]
+        else:
+            # Default to average latency per bucket
+            values = [round(b.avg_latency, 2) if b.count else None for b in buckets]
+        return JSONResponse({
+            "timestamps": timestamps,
+            "values": values
+        })
+
     # Get recent events
-    events = store.last_events(60)  # Last 60 events
+    events = store.last_events(max(1, points))
     
     if not events:
         # Return empty data if no events
@@ -226,9 +224,6 @@ async def get_live_metric(request: Request, metric: str) -> JSONResponse:
         
         if metric == "latency":
             values.append(event.latency_ms)
-        elif metric == "throughput":
-            # Count events per time window (simplified - just use 1 per event)
-            values.append(1)
         elif metric == "profit":
             values.append(event.profit if event.profit is not None else 0.0)
         elif metric == "success_rate":
@@ -244,6 +239,57 @@ async def get_live_metric(request: Request, metric: str) -> JSONResponse:
     })
 
 
+def _parse_time_ms(value: Optional[str], default: int) -> int:
+    """Accept epoch milliseconds or an ISO-8601 timestamp."""
+    if not value:
+        return default
+    if value.lstrip("-").isdigit():
+        return int(value)
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1000)
+
+
+@router.get("/api/events/history")
+async def get_events_history(
+    request: Request,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    bot: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """Stream historical events from the persistent event store as NDJSON.
+    
+    ``start``/``end`` are epoch ms or ISO timestamps (default: last 24h).
+    Rows are streamed from a database cursor, never loaded all at once.
+    """
+    store = get_store(request)
+    if store.event_log is None:
+        return JSONResponse(
+            {"status": "error", "message": "Event store is not configured (set EVENT_STORE_PATH)"},
+            status_code=404,
+        )
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    try:
+        end_ms = _parse_time_ms(end, now_ms + 1)
+        start_ms = _parse_time_ms(start, end_ms - 86_400_000)
+    except ValueError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+    
+    async def rows():
+        # The reader's connection belongs to this request; each batch is
+        # fetched in one worker-thread call, so the loop never blocks on disk
+        reader = await asyncio.to_thread(store.event_log.open_range, start_ms, end_ms, bot, limit)
+        try:
+            while batch := await asyncio.to_thread(reader.fetch, 1000):
+                yield b"".join(dumps(rec._asdict()) + b"\n" for rec in batch)
+        finally:
+            await asyncio.to_thread(reader.close)
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
 @router.get("/favicon.ico")
 async def favicon():
     """Return 204 No Content for favicon requests to prevent 404 errors."""
@@ -5,12 +5,13 @@ import os
 from pathlib import Path
 
 from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 
 from app.config import settings
-from app.dependencies import get_store
+from app.dependencies import get_store, get_render_cache
 from app.data import DataStore
+from app.render_cache import METRICS_TEMPLATE, MetricsRenderCache, metrics_context
 
 # Get BUILD_INFO
 try:
@@ -35,23 +36,28 @@ def get_version() -> str:
     return BUILD_INFO.get("version_string", os.getenv("APP_VERSION", settings.app_version))
 
 
-def get_initial_metrics_html(store: DataStore) -> str:
-    """Build initial metrics HTML for dashboard pages."""
-    kpis = store.kpis()
-    labels, values = store.latency_series()
-    thr_labels, thr_values = store.throughput_series()
-    prof_labels, prof_values = store.profit_series()
-    heat = store.heatmap_matrix()
-    return templates.env.get_template("partials/metrics.html").render(
-        {
-            "kpis": kpis,
-            "latency_series": list(zip(labels, values)),
-            "throughput_series": list(zip(thr_labels, thr_values)),
-            "profit_series": list(zip(prof_labels, prof_values)),
-            "heatmap": heat,
-            "last_events": store.last_events(25),
-        }
-    )
+def get_initial_metrics_html(store: DataStore, render_cache: MetricsRenderCache | None = None) -> str:
+    """Build initial metrics HTML for dashboard pages.
+
+    Served from the shared render cache, so concurrent page loads with no
+    new data cost a single render.
+    """
+    if render_cache is not None:
+        return render_cache.html(store)
+    return templates.env.get_template(METRICS_TEMPLATE).render(metrics_context(store))
+
+
+@router.get("/partials/metrics")
+async def metrics_partial(request: Request) -> Response:
+    """The metrics partial on its own, with ETag and pre-gzipped body."""
+    rendered = get_render_cache(request).get(get_store(request))
+    headers = {"ETag": rendered.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == rendered.etag:
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(rendered.gzip, media_type="text/html; charset=utf-8", headers=headers)
+    return HTMLResponse(rendered.html, headers=headers)
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -60,7 +66,7 @@ async def index(request: Request) -> HTMLResponse:
     version = get_version()
     sample_mode = getattr(request.app.state, "sample_mode", False)
     store = get_store(request)
-    initial_metrics_html = get_initial_metrics_html(store)
+    initial_metrics_html = get_initial_metrics_html(store, get_render_cache(request))
     return templates.TemplateResponse(
         "ide-dashboard.html",
         {"request": request, "sample_mode": sample_mode, "initial_metrics_html": initial_metrics_html, "version": version},
@@ -80,7 +86,7 @@ async def tv_dashboard(request: Request) -> HTMLResponse:
     version = get_version()
     sample_mode = getattr(request.app.state, "sample_mode", False)
     store = get_store(request)
-    initial_metrics_html = get_initial_metrics_html(store)
+    initial_metrics_html = get_initial_metrics_html(store, get_render_cache(request))
     return templates.TemplateResponse(
         "index.html",
         {"request": request, "sample_mode": sample_mode, "initial_metrics_html": initial_metrics_html, "last_events": store.last_events(25), "version": version},
@@ -92,7 +98,7 @@ async def dashboard(request: Request) -> HTMLResponse:
     """New sidebar dashboard layout with Alpine.js."""
     sample_mode = getattr(request.app.state, "sample_mode", False)
     store = get_store(request)
-    initial_metrics_html = get_initial_metrics_html(store)
+    initial_metrics_html = get_initial_metrics_html(store, get_render_cache(request))
     return templates.TemplateResponse(
         "dashboard.html",
         {"request": request, "sample_mode": sample_mode, "initial_metrics_html": initial_metrics_html},
@@ -151,8 +157,7 @@ async def downloads_page(request: Request) -> HTMLResponse:
 @router.get("/report", response_class=HTMLResponse)
 async def report(request: Request) -> HTMLResponse:
     """Daily report page."""
-    store = get_store(request)
-    summary = store.daily_summary()
+    summary = await get_store(request).daily_summary()
     return templates.TemplateResponse("report.html", {"request": request, "summary": summary})
 
 
@@ -161,7 +166,7 @@ async def demo(request: Request) -> HTMLResponse:
     """Demo page."""
     sample_mode = getattr(request.app.state, "sample_mode", False)
     store = get_store(request)
-    initial_metrics_html = get_initial_metrics_html(store)
+    initial_metrics_html = get_initial_metrics_html(store, get_render_cache(request))
     return templates.TemplateResponse(
         "demo.html",
         {"request": request, "sample_mode": sample_mode, "initial_metrics_html": initial_metrics_html},
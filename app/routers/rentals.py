@@ -1,14 +1,17 @@
 """Bot rental endpoints."""
 from __future__ import annotations
 
+import json
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 
-from app.dependencies import get_store
+from app.dependencies import get_broker, get_store
 from app.models import RentalRequest, RentalDuration, RentalStatus
 from app.database import get_database
+from app.deltas import RENTALS_TOPIC
+from app.sse import JSON
 
 router = APIRouter()
 
@@ -39,12 +42,10 @@ async def rent_bot(request: Request, rental_request: RentalRequest) -> JSONRespo
         
         # Get bot info to calculate price
         bot_stats = {}
-        events = list(store.events)
-        for event in events:
-            if event.bot_name.lower().replace(" ", "-") == rental_request.bot_id:
-                bot_stats["bot_name"] = event.bot_name
-                bot_stats["success_rate"] = event.success_rate
-                break
+        event = store.last_slug_event(rental_request.bot_id)
+        if event is not None:
+            bot_stats["bot_name"] = event.bot_name
+            bot_stats["success_rate"] = event.success_rate
         
         # Calculate performance-based pricing
         # Higher success rate = higher price
@@ -78,19 +79,22 @@ async def rent_bot(request: Request, rental_request: RentalRequest) -> JSONRespo
         rental_id = db.create_rental(rental)
         rental.id = rental_id
         
+        payload = {
+            "id": rental_id,
+            "bot_id": rental.bot_id,
+            "bot_name": rental.bot_name,
+            "duration": rental.duration.value,
+            "price": round(rental.price, 2),
+            "performance_multiplier": round(performance_multiplier, 2),
+            "status": rental.status.value,
+            "rented_at": rental.rented_at.isoformat(),
+            "expires_at": rental.expires_at.isoformat()
+        }
+        await _publish_rental(request, {"action": "created", "rental": payload})
+        
         return JSONResponse({
             "status": "success",
-            "rental": {
-                "id": rental_id,
-                "bot_id": rental.bot_id,
-                "bot_name": rental.bot_name,
-                "duration": rental.duration.value,
-                "price": round(rental.price, 2),
-                "performance_multiplier": round(performance_multiplier, 2),
-                "status": rental.status.value,
-                "rented_at": rental.rented_at.isoformat(),
-                "expires_at": rental.expires_at.isoformat()
-            }
+            "rental": payload
         })
     except Exception as e:
         return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
@@ -118,12 +122,10 @@ async def get_rentals(request: Request) -> JSONResponse:
         for rental in active_rentals:
             # Get current bot performance
             bot_stats = {}
-            events = list(store.events)
-            for event in events:
-                if event.bot_name.lower().replace(" ", "-") == rental.bot_id:
-                    bot_stats["success_rate"] = event.success_rate
-                    bot_stats["latency_ms"] = event.latency_ms
-                    break
+            event = store.last_slug_event(rental.bot_id)
+            if event is not None:
+                bot_stats["success_rate"] = event.success_rate
+                bot_stats["latency_ms"] = event.latency_ms
             
             rentals.append({
                 "id": rental.id or f"rental_{rental.bot_id}_{int(rental.rented_at.timestamp())}",
@@ -160,11 +162,9 @@ async def get_bot_rental_info(request: Request, bot_id: str) -> JSONResponse:
         store = get_store(request)
         # Get bot stats
         bot_stats = {}
-        events = list(store.events)
-        for event in events:
-            if event.bot_name.lower().replace(" ", "-") == bot_id:
-                bot_stats["bot_name"] = event.bot_name
-                break
+        event = store.last_slug_event(bot_id)
+        if event is not None:
+            bot_stats["bot_name"] = event.bot_name
         
         # Calculate pricing based on bot type/strategy and performance
         strategy = "arbitrage"  # Default
@@ -187,12 +187,9 @@ async def get_bot_rental_info(request: Request, bot_id: str) -> JSONResponse:
         # Get bot performance metrics
         success_rate = 0
         latency_ms = 0
-        events = list(store.events)
-        for event in events:
-            if event.bot_name.lower().replace(" ", "-") == bot_id:
-                success_rate = event.success_rate
-                latency_ms = event.latency_ms
-                break
+        if event is not None:
+            success_rate = event.success_rate
+            latency_ms = event.latency_ms
         
         # Performance-based pricing multiplier
         performance_multiplier = 1.0
@@ -231,7 +228,7 @@ async def get_bot_rental_info(request: Request, bot_id: str) -> JSONResponse:
 
 
 @router.delete("/api/bots/rentals/{rental_id}")
-async def cancel_rental(rental_id: str) -> JSONResponse:
+async def cancel_rental(request: Request, rental_id: str) -> JSONResponse:
     """Cancel an active rental.
     
     Marks rental as cancelled and processes refund if applicable.
@@ -242,6 +239,7 @@ async def cancel_rental(rental_id: str) -> JSONResponse:
         success = db.cancel_rental(rental_id)
         
         if success:
+            await _publish_rental(request, {"action": "cancelled", "rental": {"id": rental_id}})
             return JSONResponse({
                 "status": "success",
                 "message": f"Rental {rental_id} cancelled successfully",
@@ -258,3 +256,7 @@ async def cancel_rental(rental_id: str) -> JSONResponse:
             "message": str(e)
         }, status_code=400)
 
+
+async def _publish_rental(request: Request, change: dict) -> None:
+    """Push a rental change to ``/stream?format=json&topics=rentals`` subscribers."""
+    await get_broker(request).publish(json.dumps(change), event=RENTALS_TOPIC, channel=JSON)
@@ -2,92 +2,128 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import os
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
 
 from fastapi import APIRouter, Request
-from fastapi.responses import StreamingResponse
-from sse_starlette.sse import EventSourceResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from app.dependencies import get_store, get_broker
-from app.sse import client_event_stream
-from app.data import tail_jsonl_and_broadcast, parse_bot_log_to_event
-
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-TEMPLATES_DIR = BASE_DIR / "templates"
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+from app.dependencies import get_store, get_broker, get_render_cache, get_row_templates
+from app.sse import JSON, SSEResponse, client_event_stream
+from app.deltas import JSON_TOPICS, is_json_topic, json_snapshot
+from app.eventbuffer import ms_to_datetime
 
 router = APIRouter()
 
 
 @router.get("/stream")
-async def stream(request: Request):
-    """SSE stream for real-time metrics updates."""
+async def stream(request: Request, format: str = "html", topics: Optional[str] = None):
+    """SSE stream for real-time metrics updates.
+
+    ``format=json`` switches to typed JSON events, one per topic (see
+    ``app.deltas.JSON_TOPICS``); ``topics`` is a comma-separated subset,
+    which may also name ``bot:<slug>`` (one bot's stats and events) and
+    ``rentals``.
+    A ``Last-Event-ID`` header resumes from the broker's replay ring.
+    """
     broker = get_broker(request)
-    return EventSourceResponse(client_event_stream(request, broker))
+    store = get_store(request)
+    render_cache = get_render_cache(request)
+    last_event_id = _last_event_id(request)
+    if format == "json":
+        wanted = [t.strip() for t in topics.split(",") if t.strip()] if topics else list(JSON_TOPICS)
+        unknown = [t for t in wanted if not is_json_topic(t)]
+        if unknown:
+            return JSONResponse(
+                {"status": "error", "message": f"Unknown topics: {', '.join(unknown)}"},
+                status_code=400,
+            )
+        return SSEResponse(
+            client_event_stream(
+                request, broker,
+                snapshot=lambda: json_snapshot(store, wanted, render_cache.extra),
+                channel=JSON,
+                topics=wanted,
+                last_event_id=last_event_id,
+            )
+        )
+    if format != "html":
+        return JSONResponse({"status": "error", "message": f"Unknown format: {format}"}, status_code=400)
+    return SSEResponse(
+        client_event_stream(
+            request, broker,
+            snapshot=lambda: render_cache.html(store),
+            last_event_id=last_event_id,
+        )
+    )
+
+
+def _last_event_id(request: Request) -> Optional[int]:
+    """The ``Last-Event-ID`` a reconnecting EventSource sends, if it is one of ours."""
+    value = request.headers.get("last-event-id", "").strip()
+    return int(value) if value.isdigit() else None
 
 
 @router.get("/events")
 async def events(request: Request) -> StreamingResponse:
     """Stream events as HTML divs."""
     store = get_store(request)
+    row_templates = get_row_templates(request)
     
     async def stream():
-        last_sent_index = 0
         # Initial small chunk to kick off streaming
         yield "<!-- event-stream-start -->\n"
-        while True:
-            try:
-                if await request.is_disconnected():
-                    break
-            except Exception:
-                break
-            events = list(store.events)
-            while last_sent_index < len(events):
-                e = events[last_sent_index]
-                last_sent_index += 1
+        # Everything buffered first, then only events with a newer sequence
+        async for records in _follow_store(request, store, -1):
+            rows = []
+            for rec in records:
                 # Determine status styling
-                ok = (e.error is None) and (e.status in (None, "ok"))
+                ok = (rec.error is None) and (rec.status in (None, "ok"))
                 status_class = "text-emerald-400"
-                if not ok and (e.status == "warning"):
+                if not ok and (rec.status == "warning"):
                     status_class = "text-yellow-400"
                 elif not ok:
                     status_class = "text-red-400"
-                # Render a compact event row (Div component)
-                html = templates.env.from_string(
-                    """
-<div class="event-item flex items-center gap-2 py-1 text-xs">
-  <span class="opacity-60">{{ ts }}</span>
-  <span class="font-semibold">{{ bot }}</span>
-  <span class="ml-2 font-mono opacity-70">{{ latency }}</span>
-  <span class="ml-2 {{ status_class }}">{{ status_text }}</span>
-  {% if tx %}<span class="ml-2 font-mono text-[10px] opacity-70">{{ tx }}</span>{% endif %}
-</div>
-"""
-                ).render(
-                    ts=e.timestamp.strftime("%H:%M:%S"),
-                    bot=e.bot_name,
-                    latency=f"{int(e.latency_ms)}ms",
-                    status_class=status_class,
-                    status_text=("OK" if ok else (str(e.status or "error")).upper()),
-                    tx=e.tx_hash,
-                )
-                # Each yield flushes immediately to the client
-                yield html + "\n"
-            # Idle wait before checking for new events
-            await asyncio.sleep(0.5)
+                rows.append({
+                    "ts": ms_to_datetime(rec.ts_ms).strftime("%H:%M:%S"),
+                    "bot": rec.bot_name,
+                    "latency": f"{int(rec.latency_ms)}ms",
+                    "status_class": status_class,
+                    "status_text": ("OK" if ok else (str(rec.status or "error")).upper()),
+                    "tx": rec.tx_hash,
+                })
+            # All new rows in one render and one flushed chunk
+            yield row_templates.render_many("event", rows)
 
     return StreamingResponse(stream(), media_type="text/html; charset=utf-8")
 
 
+async def _follow_store(
+    request: Request, store, seq: int, limit: Optional[int] = None
+) -> AsyncIterator[list]:
+    """Batches of events added to ``store`` after sequence ``seq``, one per wakeup.
+
+    Sleeps on ``DataStore.wait_since`` instead of polling; a burst of inserts
+    arrives as one batch (at most the newest ``limit`` events).
+    """
+    while True:
+        try:
+            if await request.is_disconnected():
+                break
+        except Exception:
+            break
+        if not await store.wait_since(seq, timeout=15.0):
+            continue
+        seq, records = store.since(seq, limit)
+        if records:
+            yield records
+
+
 @router.get("/silverback/streaming-demo/chart-stream")
 async def silverback_streaming_demo_chart_stream(request: Request) -> StreamingResponse:
     """Streams table rows for a Charts.css column chart on the streaming demo page."""
     import random
+    row_templates = get_row_templates(request)
     
     async def stream() -> AsyncIterator[str]:
         yield "<!-- streaming-demo-chart-rows -->\n"
@@ -99,14 +135,7 @@ async def silverback_streaming_demo_chart_stream(request: Request) -> StreamingR
                 break
             ts = datetime.now(timezone.utc).strftime("%H:%M:%S")
             val = random.randint(0, 100)
-            row = templates.env.from_string(
-                """
-<tr>
-  <td class="font-mono text-xs opacity-70">{{ ts }}</td>
-  <td data-c="{{ val }}">{{ val }}</td>
-</tr>
-"""
-            ).render(ts=ts, val=val)
+            row = row_templates.render("chart_row", {"ts": ts, "val": val})
             yield row + "\n"
             await asyncio.sleep(random.uniform(0.6, 1.6))
     return StreamingResponse(stream(), media_type="text/html; charset=utf-8")
@@ -114,83 +143,24 @@ async def silverback_streaming_demo_chart_stream(request: Request) -> StreamingR
 
 @router.get("/logs/stream")
 async def logs_stream(request: Request) -> StreamingResponse:
-    """Stream logs from Silverback JSONL file or demo data."""
+    """Stream newly ingested log events (from the Silverback tailer or sample mode)."""
     store = get_store(request)
+    row_templates = get_row_templates(request)
     
     async def stream():
         # Start the stream with a small chunk for immediate flush
         yield "<!-- logs-stream-start -->\n"
-        # If a Silverback JSONL log path is configured, tail that file; else stream demo lines
-        log_path = os.getenv("SILVERBACK_LOG_PATH")
-        if log_path and Path(log_path).exists():
-            try:
-                with Path(log_path).open("r", encoding="utf-8") as f:
-                    # Start tailing from end of file (live only)
-                    f.seek(0, 2)
-                    while True:
-                        try:
-                            if await request.is_disconnected():
-                                break
-                        except Exception:
-                            break
-                        line = f.readline()
-                        if line:
-                            try:
-                                log_obj = json.loads(line.strip())
-                                event = parse_bot_log_to_event(log_obj)
-                                if event:
-                                    store.add(event)
-                                    # Render log entry as HTML
-                                    html = templates.env.from_string(
-                                        """
-<div class="log-entry p-2 border-b border-gray-700">
-  <div class="flex items-center gap-2 text-xs">
-    <span class="opacity-60">{{ timestamp }}</span>
-    <span class="font-semibold text-cyan-400">{{ bot_name }}</span>
-    <span class="ml-2 font-mono opacity-70">{{ latency }}ms</span>
-    {% if error %}<span class="ml-2 text-red-400">{{ error }}</span>{% endif %}
-  </div>
-</div>
-"""
-                                    ).render(
-                                        timestamp=event.timestamp.strftime("%H:%M:%S"),
-                                        bot_name=event.bot_name,
-                                        latency=event.latency_ms,
-                                        error=event.error,
-                                    )
-                                    yield html + "\n"
-                            except json.JSONDecodeError:
-                                pass
-                        else:
-                            await asyncio.sleep(0.1)
-            except Exception as e:
-                yield f"<!-- Error reading log file: {e} -->\n"
-        else:
-            # Demo mode: stream some sample log entries
-            import random
-            sample_bots = ["arb-scout", "mev-bot", "price-bot", "trade-executor"]
-            for _ in range(10):
-                try:
-                    if await request.is_disconnected():
-                        break
-                except Exception:
-                    break
-                bot = random.choice(sample_bots)
-                latency = random.randint(50, 500)
-                ts = datetime.now(timezone.utc).strftime("%H:%M:%S")
-                html = templates.env.from_string(
-                    """
-<div class="log-entry p-2 border-b border-gray-700">
-  <div class="flex items-center gap-2 text-xs">
-    <span class="opacity-60">{{ timestamp }}</span>
-    <span class="font-semibold text-cyan-400">{{ bot_name }}</span>
-    <span class="ml-2 font-mono opacity-70">{{ latency }}ms</span>
-  </div>
-</div>
-"""
-                ).render(timestamp=ts, bot_name=bot, latency=latency)
-                yield html + "\n"
-                await asyncio.sleep(1.0)
+        # Live only: start after the newest buffered event
+        async for records in _follow_store(request, store, store.events.next_seq - 1, limit=500):
+            yield row_templates.render_many("log_entry", [
+                {
+                    "timestamp": ms_to_datetime(rec.ts_ms).strftime("%H:%M:%S"),
+                    "bot_name": rec.bot_name,
+                    "latency": rec.latency_ms,
+                    "error": rec.error,
+                }
+                for rec in records
+            ])
 
     return StreamingResponse(stream(), media_type="text/html; charset=utf-8")
 
@@ -325,23 +295,15 @@ async def advisor_chat(request: Request) -> StreamingResponse:
 
 @router.get("/charts/mini")
 async def charts_mini(request: Request) -> StreamingResponse:
-    """Mini charts streaming endpoint."""
+    """Mini charts streaming endpoint: one bar per new event's latency."""
     store = get_store(request)
     
     async def stream() -> AsyncIterator[str]:
         yield "<!-- charts-mini-start -->\n"
-        while True:
-            try:
-                if await request.is_disconnected():
-                    break
-            except Exception:
-                break
-            # Get latest latency value
-            events = list(store.events)
-            if events:
-                latest = events[-1]
-                value = latest.latency_ms / 1000.0  # Convert to seconds
-                yield f'<li style="--size: {value:.3f};">{value:.3f}s</li>\n'
-            await asyncio.sleep(1.0)
+        # Start with the latest event, then every newer one
+        async for records in _follow_store(request, store, store.events.next_seq - 2, limit=20):
+            yield "".join(
+                f'<li style="--size: {rec.latency_ms / 1000.0:.3f};">{rec.latency_ms / 1000.0:.3f}s</li>\n'
+                for rec in records
+            )
     return StreamingResponse(stream(), media_type="text/html; charset=utf-8")
-
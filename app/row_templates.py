@@ -0,0 +1,44 @@
+"""Pre-compiled row fragments for the HTML streaming endpoints.
+
+Each fragment lives in ``templates/partials/rows/<name>.html`` and reads
+its values from ``row``. ``RowTemplates.load`` compiles every fragment
+once, together with a batch variant that wraps the same source in a
+``{% for row in rows %}`` loop, so ``render_many`` emits N rows in a
+single template call instead of N.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Mapping
+
+from jinja2 import Environment, Template
+
+ROWS_DIR = "partials/rows"
+ROW_TEMPLATES = ("event", "log_entry", "chart_row")
+
+
+class RowTemplates:
+    """Registry of compiled row fragments, shared by the streaming routers."""
+
+    def __init__(self, env: Environment, names: Iterable[str] = ROW_TEMPLATES) -> None:
+        self.env = env
+        self.names = tuple(names)
+        self._single: dict[str, Template] = {}
+        self._batch: dict[str, Template] = {}
+
+    def load(self) -> "RowTemplates":
+        for name in self.names:
+            filename = f"{ROWS_DIR}/{name}.html"
+            source, _, _ = self.env.loader.get_source(self.env, filename)
+            source = source.strip()
+            self._single[name] = self.env.from_string(source)
+            self._batch[name] = self.env.from_string(
+                "{% for row in rows %}" + source + "\n{% endfor %}"
+            )
+        return self
+
+    def render(self, name: str, row: Mapping) -> str:
+        return self._single[name].render(row=row)
+
+    def render_many(self, name: str, rows: Iterable[Mapping]) -> str:
+        """All ``rows`` rendered back to back, one per line."""
+        return self._batch[name].render(rows=rows)
@@ -0,0 +1,272 @@
+"""Streaming latency quantiles from mergeable log-bucketed sketches.
+
+``QuantileSketch`` is a DDSketch-style histogram: a value ``v`` lands in
+bucket ``ceil(log(v) / log(gamma))`` so every quantile it reports is within
+``relative_accuracy`` of the true value. Values are clamped to
+``[min_value, max_value]``, which bounds the number of buckets (about 1000
+at 1% accuracy for 1ms..1e9ms) no matter how many events arrive. Sketches
+merge by adding bucket counts and support removing a value that was added.
+
+``WindowedSketch`` keeps one sketch per minute in a ring; sliding-window
+quantiles merge the last N minutes.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+QUANTILES = {"p50": 0.50, "p95": 0.95, "p99": 0.99}
+
+
+class QuantileSketch:
+    __slots__ = ("relative_accuracy", "gamma", "_log_gamma", "min_value", "max_value",
+                 "_max_key", "counts", "zero_count", "count")
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1.0,
+                 max_value: float = 1e9) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.max_value = max_value
+        self._max_key = self._key(max_value)
+        self.counts: dict[int, int] = {}
+        # Values below min_value (e.g. 0ms) are counted here and reported as 0.
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2.0 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, n: int = 1) -> None:
+        self.count += n
+        if value < self.min_value:
+            self.zero_count += n
+            return
+        key = self._key(value) if value < self.max_value else self._max_key
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def remove(self, value: float, n: int = 1) -> None:
+        """Undo a previous ``add(value, n)``."""
+        if value < self.min_value:
+            if self.zero_count >= n:
+                self.zero_count -= n
+                self.count -= n
+            return
+        key = self._key(value) if value < self.max_value else self._max_key
+        have = self.counts.get(key, 0)
+        if have < n:
+            return
+        self.count -= n
+        if have == n:
+            del self.counts[key]
+        else:
+            self.counts[key] = have - n
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different accuracy")
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for key, n in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.counts)) if self.counts else 0.0
+
+    def quantiles(self, qs: dict[str, float] = QUANTILES) -> dict[str, Optional[float]]:
+        """Several quantiles in a single pass over the buckets."""
+        out: dict[str, Optional[float]] = {name: None for name in qs}
+        if self.count <= 0:
+            return out
+        pending = sorted(((q * (self.count - 1), name) for name, q in qs.items()), reverse=True)
+        seen = self.zero_count
+        while pending and pending[-1][0] < seen:
+            out[pending.pop()[1]] = 0.0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            while pending and pending[-1][0] < seen:
+                out[pending.pop()[1]] = self._value(key)
+            if not pending:
+                break
+        return out
+
+    def __len__(self) -> int:
+        return len(self.counts) + (1 if self.zero_count else 0)
+
+    def to_state(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "counts": sorted(self.counts.items()),
+            "zero_count": self.zero_count,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "QuantileSketch":
+        sk = cls(float(state["relative_accuracy"]), float(state["min_value"]), float(state["max_value"]))
+        sk.counts = {int(key): int(n) for key, n in state["counts"]}
+        sk.zero_count = int(state["zero_count"])
+        sk.count = int(state["count"])
+        return sk
+
+
+def merged(sketches: Iterable[QuantileSketch], relative_accuracy: float = 0.01) -> QuantileSketch:
+    out = QuantileSketch(relative_accuracy)
+    for sk in sketches:
+        out.merge(sk)
+    return out
+
+
+class WindowedSketch:
+    """Ring of per-minute sketches for sliding-window quantiles."""
+
+    def __init__(self, minutes: int = 60, relative_accuracy: float = 0.01) -> None:
+        self.minutes = minutes
+        self.relative_accuracy = relative_accuracy
+        self._tags: list[int] = [-1] * minutes
+        self._sketches: list[Optional[QuantileSketch]] = [None] * minutes
+        self.latest = -1
+
+    def add(self, ts_ms: int, value: float) -> None:
+        minute = ts_ms // 60_000
+        if minute <= self.latest - self.minutes:
+            return
+        i = minute % self.minutes
+        if self._tags[i] != minute:
+            if self._tags[i] > minute:
+                return
+            self._tags[i] = minute
+            self._sketches[i] = QuantileSketch(self.relative_accuracy)
+        self._sketches[i].add(value)
+        if minute > self.latest:
+            self.latest = minute
+
+    def minute(self, minute: int) -> Optional[QuantileSketch]:
+        i = minute % self.minutes
+        return self._sketches[i] if self._tags[i] == minute else None
+
+    def window(self, minutes: int = 5, now_ms: Optional[int] = None) -> QuantileSketch:
+        """Merged sketch of the last ``minutes`` minutes (including the current one)."""
+        if now_ms is None:
+            now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        end = now_ms // 60_000
+        minutes = max(1, min(minutes, self.minutes))
+        return merged(
+            (sk for sk in (self.minute(m) for m in range(end - minutes + 1, end + 1)) if sk is not None),
+            self.relative_accuracy,
+        )
+
+    def series(self, q: float, points: int = 60, end_ms: Optional[int] = None) -> tuple[list[int], list[Optional[float]]]:
+        """Per-minute ``q`` quantile for ``points`` minutes ending at ``end_ms`` (default newest)."""
+        end = self.latest if end_ms is None else end_ms // 60_000
+        if end < 0:
+            return [], []
+        points = max(1, min(points, self.minutes))
+        timestamps: list[int] = []
+        values: list[Optional[float]] = []
+        for m in range(end - points + 1, end + 1):
+            sk = self.minute(m)
+            timestamps.append(m * 60_000)
+            values.append(sk.quantile(q) if sk is not None else None)
+        return timestamps, values
+
+    def to_state(self) -> dict:
+        return {
+            "minutes": self.minutes,
+            "relative_accuracy": self.relative_accuracy,
+            "latest": self.latest,
+            "tags": list(self._tags),
+            "sketches": [sk.to_state() if sk is not None else None for sk in self._sketches],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "WindowedSketch":
+        ws = cls(int(state["minutes"]), float(state["relative_accuracy"]))
+        tags = [int(t) for t in state["tags"]]
+        sketches = [QuantileSketch.from_state(sk) if sk is not None else None for sk in state["sketches"]]
+        if len(tags) != ws.minutes or len(sketches) != ws.minutes:
+            raise ValueError("windowed sketch state does not match its size")
+        ws._tags, ws._sketches, ws.latest = tags, sketches, int(state["latest"])
+        return ws
+
+
+class LatencyQuantiles:
+    """Global and per-bot latency sketches maintained by ``DataStore``.
+
+    ``total``/per-bot sketches mirror the events currently in the store
+    (values are removed on eviction); windowed sketches cover the last hour
+    of ingested events by minute.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, window_minutes: int = 60) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.window_minutes = window_minutes
+        self.total = QuantileSketch(relative_accuracy)
+        self.window = WindowedSketch(window_minutes, relative_accuracy)
+        self._bots: dict[str, tuple[QuantileSketch, WindowedSketch]] = {}
+
+    def add(self, bot_name: str, ts_ms: int, latency_ms: int) -> None:
+        self.total.add(latency_ms)
+        self.window.add(ts_ms, latency_ms)
+        pair = self._bots.get(bot_name)
+        if pair is None:
+            pair = self._bots[bot_name] = (
+                QuantileSketch(self.relative_accuracy),
+                WindowedSketch(self.window_minutes, self.relative_accuracy),
+            )
+        pair[0].add(latency_ms)
+        pair[1].add(ts_ms, latency_ms)
+
+    def remove(self, bot_name: str, latency_ms: int) -> None:
+        self.total.remove(latency_ms)
+        pair = self._bots.get(bot_name)
+        if pair is not None:
+            pair[0].remove(latency_ms)
+
+    def drop_bot(self, bot_name: str) -> None:
+        self._bots.pop(bot_name, None)
+
+    def bot(self, bot_name: str) -> Optional[QuantileSketch]:
+        pair = self._bots.get(bot_name)
+        return pair[0] if pair is not None else None
+
+    def bot_window(self, bot_name: str) -> Optional[WindowedSketch]:
+        pair = self._bots.get(bot_name)
+        return pair[1] if pair is not None else None
+
+    def to_state(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "window_minutes": self.window_minutes,
+            "total": self.total.to_state(),
+            "window": self.window.to_state(),
+            "bots": {name: [total.to_state(), window.to_state()] for name, (total, window) in self._bots.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "LatencyQuantiles":
+        lq = cls(float(state["relative_accuracy"]), int(state["window_minutes"]))
+        lq.total = QuantileSketch.from_state(state["total"])
+        lq.window = WindowedSketch.from_state(state["window"])
+        lq._bots = {
+            name: (QuantileSketch.from_state(total), WindowedSketch.from_state(window))
+            for name, (total, window) in state["bots"].items()
+        }
+        return lq
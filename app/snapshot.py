@@ -0,0 +1,205 @@
+"""Binary snapshots of ``DataStore`` for warm restarts.
+
+Layout::
+
+    b"PHXSNAP1" | u32 header length | JSON header | column blocks | state blob
+
+The JSON header records ring geometry, the offset/length/typecode of each
+raw ``array`` column, the state blob position and caller metadata (e.g.
+the tailer's file cursor). Column blocks are written with
+``array.tofile`` and restored from an ``mmap`` with one copy per column;
+the smaller derived state (string tables, KPI/bot/rollup/heatmap/sketch
+aggregates) is plain JSON from each class's ``to_state``, tagged with
+``STATE_VERSION``.
+
+A snapshot whose columns do not match its header is ignored. When only
+the aggregates cannot be used (another ``STATE_VERSION``, a different
+``max_events``, or state that fails to load), the buffered events are
+replayed instead, which rebuilds the aggregates from those events only.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from .data import BotIndex, DataStore, KpiAggregator
+from .eventbuffer import EventRing, StringTable
+from .heatmap import LatencyHeatmap
+from .rollups import RollupSet
+from .sketches import LatencyQuantiles
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PHXSNAP1"
+FORMAT_VERSION = 1
+# Bump whenever a ``to_state`` layout changes; older state is then replayed
+STATE_VERSION = 1
+
+_COLUMNS = ("ts_ms", "latency_ms", "success_rate", "profit", "tx", "bot", "error", "status")
+_AGGREGATES = {
+    "_kpis": KpiAggregator,
+    "bots": BotIndex,
+    "rollups": RollupSet,
+    "heatmap": LatencyHeatmap,
+    "quantiles": LatencyQuantiles,
+}
+_TABLES = ("bots", "errors", "statuses", "tx_hashes")
+
+
+def save_snapshot(store: DataStore, path: str | Path, meta: Optional[dict] = None) -> int:
+    """Write ``store`` to ``path`` atomically. Returns the number of bytes written."""
+    path = Path(path)
+    ring = store.events
+    state = json.dumps(
+        {
+            "version": STATE_VERSION,
+            "tables": {name: getattr(ring, name).to_state() for name in _TABLES},
+            "aggregates": {name: getattr(store, name).to_state() for name in _AGGREGATES},
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    columns = []
+    offset = 0
+    for name in _COLUMNS:
+        col: array = getattr(ring, name)
+        length = col.itemsize * len(col)
+        columns.append({"name": name, "typecode": col.typecode, "offset": offset, "length": length})
+        offset += length
+    header = {
+        "format": FORMAT_VERSION,
+        "created_ms": int(time.time() * 1000),
+        "maxlen": ring.maxlen,
+        "start_seq": ring.start_seq,
+        "next_seq": ring.next_seq,
+        "columns": columns,
+        "state": {"offset": offset, "length": len(state)},
+        "meta": meta or {},
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for name in _COLUMNS:
+            getattr(ring, name).tofile(f)
+        f.write(state)
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+def load_snapshot(store: DataStore, path: str | Path) -> Optional[dict]:
+    """Restore ``store`` from ``path``. Returns the snapshot's ``meta`` dict,
+    or ``None`` when there is no usable snapshot.
+
+    If the snapshot was taken with a different ``max_events``, or its
+    aggregates cannot be restored, the buffered events are replayed into
+    ``store`` instead.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    with path.open("rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                logger.warning("Ignoring %s: not a DataStore snapshot", path)
+                return None
+            (header_len,) = struct.unpack_from("<I", mm, len(MAGIC))
+            base = len(MAGIC) + 4
+            header = json.loads(mm[base:base + header_len])
+            if header.get("format") != FORMAT_VERSION:
+                logger.warning("Ignoring %s: unsupported snapshot format %s", path, header.get("format"))
+                return None
+            base += header_len
+            view = memoryview(mm)
+            try:
+                ring = _read_ring(header, view, base)
+                st = header["state"]
+                start = base + st["offset"]
+                if start + st["length"] > len(view):
+                    raise ValueError("state blob runs past the end of the file")
+                state = json.loads(bytes(view[start:start + st["length"]]))
+                for table in _TABLES:
+                    setattr(ring, table, StringTable.from_state(state["tables"][table]))
+                ring.validate()
+            except (KeyError, TypeError, ValueError) as exc:
+                logger.warning("Ignoring %s: %s", path, exc)
+                return None
+            finally:
+                view.release()
+
+    aggregates = None
+    if ring.maxlen != store.events.maxlen:
+        logger.info(
+            "Snapshot max_events=%d differs from configured %d; replaying buffered events",
+            ring.maxlen, store.events.maxlen,
+        )
+    elif state.get("version") != STATE_VERSION:
+        logger.info(
+            "Snapshot state version %s is not %d; replaying buffered events", state.get("version"), STATE_VERSION
+        )
+    else:
+        try:
+            aggregates = {name: cls.from_state(state["aggregates"][name]) for name, cls in _AGGREGATES.items()}
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.warning("Cannot restore snapshot aggregates (%s); replaying buffered events", exc)
+
+    if aggregates is not None:
+        store.events = ring
+        for name, value in aggregates.items():
+            if name == "heatmap" and value.edges != store.heatmap.edges:
+                continue  # heatmap rows were reconfigured; start that one fresh
+            setattr(store, name, value)
+    else:
+        event_log, store.event_log = store.event_log, None
+        try:
+            for i in ring.slots():
+                store.add_record(ring.record_at(i))
+        finally:
+            store.event_log = event_log
+    store.version += 1
+    return header.get("meta") or {}
+
+
+def _read_ring(header: dict, view: memoryview, base: int) -> EventRing:
+    """The header's ring with its columns copied out of ``view``, checked against the header."""
+    maxlen, start_seq, next_seq = header["maxlen"], header["start_seq"], header["next_seq"]
+    if not all(isinstance(v, int) for v in (maxlen, start_seq, next_seq)):
+        raise ValueError("ring geometry is not integral")
+    if maxlen <= 0 or not 0 <= start_seq <= next_seq <= start_seq + maxlen:
+        raise ValueError(f"bad ring geometry maxlen={maxlen} seqs=[{start_seq}, {next_seq})")
+    ring = EventRing(maxlen)
+    seen = set()
+    for col in header["columns"]:
+        name = col["name"]
+        if name not in _COLUMNS or name in seen:
+            raise ValueError(f"unexpected column {name!r}")
+        seen.add(name)
+        fresh = getattr(ring, name)
+        if col["typecode"] != fresh.typecode:
+            raise ValueError(f"column {name} has typecode {col['typecode']!r}, expected {fresh.typecode!r}")
+        if col["length"] != fresh.itemsize * maxlen:
+            raise ValueError(f"column {name} has {col['length']} bytes, expected {fresh.itemsize * maxlen}")
+        start = base + col["offset"]
+        if col["offset"] < 0 or start + col["length"] > len(view):
+            raise ValueError(f"column {name} runs past the end of the file")
+        arr = array(fresh.typecode)
+        arr.frombytes(view[start:start + col["length"]])
+        setattr(ring, name, arr)
+    if len(seen) != len(_COLUMNS):
+        raise ValueError(f"missing columns {sorted(set(_COLUMNS) - seen)}")
+    ring.start_seq = start_seq
+    ring.next_seq = next_seq
+    return ring
+
@@ -1,45 +1,281 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Optional
+import re
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional
+
+from starlette.responses import StreamingResponse
+
+HTML = "html"
+JSON = "json"
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+def encode_frame(event: str, data: str, id: Optional[int] = None) -> bytes:
+    """One complete SSE frame (``event``/``id``/``data`` lines), UTF-8 encoded."""
+    lines = [f"event: {event}"]
+    if id is not None:
+        lines.append(f"id: {id}")
+    lines.extend(f"data: {line}" for line in _LINE_BREAK.split(data))
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+
+
+PING_READY = encode_frame("ping", "ready")
+PING_KEEPALIVE = encode_frame("ping", "keepalive")
+
+
+class Subscription:
+    """A subscriber's position in the broker's replay ring."""
+
+    __slots__ = ("channel", "topics", "cursor", "resumed", "pending", "wakeup")
+
+    def __init__(self, channel: str, topics: Optional[frozenset[str]], cursor: int, resumed: bool = False) -> None:
+        self.channel = channel
+        self.topics = topics
+        self.cursor = cursor
+        # True when the cursor came from a client's Last-Event-ID
+        self.resumed = resumed
+        # Id of the oldest published frame this subscriber wants and has not read
+        self.pending: Optional[int] = None
+        self.wakeup = asyncio.Event()
+
+    def wants(self, channel: str, topic: str) -> bool:
+        return channel == self.channel and (self.topics is None or topic in self.topics)
 
 
 class SSEBroker:
     """In-memory pub/sub broker for SSE fans out messages to subscribers.
 
-    Subscribers receive JSON strings via their dedicated asyncio.Queue.
+    Each message is encoded once into an immutable SSE frame (``bytes``) and
+    stored in a single bounded replay ring, keyed by a broker-wide message
+    id. Subscribers hold only a cursor (the last id they consumed), so
+    memory is O(ring), not O(clients x backlog). A subscriber whose oldest
+    unread frame has fallen out of the ring is told it lagged (see ``read``)
+    and skips ahead instead of receiving an arbitrary subset of the deltas
+    it missed.
+
+    Each subscriber listens on one channel (``"html"`` fragments or ``"json"``
+    payloads) and optionally only to some topics. A frame's topic defaults
+    to its event name; per-bot frames use ``bot:<slug>``. Subscribers are
+    indexed by channel and topic and each has its own wakeup event, so a
+    publish only touches the subscribers that want it: O(interested), and a
+    bot page is never woken for another bot's traffic.
+
+    Ids double as SSE ``id:`` fields. They start from the wall clock in
+    microseconds, so they keep increasing across restarts, and a reconnect
+    carrying ``Last-Event-ID`` resumes from the ring when every frame since
+    that id is still there (see ``resumable``).
+
+    ``app.backplane`` hooks in to fan out across processes: ``taps`` see
+    every stored frame, ``on_change`` runs when subscribers come and go,
+    ``upstream`` takes over ``publish``, and ``relay`` stores a frame that
+    was numbered elsewhere.
     """
 
-    def __init__(self) -> None:
-        self._subscribers: set[asyncio.Queue[str]] = set()
-        self._lock = asyncio.Lock()
-
-    async def subscribe(self) -> asyncio.Queue[str]:
-        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=100)
-        async with self._lock:
-            self._subscribers.add(queue)
-        return queue
-
-    async def unsubscribe(self, queue: asyncio.Queue[str]) -> None:
-        async with self._lock:
-            self._subscribers.discard(queue)
-
-    async def publish(self, message: str) -> None:
-        async with self._lock:
-            subscribers = list(self._subscribers)
-        for q in subscribers:
-            try:
-                q.put_nowait(message)
-            except asyncio.QueueFull:
-                # drop for slow consumers
-                pass
-
-
-async def client_event_stream(request, broker: SSEBroker):
-    """SSE generator for a single client subscribing to the broker."""
-    queue = await broker.subscribe()
+    def __init__(self, ring_size: int = 512, first_id: Optional[int] = None) -> None:
+        self.ring_size = ring_size
+        self._ring: list[Optional[tuple[int, str, str, bytes]]] = [None] * ring_size
+        # channel -> subscribers without a topic filter
+        self._unfiltered: dict[str, set[Subscription]] = {}
+        # channel -> topic -> subscribers
+        self._by_topic: dict[str, dict[str, set[Subscription]]] = {}
+        self._counts: dict[str, int] = {}
+        self.first_id = time.time_ns() // 1000 if first_id is None else first_id
+        self.last_id = self.first_id
+        # Last id at which each channel, or (channel, topic), lost its final
+        # subscriber (everything starts empty); frames for an empty channel
+        # are not stored, and topic frames may not be built (see ``topics``).
+        self._vacated: dict = {}
+        self.taps: list[Callable[[int, str, str, bytes], None]] = []
+        self.on_change: Optional[Callable[[], None]] = None
+        self.upstream: Optional[Callable[[str, str, str], Awaitable[None]]] = None
+
+    def resumable(self, channel: str, last_event_id: int, topics: Optional[Iterable[str]] = None) -> bool:
+        """Whether every ``channel`` frame after ``last_event_id`` is still in the ring."""
+        if not (self.last_id - self.ring_size <= last_event_id <= self.last_id):
+            return False
+        keys = [channel] + [(channel, topic) for topic in topics or ()]
+        return all(self._vacated.get(key, self.first_id) < last_event_id for key in keys)
+
+    async def subscribe(
+        self,
+        channel: str = HTML,
+        topics: Optional[Iterable[str]] = None,
+        last_event_id: Optional[int] = None,
+    ) -> Subscription:
+        topics = frozenset(topics) if topics is not None else None
+        resumed = last_event_id is not None and self.resumable(channel, last_event_id, topics)
+        sub = Subscription(channel, topics, last_event_id if resumed else self.last_id, resumed)
+        if resumed and sub.cursor < self.last_id:
+            sub.pending = sub.cursor + 1
+            sub.wakeup.set()
+        if topics is None:
+            self._unfiltered.setdefault(channel, set()).add(sub)
+        else:
+            by_topic = self._by_topic.setdefault(channel, {})
+            for topic in topics:
+                by_topic.setdefault(topic, set()).add(sub)
+        self._counts[channel] = self._counts.get(channel, 0) + 1
+        if self.on_change is not None:
+            self.on_change()
+        return sub
+
+    async def unsubscribe(self, sub: Subscription) -> None:
+        channel = sub.channel
+        if sub.topics is None:
+            subs = self._unfiltered.get(channel)
+            if subs is None or sub not in subs:
+                return
+            subs.discard(sub)
+        else:
+            by_topic = self._by_topic.get(channel, {})
+            if not any(sub in by_topic.get(topic, ()) for topic in sub.topics):
+                return
+            for topic in sub.topics:
+                subs = by_topic.get(topic)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del by_topic[topic]
+                        self._vacated[(channel, topic)] = self.last_id
+        self._counts[channel] -= 1
+        if not self._counts[channel]:
+            del self._counts[channel]
+            self._vacated[channel] = self.last_id
+        if self.on_change is not None:
+            self.on_change()
+
+    def channels(self) -> set[str]:
+        """Channels that currently have at least one subscriber."""
+        return set(self._counts)
+
+    def topics(self, channel: str) -> set[str]:
+        """Topics that at least one subscriber of ``channel`` asked for by name."""
+        return set(self._by_topic.get(channel, ()))
+
+    def interest(self) -> dict[str, dict]:
+        """Per occupied channel: whether any subscriber is unfiltered, and the named topics."""
+        return {
+            channel: {"all": bool(self._unfiltered.get(channel)), "topics": sorted(self._by_topic.get(channel, ()))}
+            for channel in sorted(self._counts)
+        }
+
+    def rebase(self, last_id: int) -> None:
+        """Continue numbering from ``last_id`` (a new id source), dropping the ring.
+
+        Current subscribers are told they lagged, so they resync from a snapshot.
+        """
+        self._ring = [None] * self.ring_size
+        self._vacated.clear()
+        self.first_id = self.last_id = last_id
+        subs = {sub for group in self._unfiltered.values() for sub in group}
+        subs.update(sub for by_topic in self._by_topic.values() for group in by_topic.values() for sub in group)
+        for sub in subs:
+            sub.cursor, sub.pending = last_id, last_id - self.ring_size
+            sub.wakeup.set()
+
+    async def publish(self, message: str, event: str = "metrics_update", channel: str = HTML) -> None:
+        if self.upstream is not None:
+            await self.upstream(message, event, channel)
+            return
+        self.last_id += 1
+        # Stored for every topic while the channel has subscribers, so a
+        # resuming client's topics are complete too.
+        if channel in self._counts:
+            self._store(self.last_id, channel, event, encode_frame(event, message, self.last_id))
+
+    def relay(self, msg_id: int, channel: str, topic: str, frame: bytes) -> None:
+        """Store a frame already encoded and numbered by another broker (see ``app.backplane``)."""
+        if msg_id <= self.last_id:
+            return
+        self.last_id = msg_id
+        if channel in self._counts:
+            self._store(msg_id, channel, topic, frame)
+
+    def _store(self, msg_id: int, channel: str, topic: str, frame: bytes) -> None:
+        self._ring[msg_id % self.ring_size] = (msg_id, channel, topic, frame)
+        for tap in self.taps:
+            tap(msg_id, channel, topic, frame)
+        interested = (self._unfiltered.get(channel, ()), self._by_topic.get(channel, {}).get(topic, ()))
+        for subs in interested:
+            for sub in subs:
+                if sub.pending is None:
+                    sub.pending = msg_id
+                    sub.wakeup.set()
+
+    def read(self, sub: Subscription) -> tuple[list[bytes], bool]:
+        """Frames published for ``sub`` since its cursor, and whether it lagged.
+
+        A lagged subscriber's cursor jumps to the newest id with no frames;
+        the caller should resend a full snapshot.
+        """
+        last = self.last_id
+        first, sub.pending = sub.pending, None
+        sub.wakeup.clear()
+        sub.cursor = last
+        if first is None:
+            return [], False
+        if first <= last - self.ring_size:
+            return [], True
+        frames = []
+        for msg_id in range(first, last + 1):
+            entry = self._ring[msg_id % self.ring_size]
+            if entry is not None and entry[0] == msg_id and sub.wants(entry[1], entry[2]):
+                frames.append(entry[3])
+        return frames, False
+
+    async def wait(self, sub: Subscription, timeout: float) -> bool:
+        """Wait until something ``sub`` wants is published; False on timeout."""
+        if sub.pending is not None:
+            return True
+        try:
+            await asyncio.wait_for(sub.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class SSEResponse(StreamingResponse):
+    """``text/event-stream`` response that writes pre-encoded frames as-is."""
+
+    media_type = "text/event-stream"
+
+    def __init__(self, content: AsyncIterator[bytes], headers: Optional[dict] = None) -> None:
+        super().__init__(
+            content,
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(headers or {})},
+        )
+
+
+async def client_event_stream(
+    request,
+    broker: SSEBroker,
+    snapshot: Optional[Callable[[], str]] = None,
+    channel: str = HTML,
+    topics: Optional[Iterable[str]] = None,
+    last_event_id: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """SSE frame generator for a single client subscribing to the broker.
+
+    ``snapshot`` renders the full state (the metrics partial, or a JSON
+    object on the JSON channel); it is sent once right after subscribing as
+    ``metrics_update``/``snapshot``, and the broker's deltas (see
+    ``app.deltas``) apply on top of it, and again if the client falls too
+    far behind the broker's replay ring. Broker frames are yielded unchanged.
+
+    With ``last_event_id`` (from a reconnecting EventSource) the stream
+    replays exactly the missed frames instead, when the broker still has
+    them. Snapshots carry the id they are current as of, so a later
+    reconnect resumes from there.
+    """
+    sub = await broker.subscribe(channel, topics, last_event_id)
+    snapshot_event = "snapshot" if channel == JSON else "metrics_update"
     try:
-        yield {"event": "ping", "data": "ready"}
+        yield PING_READY
+        if snapshot is not None and not sub.resumed:
+            yield encode_frame(snapshot_event, snapshot(), sub.cursor)
         while True:
             if request is not None and hasattr(request, 'is_disconnected'):
                 try:
@@ -48,12 +284,14 @@ async def client_event_stream(request, broker: SSEBroker):
                 except Exception:
                     # Handle any errors checking disconnection
                     break
-            try:
-                msg = await asyncio.wait_for(queue.get(), timeout=15.0)
-                yield {"event": "metrics_update", "data": msg}
-            except asyncio.TimeoutError:
-                yield {"event": "ping", "data": "keepalive"}
+            if not await broker.wait(sub, timeout=15.0):
+                yield PING_KEEPALIVE
+                continue
+            frames, lagged = broker.read(sub)
+            if lagged and snapshot is not None:
+                # Fell out of the replay ring: resync from the current state
+                yield encode_frame(snapshot_event, snapshot(), sub.cursor)
+            for frame in frames:
+                yield frame
     finally:
-        await broker.unsubscribe(queue)
-
-
+        await broker.unsubscribe(sub)
@@ -0,0 +1,250 @@
+"""Follow a growing JSONL file, across log rotation, without blocking the loop.
+
+``JsonlTailer`` reads the file in large blocks with ``os.pread`` in a
+worker thread (a slow disk stalls the thread, not the event loop) and
+splits complete lines in bulk. Between reads it sleeps on a file watcher:
+inotify on the file's directory on Linux, so a write wakes it within
+milliseconds, else a fixed polling interval.
+
+Where ``os.pread`` is missing (Windows), the thread seeks and reads a
+file object it keeps open instead.
+
+Rotation is followed by inode. When the path names a different inode
+(logrotate's rename-and-create, or a replaced file), the old file is read
+to its end and the new one is then read from its start; a file that got
+shorter (``copytruncate``) is read again from the start.
+"""
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 1 << 20
+MAX_LINE_BYTES = 1 << 20
+
+# inotify(7) event bits
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Not on Windows; see JsonlTailer._read
+_pread = getattr(os, "pread", None)
+
+
+class PollWatcher:
+    """Fallback watcher: wakes every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 0.25) -> None:
+        self.interval = interval
+
+    async def wait(self, timeout: float) -> None:
+        await asyncio.sleep(min(timeout, self.interval))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Wakes when ``path`` is written, created, moved or deleted (Linux only).
+
+    The watch is on the parent directory, so it keeps working when the file
+    is rotated away and a new one takes its name.
+    """
+
+    def __init__(self, path: Path) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(path.parent), _WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, f"inotify_add_watch failed for {path.parent}")
+        self.name = os.fsencode(path.name)
+        self._fd = fd
+        self._changed = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(fd, self._on_readable)
+
+    def _on_readable(self) -> None:
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(buf):
+            _, mask, _, name_len = _EVENT_HEADER.unpack_from(buf, pos)
+            pos += _EVENT_HEADER.size
+            name = buf[pos:pos + name_len].rstrip(b"\0")
+            pos += name_len
+            # Other files in the directory are ignored
+            if name == self.name or mask & _IN_Q_OVERFLOW:
+                self._changed.set()
+
+    async def wait(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._changed.clear()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+
+def watch(path: Path, poll_interval: float = 0.25):
+    """An ``InotifyWatcher`` for ``path`` where possible, else a ``PollWatcher``."""
+    try:
+        return InotifyWatcher(path)
+    except (OSError, AttributeError) as e:
+        # AttributeError: a libc without inotify_init1
+        logger.info("Polling %s every %.2fs (%s)", path, poll_interval, e)
+        return PollWatcher(poll_interval)
+
+
+class JsonlTailer:
+    """Complete lines appended to ``path``, read in blocks off the event loop.
+
+    ``cursor`` (if given) is kept up to date with ``path``, ``inode`` and the
+    byte ``offset`` of the last complete line returned; when it already
+    describes the same file, reading resumes there (see ``app.snapshot``).
+    Otherwise the file is read from its end, or from its start with
+    ``from_start`` or when it did not exist yet.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        cursor: Optional[dict] = None,
+        from_start: bool = False,
+        block_size: int = BLOCK_SIZE,
+        watcher=None,
+    ) -> None:
+        self.path = Path(path)
+        self.cursor = cursor
+        self.from_start = from_start
+        self.block_size = block_size
+        self.watcher = watcher
+        self.rotations = 0
+        self._file = None
+        self._inode: Optional[int] = None
+        # Next byte to read, and where the line in ``_pending`` starts
+        self._pos = 0
+        self._line_start = 0
+        self._pending = b""
+        self._oversized = False
+        self._opened_once = False
+
+    async def read_lines(self) -> list[bytes]:
+        """Complete lines available now (``[]`` when caught up), at most one block's worth."""
+        lines = await asyncio.to_thread(self._read)
+        if self.cursor is not None and self._inode is not None:
+            self.cursor.update(path=str(self.path), inode=self._inode, offset=self._line_start)
+        return lines
+
+    async def wait(self, timeout: float) -> None:
+        """Sleep until the file may have changed, at most ``timeout`` seconds."""
+        if self.watcher is None:
+            self.watcher = watch(self.path)
+        await self.watcher.wait(timeout)
+
+    def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.close()
+        self._close_file()
+
+    # Everything below runs in a worker thread, one call at a time
+
+    def _read(self) -> list[bytes]:
+        if self._file is None and not self._open():
+            return []
+        if _pread is not None:
+            data = _pread(self._file.fileno(), self.block_size, self._pos)
+        else:
+            self._file.seek(self._pos)
+            data = self._file.read(self.block_size)
+        if data:
+            self._pos += len(data)
+            return self._split(data)
+        # At the end of the file: has it been rotated or truncated?
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            # Renamed away and not recreated yet; the old file may still grow
+            return []
+        if st.st_ino != self._inode:
+            # Old file fully read; its unterminated last line is complete now
+            tail = [self._pending] if self._pending and not self._oversized else []
+            self._close_file()
+            self.rotations += 1
+            if not self._open():
+                return tail
+            return tail + self._read()
+        if os.fstat(self._file.fileno()).st_size < self._pos:
+            self._pos = self._line_start = 0
+            self._pending, self._oversized = b"", False
+            self.rotations += 1
+            return self._read()
+        return []
+
+    def _open(self) -> bool:
+        try:
+            f = open(self.path, "rb", buffering=0)
+        except FileNotFoundError:
+            # Appears later: then everything in it is new
+            self._opened_once = True
+            return False
+        st = os.fstat(f.fileno())
+        pos = 0
+        if not self._opened_once:
+            cursor = self.cursor or {}
+            offset = cursor.get("offset")
+            if cursor.get("path") == str(self.path) and cursor.get("inode") == st.st_ino \
+                    and isinstance(offset, int) and 0 <= offset <= st.st_size:
+                pos = offset
+            elif not self.from_start:
+                pos = st.st_size
+        self._opened_once = True
+        self._file, self._inode, self._pos, self._line_start = f, st.st_ino, pos, pos
+        self._pending, self._oversized = b"", False
+        return True
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _split(self, data: bytes) -> list[bytes]:
+        lines = data.split(b"\n")
+        lines[0] = self._pending + lines[0]
+        self._pending = lines.pop()
+        if lines:
+            # The pending line starts right after the last newline in ``data``
+            self._line_start = self._pos - len(data) + data.rfind(b"\n") + 1
+        if self._oversized and lines:
+            # Rest of a line that was already too long
+            lines.pop(0)
+            self._oversized = False
+        if len(self._pending) > MAX_LINE_BYTES:
+            self._pending, self._oversized = b"", True
+        return lines
@@ -35,7 +35,6 @@ a = Analysis(
         'uvicorn',
         'fastapi',
         'jinja2',
-        'sse_starlette',
         'web3',
         'dotenv',
     ],
@@ -36,8 +36,6 @@ hiddenimports = [
     'fastapi.middleware',
     'fastapi.middleware.cors',
     'jinja2',
-    'sse_starlette',
-    'sse_starlette.sse',
     'app',
     'app.main',
     'app.sse',
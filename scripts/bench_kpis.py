@@ -0,0 +1,94 @@
+"""Compare DataStore.kpis() against the previous full-scan implementation.
+
+Usage:
+    python scripts/bench_kpis.py --events 1000000 --calls 200
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.data import DataStore  # noqa: E402
+from app.models import MetricsEvent  # noqa: E402
+
+
+def scan_kpis(events) -> dict:
+    """The pre-aggregation kpis(): copy the deque and rescan every event."""
+    items = list(events)
+    if not items:
+        return {"avg_latency_ms": 0, "success_rate_pct": 0.0, "throughput_1m": 0, "avg_profit": 0.0}
+    avg_latency = sum(e.latency_ms for e in items) / len(items)
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    cutoff = now_ms - 60_000
+    last_minute = [e for e in items if int(e.timestamp.timestamp() * 1000) >= cutoff]
+    if last_minute:
+        successes = sum(1 for _e in last_minute if (_e.error is None))
+        success_rate = round(successes * 100.0 / len(last_minute), 2)
+    else:
+        success_rate = 0.0
+    avg_profit = 0.0
+    profits = [e.profit for e in items if isinstance(e.profit, (int, float))]
+    if profits:
+        avg_profit = round(sum(profits) / len(profits), 2)
+    return {
+        "avg_latency_ms": int(avg_latency),
+        "success_rate_pct": success_rate,
+        "throughput_1m": len(last_minute),
+        "avg_profit": avg_profit,
+    }
+
+
+def fill(store: DataStore, n: int) -> None:
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(seconds=n * 0.01)
+    for i in range(n):
+        store.add(MetricsEvent.model_construct(
+            timestamp=start + timedelta(seconds=i * 0.01),
+            bot_name="bench-bot",
+            latency_ms=random.randint(40, 450),
+            success_rate=0.0,
+            tx_hash="",
+            error=None if random.random() > 0.1 else "critical",
+            status="ok",
+            profit=round(random.uniform(-0.01, 0.05), 4),
+        ))
+
+
+def time_calls(fn, calls: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t0) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--calls", type=int, default=100)
+    args = parser.parse_args()
+
+    store = DataStore(max_events=args.events)
+    t0 = time.perf_counter()
+    # Fill past capacity so the eviction path is exercised too.
+    fill(store, args.events + args.events // 10)
+    print(f"filled {len(store.events):,} events in {time.perf_counter() - t0:.2f}s")
+
+    fast = store.kpis()
+    slow = scan_kpis(store.events)
+    print(f"incremental: {fast}")
+    print(f"scan:        {slow}")
+
+    inc = time_calls(store.kpis, args.calls)
+    scan = time_calls(lambda: scan_kpis(store.events), max(1, args.calls // 20))
+    print(f"kpis() incremental: {inc * 1e6:10.1f} us/call")
+    print(f"kpis() full scan:   {scan * 1e6:10.1f} us/call  ({scan / inc:,.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
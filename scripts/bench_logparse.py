@@ -0,0 +1,127 @@
+"""Compare parse_bot_log_to_record() against the previous per-pattern parser.
+
+The sample bot logs are repeated to ``--lines`` lines (with fresh tx hashes
+so the input is not all identical); both parsers must agree on every line.
+
+Usage:
+    python scripts/bench_logparse.py --lines 200000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.data import _shorten_tx_hash, parse_bot_log_to_record  # noqa: E402
+from app.eventbuffer import EventRecord  # noqa: E402
+
+SAMPLE = ROOT / "static" / "data" / "sample_logs.json"
+
+
+def legacy_parse(log_obj: dict) -> EventRecord | None:
+    """The pre-classifier parser: uncompiled patterns and repeated lower()."""
+    import re
+
+    if isinstance(log_obj.get("timestamp"), str):
+        ts = datetime.fromisoformat(log_obj["timestamp"].replace("Z", "+00:00"))
+    elif isinstance(log_obj.get("time"), str):
+        ts = datetime.fromisoformat(log_obj["time"].replace("Z", "+00:00"))
+    else:
+        ts = datetime.now(timezone.utc)
+    message = str(log_obj.get("message", ""))
+    level = log_obj.get("level", 20)
+    tx_hash = ""
+    tx_matches = re.findall(r'0x[a-fA-F0-9]{64}', message)
+    if tx_matches:
+        tx_hash = _shorten_tx_hash(tx_matches[-1])
+    latency_ms = 0
+    latency_match = re.search(r'(\d+\.?\d*)\s*s\s*\(', message)
+    if latency_match:
+        latency_ms = int(float(latency_match.group(1)) * 1000)
+    bot_name = "bot"
+    if "price[" in message.lower():
+        bot_name = "price-bot"
+    elif "rsi[" in message.lower():
+        bot_name = "rsi-bot"
+    elif "trade" in message.lower() or "perform_trade" in message.lower():
+        bot_name = "trading-bot"
+    elif "amount_to_sell" in message.lower():
+        bot_name = "strategy-bot"
+    status = "ok"
+    error = None
+    if level >= 40:
+        status = "critical"
+        error = message[:100]
+    elif level == 30:
+        status = "warning"
+        if "rate-limited" in message.lower():
+            error = "Rate limited"
+    profit = None
+    fee_match = re.search(r'total fees paid\s*=\s*(\d+)', message)
+    if fee_match:
+        fees = int(fee_match.group(1))
+        profit = -float(fees) / 1e18 if fees > 0 else None
+    if tx_hash or latency_ms > 0 or "Confirmed" in message or "Submitted" in message:
+        return EventRecord(
+            ts_ms=int(ts.timestamp() * 1000), bot_name=bot_name, latency_ms=latency_ms,
+            success_rate=100.0 if status == "ok" else 0.0, tx_hash=tx_hash,
+            error=error, status=status, profit=profit,
+        )
+    return None
+
+
+def scaled_logs(lines: int) -> list[dict]:
+    sample = json.loads(SAMPLE.read_text(encoding="utf-8"))
+    rng = random.Random(7)
+    logs = []
+    while len(logs) < lines:
+        for obj in sample:
+            obj = dict(obj)
+            message = obj.get("message", "")
+            if "0x" in message:
+                # Swap 64-hex hashes for fresh ones; addresses stay as they are
+                words = message.split("0x")
+                for i in range(1, len(words)):
+                    head = words[i][:64]
+                    if len(head) == 64 and all(c in "0123456789abcdefABCDEF" for c in head):
+                        words[i] = f"{rng.getrandbits(256):064x}" + words[i][64:]
+                obj["message"] = "0x".join(words)
+            logs.append(obj)
+    return logs[:lines]
+
+
+def run(parse, logs: list[dict]) -> tuple[float, list]:
+    t0 = time.perf_counter()
+    out = [parse(obj) for obj in logs]
+    return time.perf_counter() - t0, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    logs = scaled_logs(args.lines)
+    _, before = run(legacy_parse, logs)
+    _, after = run(parse_bot_log_to_record, logs)
+    mismatches = sum(1 for a, b in zip(before, after) if a != b)
+    print(f"{len(logs):,} lines, {sum(r is not None for r in after):,} records, {mismatches} mismatches")
+
+    old = min(run(legacy_parse, logs)[0] for _ in range(args.repeat))
+    new = min(run(parse_bot_log_to_record, logs)[0] for _ in range(args.repeat))
+    print(f"before (per-pattern): {len(logs) / old:12,.0f} lines/s")
+    print(f"after  (classifier):  {len(logs) / new:12,.0f} lines/s  ({old / new:.2f}x)")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
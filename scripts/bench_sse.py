@@ -0,0 +1,350 @@
+"""Load-test SSE fan-out: delivery latency, drops, and server CPU/RSS per 1k clients.
+
+Starts a server process that serves ``/stream`` through ``SSEBroker`` and
+``client_event_stream`` and publishes a timestamped frame ``--rate`` times a
+second, then opens ``--clients`` EventSource-style connections from a client
+process pool (``--client-procs``) and records publish-to-receive latency
+for ``--duration`` seconds. Results are printed and written as JSON
+(``--out``) so runs can be compared (``--compare previous.json``).
+
+Usage:
+    python scripts/bench_sse.py --clients 2000 --rate 20 --duration 15
+    python scripts/bench_sse.py --clients 2000 --compare bench-results/sse-old.json
+
+Linux only for the CPU/RSS figures (read from ``/proc``).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.sse import SSEBroker, SSEResponse, client_event_stream  # noqa: E402
+
+EVENT = "bench"
+GRACE_S = 1.0
+
+
+# Server -----------------------------------------------------------------------
+
+def serve(port: int, rate: float, payload: int, ring_size: int) -> None:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.routing import Route
+
+    broker = SSEBroker(ring_size=ring_size)
+    padding = "x" * payload
+
+    async def stream(request):
+        return SSEResponse(client_event_stream(request, broker, snapshot=lambda: "snapshot"))
+
+    async def publish_forever() -> None:
+        seq = 0
+        interval = 1.0 / rate
+        next_at = time.perf_counter()
+        while True:
+            seq += 1
+            await broker.publish(f"{seq} {time.time_ns()} {padding}", event=EVENT)
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+    async def start_publisher() -> None:
+        asyncio.get_running_loop().create_task(publish_forever())
+
+    app = Starlette(routes=[Route("/stream", stream)], on_startup=[start_publisher])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+# Clients ----------------------------------------------------------------------
+
+class Client:
+    __slots__ = ("latencies_ns", "received", "drops", "resyncs", "last_seq", "error")
+
+    def __init__(self) -> None:
+        self.latencies_ns: list[int] = []
+        self.received = 0
+        self.drops = 0
+        self.resyncs = 0
+        self.last_seq: Optional[int] = None
+        self.error: Optional[str] = None
+
+
+async def run_client(client: Client, port: int, window: list, stop: asyncio.Event) -> None:
+    """One EventSource: GET /stream, de-chunk, parse frames until ``stop``."""
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    except OSError as exc:
+        client.error = str(exc)
+        return
+    writer.write(b"GET /stream HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+    try:
+        headers = await reader.readuntil(b"\r\n\r\n")
+        chunked = b"chunked" in headers.lower()
+        buffer = b""
+        snapshots = 0
+        while not stop.is_set():
+            if chunked:
+                size = int((await reader.readline()).strip(), 16)
+                data = await reader.readexactly(size + 2)
+                buffer += data[:-2]
+            else:
+                buffer += await reader.read(65536)
+            now = time.time_ns()
+            *frames, buffer = buffer.split(b"\r\n\r\n")
+            for frame in frames:
+                event, data = None, None
+                for line in frame.split(b"\r\n"):
+                    if line.startswith(b"event: "):
+                        event = line[7:]
+                    elif line.startswith(b"data: "):
+                        data = line[6:]
+                if event == b"metrics_update":
+                    snapshots += 1
+                    if snapshots > 1:
+                        client.resyncs += 1  # lagged out of the replay ring
+                        client.last_seq = None
+                elif event == EVENT.encode() and data is not None:
+                    seq, sent_ns, _ = data.split(b" ", 2)
+                    seq = int(seq)
+                    if client.last_seq is not None and seq > client.last_seq + 1:
+                        client.drops += seq - client.last_seq - 1
+                    client.last_seq = seq
+                    sent_ns = int(sent_ns)
+                    if window[0] <= sent_ns < window[1]:
+                        client.received += 1
+                        client.latencies_ns.append(now - sent_ns)
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError) as exc:
+        if not stop.is_set():
+            client.error = repr(exc)
+    finally:
+        writer.close()
+
+
+# Measurement ------------------------------------------------------------------
+
+def proc_usage(pid: int) -> Optional[tuple[float, int]]:
+    """(cpu seconds, rss bytes) of ``pid`` from /proc, or None off Linux."""
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        return cpu, rss
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def percentile(sorted_values: list[int], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    i = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return round(sorted_values[i] / 1e6, 3)
+
+
+def raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run_clients(port: int, count: int, connect_batch: int, window: list) -> dict:
+    """Client-process side: hold ``count`` connections until the window closes."""
+    stop = asyncio.Event()
+    clients = [Client() for _ in range(count)]
+    tasks = []
+    t0 = time.perf_counter()
+    for start in range(0, count, connect_batch):
+        batch = clients[start:start + connect_batch]
+        tasks += [asyncio.create_task(run_client(c, port, window, stop)) for c in batch]
+        await asyncio.sleep(0.05)
+    connect_s = time.perf_counter() - t0
+    # Frames published at the end of the window still need to arrive
+    await asyncio.sleep(max(0.0, (window[1] - time.time_ns()) / 1e9) + GRACE_S)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        "connected": sum(1 for c in clients if c.error is None),
+        "connect_s": connect_s,
+        "received": sum(c.received for c in clients),
+        "drops": sum(c.drops for c in clients),
+        "resyncs": sum(c.resyncs for c in clients),
+        "latencies_ns": [ns for c in clients for ns in c.latencies_ns],
+    }
+
+
+async def bench(args: argparse.Namespace) -> dict:
+    port = args.port or free_port()
+    server = subprocess.Popen([
+        sys.executable, __file__, "--serve", "--port", str(port), "--rate", str(args.rate),
+        "--payload", str(args.payload), "--ring-size", str(args.ring_size),
+    ])
+    try:
+        await wait_for_port(port)
+        idle = proc_usage(server.pid)
+        # Clients run in their own processes so the harness is not the bottleneck
+        procs = max(1, min(args.client_procs, args.clients))
+        connect_allowance = args.clients / procs / args.connect_batch * 0.05 + 1.0
+        window_start = time.time_ns() + int((connect_allowance + args.warmup) * 1e9)
+        window_end = window_start + int(args.duration * 1e9)
+        workers = []
+        for i in range(procs):
+            count = args.clients // procs + (1 if i < args.clients % procs else 0)
+            workers.append(await asyncio.create_subprocess_exec(
+                sys.executable, __file__, "--client-worker", "--port", str(port),
+                "--clients", str(count), "--connect-batch", str(args.connect_batch),
+                "--window", str(window_start), str(window_end),
+                stdout=asyncio.subprocess.PIPE,
+            ))
+        await asyncio.sleep(max(0.0, (window_start - time.time_ns()) / 1e9))
+        before = proc_usage(server.pid)
+        await asyncio.sleep(max(0.0, (window_end - time.time_ns()) / 1e9))
+        after = proc_usage(server.pid)
+        parts = [json.loads((await w.communicate())[0]) for w in workers]
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    latencies = sorted(ns for part in parts for ns in part["latencies_ns"])
+    connected = sum(part["connected"] for part in parts)
+    publishes = int(args.duration * args.rate)
+    expected = publishes * connected
+    delivered = sum(part["received"] for part in parts)
+    drops = sum(part["drops"] for part in parts)
+    result: dict = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "clients": args.clients, "rate_hz": args.rate, "duration_s": args.duration,
+            "payload_bytes": args.payload, "ring_size": args.ring_size, "client_procs": procs,
+        },
+        "connected": connected,
+        "errors": args.clients - connected,
+        "connect_s": round(max(part["connect_s"] for part in parts), 3),
+        "publishes": publishes,
+        "expected": expected,
+        "delivered": delivered,
+        "drops": drops,
+        "resyncs": sum(part["resyncs"] for part in parts),
+        # Published in the window but not received within GRACE_S of its end
+        "late": max(0, expected - delivered - drops),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": round(latencies[-1] / 1e6, 3) if latencies else None,
+        },
+        "server": None,
+    }
+    if idle and before and after:
+        per_k = max(connected, 1) / 1000
+        cpu_pct = (after[0] - before[0]) / args.duration * 100
+        rss_clients = after[1] - idle[1]
+        result["server"] = {
+            "cpu_pct": round(cpu_pct, 1),
+            "cpu_pct_per_1k": round(cpu_pct / per_k, 1),
+            "rss_mb": round(after[1] / 2**20, 1),
+            "rss_mb_per_1k": round(rss_clients / 2**20 / per_k, 2),
+        }
+    return result
+
+
+def report(result: dict, baseline: Optional[dict]) -> None:
+    def line(label: str, key: tuple, unit: str = "") -> None:
+        value = result
+        old = baseline
+        for k in key:
+            value = value.get(k) if isinstance(value, dict) else None
+            old = old.get(k) if isinstance(old, dict) else None
+        text = f"{label:<22}{value if value is not None else '-'!s:>12}{unit}"
+        if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            text += f"   (was {old}{unit}, {100 * (value - old) / old:+.1f}%)"
+        print(text)
+
+    print(f"clients {result['connected']}/{result['config']['clients']} connected in {result['connect_s']}s, "
+          f"{result['config']['rate_hz']} publishes/s for {result['config']['duration_s']}s")
+    line("delivered", ("delivered",))
+    line("expected", ("expected",))
+    line("drops", ("drops",))
+    line("late", ("late",))
+    line("resyncs", ("resyncs",))
+    line("latency p50", ("latency_ms", "p50"), " ms")
+    line("latency p99", ("latency_ms", "p99"), " ms")
+    line("server cpu", ("server", "cpu_pct"), " %")
+    line("server cpu / 1k", ("server", "cpu_pct_per_1k"), " %")
+    line("server rss", ("server", "rss_mb"), " MB")
+    line("server rss / 1k", ("server", "rss_mb_per_1k"), " MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=10.0, help="publishes per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--payload", type=int, default=512, help="padding bytes per frame")
+    parser.add_argument("--ring-size", type=int, default=512)
+    parser.add_argument("--connect-batch", type=int, default=200)
+    parser.add_argument("--client-procs", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)))
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=None,
+                        help="result file (default: bench-results/sse-<clients>c-<rate>hz-<time>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="earlier result file to diff against")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--client-worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--window", type=int, nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    if args.serve:
+        serve(args.port, args.rate, args.payload, args.ring_size)
+        return
+    if args.client_worker:
+        summary = asyncio.run(run_clients(args.port, args.clients, args.connect_batch, args.window))
+        json.dump(summary, sys.stdout)
+        return
+
+    result = asyncio.run(bench(args))
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    report(result, baseline)
+    out = args.out or Path("bench-results") / (
+        f"sse-{args.clients}c-{args.rate:g}hz-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2) + "\n")
+    print(f"wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
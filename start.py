@@ -71,7 +71,6 @@ def ensure_deps_in_venv(py: Path) -> None:
         "fastapi",
         "uvicorn[standard]",
         "jinja2",
-        "sse-starlette",
         "python-multipart",
     ]
     print("[start] Upgrading pip ...")
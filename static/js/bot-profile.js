@@ -15,7 +15,7 @@ function botProfileState() {
     theme: localStorage.getItem('phoenix:theme') || 'dark',
     showCommandPalette: false,
     commandInput: '',
-    connectionStatus: 'connected',
+    connectionStatus: 'disconnected',
     
     init() {
       this.loadBot();
@@ -23,15 +23,57 @@ function botProfileState() {
       this.loadInsights();
       this.initChart();
       this.applyTheme();
+      this.connectStream();
       
       setInterval(() => {
-        this.loadBot();
-        this.loadTransactions();
+        // Live stats and transactions arrive over the stream; poll only without it
+        if (this.connectionStatus !== 'connected') {
+          this.loadBot();
+          this.loadTransactions();
+        }
         this.loadInsights();
         this.lastUpdated = new Date().toLocaleTimeString();
       }, 5000);
     },
     
+    connectStream() {
+      // Subscribes to this bot's topic only: the server sends nothing for other bots
+      const topic = `bot:${this.botId}`;
+      const source = new EventSource(`/stream?format=json&topics=${encodeURIComponent(topic)}`);
+      source.onopen = () => { this.connectionStatus = 'connected'; };
+      source.onerror = () => { this.connectionStatus = 'disconnected'; };
+      source.addEventListener('snapshot', (e) => {
+        const payload = JSON.parse(e.data).bots?.[this.botId];
+        if (payload) {
+          this.recentTransactions = [];
+          this.applyBotUpdate(payload);
+        }
+      });
+      source.addEventListener(topic, (e) => this.applyBotUpdate(JSON.parse(e.data)));
+    },
+    
+    applyBotUpdate(payload) {
+      const stats = payload.bot;
+      this.bot = {
+        ...this.bot,
+        id: this.botId,
+        name: stats.bot_name,
+        status: this.determineStatus(stats),
+        avg_latency: stats.latency_ms || 0,
+        success_rate: stats.success_ratio || 0,
+        uptime: this.calculateUptime(stats.last_ts)
+      };
+      const incoming = payload.events.slice().reverse().map(e => ({
+        hash: e.tx || 'N/A',
+        time: new Date(e.ts).toLocaleTimeString(),
+        status: e.error ? 'failed' : 'success',
+        latency: e.latency_ms || 0,
+        profit: e.profit
+      }));
+      this.recentTransactions = incoming.concat(this.recentTransactions).slice(0, 10);
+      this.lastUpdated = new Date().toLocaleTimeString();
+    },
+    
     toggleTheme() {
       this.theme = this.theme === 'dark' ? 'light' : 'dark';
       localStorage.setItem('phoenix:theme', this.theme);
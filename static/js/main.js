@@ -871,6 +871,69 @@
     }
   }
 
+  // SSE deltas (see app/deltas.py). metrics_series is JSON merged into the chart
+  // card's data-* attributes; points at or below the card's data-seq are already shown.
+  function mergeSeriesDelta(delta){
+    const panel = document.getElementById('metrics-panel');
+    const card = panel && panel.querySelector('.card[data-latency-labels]');
+    if (!card) return;
+    const read = (key) => JSON.parse(card.dataset[key] || '[]');
+    const write = (key, arr, max) => { card.dataset[key] = JSON.stringify(max ? arr.slice(-max) : arr); };
+    const seenSeq = parseInt(card.dataset.seq || '-1', 10);
+    const fresh = (part) => part ? part.seqs.map((s, i) => s > seenSeq ? i : -1).filter(i => i >= 0) : [];
+
+    const lat = fresh(delta.latency);
+    if (lat.length){
+      write('latencyLabels', read('latencyLabels').concat(lat.map(i => delta.latency.labels[i])), 50);
+      write('latencyValues', read('latencyValues').concat(lat.map(i => delta.latency.values[i])), 50);
+    }
+    if (delta.profit){
+      // Absolute values for the whole window, as rendered by the server
+      write('profitLabels', delta.profit.labels);
+      write('profitValues', delta.profit.values);
+    }
+    if (delta.throughput){
+      const labels = read('throughputLabels');
+      const values = read('throughputValues');
+      delta.throughput.labels.forEach((label, i) => {
+        const at = labels.lastIndexOf(label);
+        if (at >= 0) { values[at] = delta.throughput.values[i]; }
+        else { labels.push(label); values.push(delta.throughput.values[i]); }
+      });
+      write('throughputLabels', labels, 30);
+      write('throughputValues', values, 30);
+    }
+    if (delta.heatmap){
+      card.dataset.heatCells = JSON.stringify(delta.heatmap.cells);
+      card.dataset.heatCols = String(delta.heatmap.cols);
+    }
+    if (delta.sensors){
+      write('sensorLabels', delta.sensors.sensor_labels || []);
+      write('sensorTempValues', delta.sensors.sensor_temp_values || []);
+      write('sensorHumidityValues', delta.sensors.sensor_humidity_values || []);
+    }
+    card.dataset.seq = String(Math.max(seenSeq, delta.seq));
+    buildOrUpdateChartsFromPartial(panel);
+  }
+
+  document.body.addEventListener('htmx:sseBeforeMessage', function(e){
+    if (e.detail && e.detail.type === 'metrics_series'){
+      e.preventDefault();  // JSON, not HTML: skip the htmx swap
+      try { mergeSeriesDelta(JSON.parse(e.detail.data)); }
+      catch (err) { console.warn('[SSE] Bad metrics_series delta', err); }
+    }
+  });
+
+  document.body.addEventListener('htmx:sseMessage', function(e){
+    if (!e.detail || e.detail.type !== 'metrics_rows') return;
+    // New rows were prepended; drop duplicates (a delta can overlap the connect snapshot) and cap at 25
+    const seen = new Set();
+    e.target.querySelectorAll('tr[data-seq]').forEach((row) => {
+      if (seen.has(row.dataset.seq) || seen.size >= 25) row.remove();
+      else seen.add(row.dataset.seq);
+    });
+  });
+
   document.body.addEventListener('htmx:afterSwap', function(e){
     if (e && e.target && e.target.id === 'metrics-panel'){
       buildOrUpdateChartsFromPartial(e.target);
@@ -0,0 +1,154 @@
+"""Backplane hub/relay tests over a real Unix socket."""
+import asyncio
+import json
+
+import pytest
+
+from app.backplane import (
+    APPEND, HELLO, BackplaneHub, BackplaneRelay, pack, pack_frame, read_message, unpack_frame,
+)
+from app.data import DataStore
+from app.eventbuffer import EventRecord
+from app.publisher import PublishScheduler
+from app.render_cache import MetricsRenderCache
+from app.sse import SSEBroker
+from tests.test_data import make_event
+
+
+def render(name, ctx):
+    return str(ctx["kpis"]["throughput_1m"])
+
+
+def test_frame_roundtrip():
+    assert unpack_frame(pack_frame(7, "json", "bot:a b", b"x\r\n")[5:]) == (7, "json", "bot:a b", b"x\r\n")
+
+
+async def eventually(check, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not check():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_worker_relays_hub_frames_and_replicates_store(tmp_path):
+    async def run():
+        path = str(tmp_path / "hub.sock")
+        hub_broker, hub_store = SSEBroker(), DataStore(max_events=4)
+        for _ in range(6):
+            hub_store.add(make_event())
+        scheduler = PublishScheduler(hub_broker, hub_store, MetricsRenderCache(render), frame_interval=0)
+        hub = BackplaneHub(path, hub_broker, hub_store, scheduler)
+        await hub.start()
+
+        broker, store = SSEBroker(), DataStore(max_events=4)
+        relay = BackplaneRelay(path, broker, store, MetricsRenderCache(render), retry=0.01)
+        task = asyncio.create_task(relay.run())
+        await eventually(lambda: relay.connected)
+        # Replica keeps the hub's sequence numbers
+        assert (store.events.start_seq, store.events.next_seq) == (2, 6)
+
+        sub = await broker.subscribe()
+        await eventually(lambda: hub_broker.channels() == {"html"})
+        hub_store.add(make_event(error="critical: boom"))
+        await scheduler.flush()
+        await eventually(lambda: sub.pending is not None)
+        frames, lagged = broker.read(sub)
+        assert not lagged and frames[0].startswith(f"event: metrics_update\r\nid: {hub_broker.last_id}\r\n".encode())
+        assert store.events.next_seq == 7 and store.kpis() == hub_store.kpis()
+
+        # Events ingested on a worker are stored by the hub and replicated back
+        await relay.ingest([EventRecord.from_event(make_event(latency_ms=321))])
+        await eventually(lambda: store.events.next_seq == 8)
+        assert hub_store.events.next_seq == 8
+        await broker.unsubscribe(sub)
+        await eventually(lambda: hub_broker.channels() == set())
+
+        task.cancel()
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_hub_coalesces_worker_batches_and_skips_bad_messages(tmp_path):
+    async def run():
+        path = str(tmp_path / "hub.sock")
+        hub_broker, hub_store = SSEBroker(), DataStore(max_events=50)
+        scheduler = PublishScheduler(hub_broker, hub_store, MetricsRenderCache(render), frame_interval=0.2)
+        hub = BackplaneHub(path, hub_broker, hub_store, scheduler)
+        await hub.start()
+        relay = BackplaneRelay(path, SSEBroker(), DataStore(max_events=50), MetricsRenderCache(render), retry=0.01)
+        task = asyncio.create_task(relay.run())
+        await eventually(lambda: relay.connected)
+
+        relay._send(pack(APPEND, b"{not json"))
+        for i in range(10):
+            await relay.ingest([EventRecord.from_event(make_event(latency_ms=i + 1))])
+        await eventually(lambda: hub_store.events.next_seq == 10)
+        # One publish for the first batch; the rest wait for the frame timer
+        assert scheduler.publishes == 1 and relay.connected
+        await eventually(lambda: scheduler.publishes == 2 and not scheduler.dirty)
+
+        task.cancel()
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_relay_ingest_fails_on_a_closing_connection(tmp_path):
+    async def run():
+        path = str(tmp_path / "hub.sock")
+        hub_broker, hub_store = SSEBroker(), DataStore(max_events=50)
+        scheduler = PublishScheduler(hub_broker, hub_store, MetricsRenderCache(render), frame_interval=0)
+        hub = BackplaneHub(path, hub_broker, hub_store, scheduler)
+        await hub.start()
+        relay = BackplaneRelay(path, SSEBroker(), DataStore(max_events=50), MetricsRenderCache(render), retry=10)
+        task = asyncio.create_task(relay.run())
+        await eventually(lambda: relay.connected)
+
+        # Half-dead: closed locally, the read loop has not noticed yet
+        relay._writer.close()
+        assert not relay.connected
+        with pytest.raises(ConnectionError):
+            await relay.ingest([EventRecord.from_event(make_event())])
+
+        task.cancel()
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_hub_sends_the_ring_in_chunks(tmp_path):
+    async def run():
+        path = str(tmp_path / "hub.sock")
+        hub_broker, hub_store = SSEBroker(), DataStore(max_events=30)
+        for i in range(25):
+            hub_store.add(make_event(latency_ms=i + 1))
+        scheduler = PublishScheduler(hub_broker, hub_store, MetricsRenderCache(render), frame_interval=0)
+        hub = BackplaneHub(path, hub_broker, hub_store, scheduler, hello_chunk=10)
+        await hub.start()
+
+        reader, writer = await asyncio.open_unix_connection(path)
+        kind, payload = await read_message(reader)
+        hello = json.loads(payload)
+        assert kind == HELLO and (hello["seq"], len(hello["records"])) == (0, 10)
+        chunks = [json.loads((await read_message(reader))[1]) for _ in range(2)]
+        assert [(c["seq"], len(c["records"])) for c in chunks] == [(10, 10), (20, 5)]
+        writer.close()
+
+        # End to end, including events published while the ring is on its way
+        store = DataStore(max_events=30)
+        relay = BackplaneRelay(path, SSEBroker(), store, MetricsRenderCache(render), retry=0.01)
+        task = asyncio.create_task(relay.run())
+        hub.hello_chunk = 1
+        while not hub._joining:
+            await asyncio.sleep(0)
+        hub_store.add(make_event(latency_ms=99))
+        await scheduler.flush()
+        assert any(hub._joining.values())
+        await eventually(lambda: store.events.next_seq == 26)
+        assert store.since(-1)[1] == hub_store.since(-1)[1]
+
+        task.cancel()
+        await hub.close()
+
+    asyncio.run(run())
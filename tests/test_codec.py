@@ -0,0 +1,33 @@
+"""JSON codec tests; they pass with or without orjson/msgspec installed."""
+import json
+
+import pytest
+
+from app.codec import DecodeError, FastJSONResponse, decode_bot_log, decode_silverback, dumps, loads
+from app.data import parse_bot_log_to_record, parse_silverback_record
+
+
+def test_decoders_match_dict_parsing():
+    line = {"timestamp": "2026-01-01T00:00:00Z", "bot": "arb", "latency": 1.5, "status": None,
+            "profit": 2, "tx": "0x" + "ab" * 32, "extra": {"nested": [1, 2]}}
+    raw = json.dumps(line).encode()
+    assert parse_silverback_record(decode_silverback(raw)) == parse_silverback_record(line)
+    log = {"level": 40, "time": "2026-01-01T00:00:00Z", "message": "Confirmed 0.250s (1%)"}
+    assert parse_bot_log_to_record(decode_bot_log(json.dumps(log))) == parse_bot_log_to_record(log)
+
+
+def test_decoders_reject_non_objects_and_invalid_json():
+    assert decode_silverback(b"[1, 2]") is None
+    assert decode_bot_log(b"42") is None
+    with pytest.raises(DecodeError):
+        decode_silverback(b'{"bot": ')
+    with pytest.raises(DecodeError):
+        decode_bot_log(b"\xff\xfe")
+
+
+def test_dumps_and_response():
+    obj = {"name": "bot-é", "values": [1, 2.5, None, True]}
+    assert loads(dumps(obj)) == obj
+    response = FastJSONResponse(obj, status_code=201)
+    assert response.status_code == 201 and response.media_type == "application/json"
+    assert json.loads(response.body) == obj
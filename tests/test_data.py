@@ -0,0 +1,216 @@
+"""DataStore aggregation tests."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.data import BotIndex, DataStore
+from app.eventbuffer import EventRecord
+from app.models import MetricsEvent
+
+
+def make_event(seconds_ago: float = 0.0, latency_ms: int = 100, error: str | None = None,
+               profit: float | None = None, bot_name: str = "arb-scout") -> MetricsEvent:
+    return MetricsEvent(
+        timestamp=datetime.now(timezone.utc) - timedelta(seconds=seconds_ago),
+        bot_name=bot_name,
+        latency_ms=latency_ms,
+        success_rate=0.0,
+        tx_hash="0x12345678...abcdef",
+        error=error,
+        status="critical" if error else "ok",
+        profit=profit,
+    )
+
+
+def test_kpis_empty_store():
+    store = DataStore(max_events=10)
+    assert store.kpis() == {
+        "avg_latency_ms": 0, "success_rate_pct": 0.0, "throughput_1m": 0, "avg_profit": 0.0,
+        "p50_latency_ms": 0, "p95_latency_ms": 0, "p99_latency_ms": 0,
+    }
+
+
+def test_kpis_running_aggregates():
+    store = DataStore(max_events=10)
+    store.add(make_event(latency_ms=100, profit=0.04))
+    store.add(make_event(latency_ms=300, error="critical: boom", profit=0.02))
+    store.add(make_event(seconds_ago=600, latency_ms=200))
+    kpis = store.kpis()
+    assert kpis["avg_latency_ms"] == 200
+    assert kpis["throughput_1m"] == 2
+    assert kpis["success_rate_pct"] == 50.0
+    assert kpis["avg_profit"] == 0.03
+
+
+def test_kpis_evict_on_overflow():
+    store = DataStore(max_events=2)
+    store.add(make_event(latency_ms=1000, error="critical: old", profit=1.0))
+    store.add(make_event(latency_ms=100, profit=0.02))
+    store.add(make_event(latency_ms=300))
+    kpis = store.kpis()
+    assert len(store.events) == 2
+    assert kpis["avg_latency_ms"] == 200
+    assert kpis["throughput_1m"] == 2
+    assert kpis["success_rate_pct"] == 100.0
+    assert kpis["avg_profit"] == 0.02
+
+
+def test_ring_evicts_and_materializes_lazily():
+    store = DataStore(max_events=3)
+    for i in range(5):
+        store.add(make_event(latency_ms=100 + i, bot_name=f"bot-{i % 2}", error="boom" if i == 0 else None))
+    latest = store.last_events(10)
+    assert [e.latency_ms for e in latest] == [104, 103, 102]
+    assert latest[0].tx_hash == "0x12345678...abcdef"
+    assert latest[0].timestamp.tzinfo is not None
+    assert [e.latency_ms for e in store.events] == [102, 103, 104]
+    assert store.events[-1].latency_ms == 104
+    # The only event carrying an error was evicted, so its string was released.
+    assert len(store.events.errors) == 0
+    assert store.events.start_seq == 2
+
+
+def test_ring_interns_unpackable_tx_hashes():
+    store = DataStore(max_events=2)
+    store.add(make_event().model_copy(update={"tx_hash": "not-a-hash"}))
+    assert store.last_events(1)[0].tx_hash == "not-a-hash"
+    store.add(make_event())
+    store.add(make_event())
+    assert len(store.events.tx_hashes) == 0
+
+
+def test_ring_keeps_success_rate_exact():
+    store = DataStore(max_events=2)
+    rec = EventRecord(1_700_000_000_000, "arb-scout", 120, success_rate=99.9)
+    store.add_record(rec)
+    assert store.since(-1)[1] == [rec]
+
+
+def test_bot_index_tracks_insert_and_eviction():
+    store = DataStore(max_events=3)
+    store.add(make_event(latency_ms=100, bot_name="Arb Scout", error="boom"))
+    store.add(make_event(latency_ms=200, bot_name="mev-watch"))
+    store.add(make_event(latency_ms=300, bot_name="Arb Scout"))
+    stats = store.bots.get("Arb Scout")
+    assert (stats.total_count, stats.success_count, stats.failure_count) == (2, 1, 1)
+    assert stats.avg_latency == 200
+    assert store.last_slug_event("arb-scout").latency_ms == 300
+
+    store.add(make_event(latency_ms=400, bot_name="mev-watch"))
+    stats = store.bots.get("Arb Scout")
+    assert (stats.total_count, stats.failure_count) == (1, 0)
+    store.add(make_event(latency_ms=500, bot_name="mev-watch"))
+    store.add(make_event(latency_ms=600, bot_name="mev-watch"))
+    assert store.bots.get("Arb Scout") is None
+    assert store.last_slug_event("arb-scout") is None
+    assert store.bots.get("mev-watch").total_count == 3
+
+
+def test_bot_index_keeps_a_slug_shared_by_two_names():
+    store = DataStore(max_events=3)
+    store.add(make_event(latency_ms=100, bot_name="arb-scout"))
+    store.add(make_event(latency_ms=200, bot_name="Arb Scout"))
+    store.add(make_event(latency_ms=300, bot_name="arb-scout"))
+    # As after a snapshot restore, which rebuilds the slugs in first-seen order
+    store.bots = BotIndex.from_state(store.bots.to_state())
+    # Newest event of either name
+    assert store.last_slug_event("arb-scout").latency_ms == 300
+    # Evicting every "Arb Scout" event leaves the slug to "arb-scout"
+    store.add(make_event(latency_ms=400, bot_name="mev-watch"))
+    store.add(make_event(latency_ms=500, bot_name="mev-watch"))
+    assert store.bots.get("Arb Scout") is None
+    assert store.last_slug_event("arb-scout").latency_ms == 300
+    store.add(make_event(latency_ms=600, bot_name="mev-watch"))
+    assert store.bots.by_slug("arb-scout") is None
+
+
+def test_throughput_series_orders_across_midnight():
+    store = DataStore(max_events=10)
+    midnight = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    for offset in (-61, -1, 0, 0, 59):
+        store.add(make_event().model_copy(update={"timestamp": midnight + timedelta(seconds=offset)}))
+    labels, values = store.throughput_series(minutes=3)
+    assert labels == ["23:58", "23:59", "00:00"]
+    assert values == [1, 1, 3]
+    bucket = store.series("1h", 1)[0]
+    assert (bucket.count, bucket.latency_min, bucket.latency_max) == (3, 100, 100)
+
+
+def test_heatmap_counts_recent_slots():
+    store = DataStore(max_events=10)
+    store.add(make_event(latency_ms=50))
+    store.add(make_event(latency_ms=250))
+    store.add(make_event(latency_ms=5000))
+    store.add(make_event(seconds_ago=3600, latency_ms=50))
+    heat = store.heatmap_matrix(cols=12)
+    assert heat["rows"] == ["0-100", "100-200", "200-300", "300+"]
+    per_row = [sum(c["v"] for c in heat["cells"] if c["y"] == r) for r in range(4)]
+    assert per_row == [1, 0, 1, 1]
+
+
+def test_heatmap_log_scale_rows():
+    from app.heatmap import heatmap_edges
+
+    edges = heatmap_edges(log_rows=5)
+    assert edges[0] == 0 and edges[1] == 10 and edges[-1] == 10_000
+    store = DataStore(max_events=10, heatmap_edges=edges)
+    store.add(make_event(latency_ms=20_000))
+    heat = store.heatmap_matrix(cols=1)
+    assert heat["cells"][-1] == {"x": 0, "y": 4, "v": 1}
+
+
+def test_latency_percentiles():
+    store = DataStore(max_events=1000)
+    for latency in range(1, 1001):
+        store.add(make_event(latency_ms=latency, bot_name="tail-bot" if latency > 900 else "arb-scout"))
+    kpis = store.kpis()
+    assert abs(kpis["p50_latency_ms"] - 500) <= 10
+    assert abs(kpis["p99_latency_ms"] - 990) <= 20
+    p = store.quantiles.bot("tail-bot").quantiles()
+    assert 940 <= p["p50"] <= 960
+    # Evicting every tail-bot event drops its sketches.
+    for _ in range(1000):
+        store.add(make_event(latency_ms=10))
+    assert store.quantiles.bot("tail-bot") is None
+
+
+def test_kpi_percentiles_are_merged_once_per_version(monkeypatch):
+    store = DataStore(max_events=10)
+    store.add(make_event(latency_ms=100))
+    merges = []
+    window = store.quantiles.window.window
+    monkeypatch.setattr(store.quantiles.window, "window", lambda *a: merges.append(a) or window(*a))
+    first = store.kpis()
+    assert store.kpis() == first and len(merges) == 1
+    store.add(make_event(latency_ms=300))
+    store.add(make_event(latency_ms=300))
+    assert store.kpis()["p50_latency_ms"] > first["p50_latency_ms"]
+    assert len(merges) == 2
+
+
+def test_since_cursor_survives_eviction():
+    store = DataStore(max_events=3)
+    for latency in (1, 2):
+        store.add(make_event(latency_ms=latency))
+    cursor, records = store.since(-1)
+    assert cursor == 1 and [r.latency_ms for r in records] == [1, 2]
+    for latency in (3, 4, 5, 6):
+        store.add(make_event(latency_ms=latency))
+    # seq 2 was evicted unread; positions shifted, sequence numbers did not
+    cursor, records = store.since(cursor)
+    assert cursor == 5 and [r.latency_ms for r in records] == [4, 5, 6]
+    assert store.since(cursor) == (5, [])
+    assert [r.latency_ms for r in store.since(-1, limit=2)[1]] == [5, 6]
+
+
+def test_wait_since_wakes_on_insert():
+    async def run():
+        store = DataStore(max_events=10)
+        assert not await store.wait_since(-1, timeout=0.01)
+        waiters = [asyncio.create_task(store.wait_since(-1, timeout=1.0)) for _ in range(3)]
+        await asyncio.sleep(0)
+        store.add(make_event())
+        store.add(make_event())
+        assert await asyncio.gather(*waiters) == [True, True, True]
+        assert await store.wait_since(0, timeout=0)
+
+    asyncio.run(run())
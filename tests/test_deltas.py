@@ -0,0 +1,118 @@
+"""SSE delta tests."""
+import asyncio
+import json
+
+from app.data import DataStore
+from app.deltas import MetricsDeltas, json_snapshot
+from app.main import templates
+from app.render_cache import metrics_context
+from app.sse import SSEBroker
+from tests.test_data import make_event
+
+
+def test_first_build_then_only_changes():
+    deltas = MetricsDeltas(templates.env)
+    store = DataStore(max_events=100)
+    for latency in (100, 200, 300):
+        store.add(make_event(latency_ms=latency))
+    events = {e: d for c, e, d in deltas.build(store) if c == "html"}
+    assert set(events) == {"metrics_rows", "metrics_kpis", "metrics_series"}
+    assert events["metrics_rows"].count("<tr") == 3
+    assert events["metrics_rows"].index('data-seq="2"') < events["metrics_rows"].index('data-seq="0"')
+    assert 'hx-swap-oob="true"' in events["metrics_kpis"]
+    series = json.loads(events["metrics_series"])
+    assert series["latency"]["seqs"] == [0, 1, 2]
+    assert series["latency"]["values"] == [100, 200, 300]
+
+    # Nothing new: nothing to send
+    assert deltas.build(store) == []
+
+    store.add(make_event(latency_ms=200))
+    events = {e: d for c, e, d in deltas.build(store) if c == "html"}
+    assert events["metrics_rows"].count("<tr") == 1
+    assert 'data-seq="3"' in events["metrics_rows"]
+    assert "kpi-throughput-value" in events["metrics_kpis"]
+    assert "kpi-latency-value" not in events["metrics_kpis"]  # avg stays 200ms
+    assert json.loads(events["metrics_series"])["latency"]["seqs"] == [3]
+
+
+def test_delta_is_much_smaller_than_full_partial():
+    deltas = MetricsDeltas(templates.env)
+    store = DataStore(max_events=100)
+    for i in range(60):
+        store.add(make_event(seconds_ago=60 - i, latency_ms=100 + i))
+    deltas.build(store)
+    store.add(make_event(latency_ms=150))
+    delta_bytes = sum(len(data) for c, _, data in deltas.build(store) if c == "html")
+    full = templates.env.get_template("partials/metrics.html").render(metrics_context(store))
+    assert delta_bytes * 5 < len(full)
+
+
+def test_json_frames_shared_and_numeric():
+    deltas = MetricsDeltas(templates.env)
+    store = DataStore(max_events=100)
+    store.add(make_event(latency_ms=120, profit=0.01))
+    frames = {e: d for c, e, d in deltas.build(store, channels=("json",)) if c == "json"}
+    assert {"kpis", "latency", "profit", "events", "throughput", "heatmap"} <= set(frames)
+    assert all(c == "json" for c, _, _ in deltas.build(store, channels=("json",)))
+    latency = json.loads(frames["latency"])
+    assert latency["seqs"] == [0] and latency["values"] == [120]
+    assert isinstance(latency["ts"][0], int)
+    assert json.loads(frames["events"])[0]["bot"] == "arb-scout"
+
+
+def test_json_snapshot_topics():
+    store = DataStore(max_events=100)
+    store.add(make_event(latency_ms=120))
+    snap = json.loads(json_snapshot(store, ["kpis", "events"]))
+    assert set(snap) == {"seq", "kpis", "events"}
+    assert snap["events"][0]["latency_ms"] == 120
+
+
+def test_broker_filters_channel_and_topics():
+    async def run():
+        broker = SSEBroker()
+        html_sub = await broker.subscribe()
+        kpi_sub = await broker.subscribe("json", ["kpis"])
+        await broker.publish("<div/>", event="metrics_rows")
+        await broker.publish("{}", event="kpis", channel="json")
+        await broker.publish("[]", event="events", channel="json")
+        assert broker.channels() == {"html", "json"}
+        assert len(broker.read(html_sub)[0]) == 1
+        kpi_frames, _ = broker.read(kpi_sub)
+        assert len(kpi_frames) == 1 and kpi_frames[0].startswith(b"event: kpis\r\n")
+
+    asyncio.run(run())
+
+
+def test_bot_frames_only_for_watched_bots():
+    deltas = MetricsDeltas(templates.env)
+    store = DataStore(max_events=100)
+    store.add(make_event(bot_name="Arb Scout", latency_ms=120))
+    store.add(make_event(bot_name="mev-hunter"))
+    frames = {e: d for c, e, d in deltas.build(store, channels=("json",), topics=("bot:arb-scout",))}
+    assert "bot:arb-scout" in frames and "bot:mev-hunter" not in frames
+    payload = json.loads(frames["bot:arb-scout"])
+    assert payload["bot"]["bot_name"] == "Arb Scout"
+    assert [e["latency_ms"] for e in payload["events"]] == [120]
+
+    store.add(make_event(bot_name="mev-hunter"))
+    assert not any(e.startswith("bot:") for _, e, _ in deltas.build(store, channels=("json",), topics=("bot:arb-scout",)))
+
+    snap = json.loads(json_snapshot(store, ["bot:arb-scout", "bot:nobody"]))
+    assert snap["bots"]["arb-scout"]["events"][0]["bot"] == "Arb Scout"
+    assert snap["bots"]["nobody"] is None
+
+
+def test_profit_series_delta_matches_the_snapshot_render():
+    deltas = MetricsDeltas(templates.env, series_points=3)
+    store = DataStore(max_events=100)
+    for i in range(3):
+        store.add(make_event(profit=0.01 * (i + 1)))
+    deltas.build(store)
+    # The window slides past the first event, so every cumulative value changes
+    store.add(make_event(profit=0.5))
+    series = json.loads({e: d for c, e, d in deltas.build(store) if c == "html"}["metrics_series"])
+    labels, values = store.profit_series(3)
+    assert series["profit"] == {"labels": labels, "values": values}
+    assert values == [0.02, 0.05, 0.55]
@@ -0,0 +1,83 @@
+"""Persistent event store tests."""
+import asyncio
+from datetime import datetime, timezone
+
+from app.data import DataStore
+from app.eventbuffer import EventRecord
+from app.eventlog import EventLog, utc_day_bounds_ms
+
+
+def test_event_log_write_through_and_summary(tmp_path):
+    log = EventLog(str(tmp_path / "events.db"), batch_size=10)
+    store = DataStore(max_events=2)
+    store.event_log = log
+    start_ms, _ = utc_day_bounds_ms()
+    for i in range(5):
+        store.add_record(EventRecord(
+            start_ms + i * 1000, "arb-scout" if i % 2 else "mev-watch", 100 * (i + 1),
+            error="boom" if i == 4 else None, status="critical" if i == 4 else "ok", profit=0.01 * i,
+        ))
+    assert log.flush(timeout=5)
+    # Only two events remain in memory, but the summary covers all five.
+    summary = asyncio.run(store.daily_summary())
+    assert summary["total_events"] == 5
+    assert summary["avg_latency_ms"] == 300
+    assert summary["status_counts"] == {"ok": 4, "warning": 0, "critical": 1}
+    assert summary["top_bots"][0][0] == "mev-watch"
+
+    rows = log.query(start_ms, start_ms + 3000, bot_name="arb-scout")
+    assert [r.latency_ms for r in rows] == [200]
+    assert [r.ts_ms for r in log.iter_range(start_ms + 1000, start_ms + 4000)] == [
+        start_ms + 1000, start_ms + 2000, start_ms + 3000,
+    ]
+    log.close()
+    reopened = EventLog(str(tmp_path / "events.db"))
+    assert reopened.count() == 5
+    reopened.close()
+
+
+def test_history_streams_concurrent_requests(tmp_path):
+    import httpx
+
+    from app.main import app, store
+
+    log = EventLog(str(tmp_path / "events.db"), batch_size=1000)
+    start_ms, _ = utc_day_bounds_ms()
+    for i in range(2500):
+        log.append(EventRecord(start_ms + i, "arb-scout", i + 1))
+    assert log.flush(timeout=5)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = f"/api/events/history?start={start_ms}&end={start_ms + 2500}"
+            return await asyncio.gather(*(client.get(url) for _ in range(8)))
+
+    previous, store.event_log = store.event_log, log
+    try:
+        responses = asyncio.run(run())
+    finally:
+        store.event_log = previous
+        log.close()
+    for response in responses:
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == 2500
+
+
+def test_failed_commit_is_retried_and_caps_pending(tmp_path, monkeypatch):
+    import app.eventlog as eventlog
+
+    good = eventlog._INSERT
+    monkeypatch.setattr(eventlog, "_INSERT", "INSERT INTO missing VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+    log = EventLog(str(tmp_path / "events.db"), batch_size=1, max_pending=3, retry=0.01, max_retry=0.02)
+    for i in range(3):
+        log.append(EventRecord(i, "arb-scout", 100))
+    # Every commit fails: nothing is dropped, and the log reports itself full
+    assert not log.flush(timeout=0.1)
+    assert log.pending == 3 and log.full
+    monkeypatch.setattr(eventlog, "_INSERT", good)
+    assert log.flush(timeout=5)
+    assert not log.full
+    assert [r.ts_ms for r in log.iter_range(0, 10)] == [0, 1, 2]
+    log.close()
+
@@ -0,0 +1,167 @@
+"""Incremental log upload parsing tests."""
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.data import DataStore
+from app.eventbuffer import EventRecord
+from app.ingest import IngestError, IngestQueue, MAX_ARRAY_BYTES, ndjson_batches
+from app.main import app, store
+from app.publisher import PublishScheduler
+from app.render_cache import MetricsRenderCache
+from app.sse import SSEBroker
+
+
+def log_line(i: int, level: int = 20) -> bytes:
+    return json.dumps({"timestamp": "2026-01-01T00:00:00Z", "level": level,
+                       "message": f"price[{i}] took 0.{i + 1:03d}s (ok)"}).encode() + b"\n"
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def collect(chunks, **kwargs):
+    async def run():
+        return [batch async for batch in ndjson_batches(chunks, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_lines_split_across_chunks_and_batched():
+    body = b"".join(log_line(i) for i in range(25)) + b"not json\n\n" + log_line(99).rstrip()
+    batches = collect(chunked(body, 7), batch_lines=10)
+    assert [(n, len(recs)) for n, recs in batches] == [(10, 10), (10, 10), (6, 6)]
+    assert batches[-1][1][-1].latency_ms == 100
+
+
+def test_overlong_line_is_skipped():
+    body = b'{"message": "' + b"x" * 500 + b'"}\n' + log_line(1)
+    batches = collect(chunked(body, 16), max_line=200)
+    assert [(n, len(recs)) for n, recs in batches] == [(1, 1)]
+
+
+def test_json_array_body_and_cap():
+    body = json.dumps([json.loads(log_line(i)) for i in range(3)] + ["ignored"]).encode()
+    assert [(n, len(recs)) for n, recs in collect(chunked(b"  " + body, 5), batch_lines=2)] == [(2, 2), (2, 1)]
+    with pytest.raises(IngestError):
+        collect(chunked(b"[" + b" " * MAX_ARRAY_BYTES + b"]", 1 << 20))
+
+
+def test_post_logs_queues_batches():
+    body = b"".join(log_line(i, level=40 if i == 3 else 20) for i in range(5))
+    with TestClient(app) as client:
+        cursor = store.events.next_seq - 1
+        response = client.post("/api/logs?batch_size=2", content=chunked_sync(body, 50))
+        assert response.status_code == 202
+        data = response.json()
+        assert data["metrics_created"] == 5 and data["batches"] == [
+            {"logs": 2, "metrics": 2}, {"logs": 2, "metrics": 2}, {"logs": 1, "metrics": 1},
+        ]
+        assert client.get("/api/logs/queue").json()["accepted_batches"] >= 3
+    # Shutdown applies anything still queued; sample mode adds its own events alongside
+    _, records = store.since(cursor)
+    assert sorted(r.latency_ms for r in records if r.latency_ms <= 5) == [1, 2, 3, 4, 5]
+
+
+def test_queue_sheds_when_full_and_coalesces():
+    (_, batch), = collect(chunked(log_line(1) + log_line(2), 64))
+
+    async def run():
+        store = DataStore(max_events=100)
+        cache = MetricsRenderCache(lambda name, ctx: "", clock=lambda: 0.0)
+        publisher = PublishScheduler(SSEBroker(), store, cache, frame_interval=0.25)
+        queue = IngestQueue(store, publisher, maxsize=2)
+        assert await queue.put(batch, 0.01) and await queue.put(batch, 0.01)
+        assert not await queue.put(batch, 0.01)
+        assert queue.stats()["shed_batches"] == 1 and queue.depth == 2
+        queue.start()
+        await asyncio.sleep(0.05)
+        assert queue.depth == 0 and queue.applied == 4
+        assert len(store.events) == 4 and publisher.publishes == 1
+        await queue.stop()
+
+    asyncio.run(run())
+
+
+def chunked_sync(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def test_queue_holds_batches_while_hub_is_down():
+    (_, batch), = collect(chunked(log_line(1) + log_line(2), 64))
+
+    class FlakyRelay:
+        connected = False
+        sent: list = []
+
+        async def ingest(self, records):
+            if not self.connected:
+                raise ConnectionError("backplane hub is not connected")
+            self.sent.extend(records)
+
+    async def run():
+        store = DataStore(max_events=100)
+        cache = MetricsRenderCache(lambda name, ctx: "", clock=lambda: 0.0)
+        publisher = PublishScheduler(SSEBroker(), store, cache, frame_interval=0.25)
+        relay = FlakyRelay()
+        queue = IngestQueue(store, publisher, maxsize=2, relay=relay, retry=0.01, max_retry=0.02)
+        queue.start()
+        assert await queue.put(batch, 0.01)
+        await asyncio.sleep(0.05)
+        # Held for retry, not dropped; it still counts toward the depth
+        assert queue.depth == 1 and queue.applied == 0
+        relay.connected = True
+        await asyncio.sleep(0.05)
+        assert queue.depth == 0 and len(relay.sent) == 2
+        # Shutdown with the hub gone again logs the loss instead of raising
+        relay.connected = False
+        assert await queue.put(batch, 0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_post_logs_rejected_while_hub_is_down():
+    class Disconnected:
+        connected = False
+
+    previous, app.state.relay = app.state.relay, Disconnected()
+    try:
+        response = TestClient(app).post("/api/logs", content=log_line(1))
+    finally:
+        app.state.relay = previous
+    assert response.status_code == 503 and response.headers["retry-after"] == "1"
+
+
+def test_ingest_queue_holds_batches_while_event_log_is_full(tmp_path):
+    class SlowLog:
+        full = True
+        pending, db_path = 3, "events.db"
+        appended: list = []
+
+        def append(self, rec):
+            self.appended.append(rec)
+
+    async def run():
+        store = DataStore(max_events=100)
+        store.event_log = SlowLog()
+        cache = MetricsRenderCache(lambda name, ctx: "", clock=lambda: 0.0)
+        publisher = PublishScheduler(SSEBroker(), store, cache, frame_interval=0.25)
+        queue = IngestQueue(store, publisher, maxsize=1, retry=0.01, max_retry=0.02)
+        queue.start()
+        assert await queue.put([EventRecord(1, "arb-scout", 100)], 0.01)
+        await asyncio.sleep(0.05)
+        assert queue.depth == 1 and len(store.events) == 0
+        # The queue fills up, so uploads are pushed back
+        assert await queue.put([EventRecord(2, "arb-scout", 100)], 0.01)
+        assert not await queue.put([EventRecord(3, "arb-scout", 100)], 0.01)
+        store.event_log.full = False
+        await asyncio.sleep(0.05)
+        assert queue.depth == 0 and len(store.events) == 2
+        await queue.stop()
+
+    asyncio.run(run())
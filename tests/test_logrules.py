@@ -0,0 +1,24 @@
+"""Log message classifier tests."""
+from app.data import parse_bot_log_to_record
+from app.logrules import LogClassifier
+
+
+def test_rules_fields_and_priority():
+    tx = "0x" + "ab" * 32
+    classifier = LogClassifier([
+        {"bot_name": "arb-bot", "match": ["Arb["]},
+        {"bot_name": "price-bot", "match": "price"},
+    ])
+    found = classifier.classify(
+        f"price arb[eth] - 1234567890123.5 then 2.500s (10%) total fees paid = 42 Confirmed {tx}"
+    )
+    # Earlier rule wins even though "price" comes first in the message
+    assert found.bot_name == "arb-bot"
+    assert (found.tx_hash, found.latency_ms, found.fees, found.marker) == (tx, 2500, 42, True)
+    assert LogClassifier().classify("nothing here").bot_name == "bot"
+
+
+def test_parse_uses_classifier():
+    rec = parse_bot_log_to_record({"level": 30, "message": "perform_trade - Request was Rate-Limited 0.250s (1%)"})
+    assert (rec.bot_name, rec.latency_ms, rec.error, rec.status) == ("trading-bot", 250, "Rate limited", "warning")
+    assert parse_bot_log_to_record({"level": 20, "message": "rsi[metric=price] - Started"}) is None
@@ -0,0 +1,49 @@
+"""Publish scheduler tests."""
+import asyncio
+
+from app.data import DataStore
+from app.publisher import PublishScheduler
+from app.render_cache import MetricsRenderCache
+from app.sse import SSEBroker
+from tests.test_data import make_event
+
+
+def make_scheduler(now: list):
+    broker = SSEBroker()
+    store = DataStore(max_events=100)
+    cache = MetricsRenderCache(lambda name, ctx: str(ctx["kpis"]["throughput_1m"]), clock=lambda: now[0])
+    return broker, store, PublishScheduler(broker, store, cache, frame_interval=0.25, clock=lambda: now[0])
+
+
+def test_coalesces_updates_within_frame():
+    async def run():
+        now = [100.0]
+        broker, store, scheduler = make_scheduler(now)
+        sub = await broker.subscribe()
+        for _ in range(50):
+            store.add(make_event())
+            scheduler.mark()
+            await scheduler.maybe_flush()
+        assert scheduler.publishes == 1
+        now[0] += 0.3
+        await scheduler.maybe_flush()
+        assert scheduler.publishes == 2
+        frames, _ = broker.read(sub)
+        assert len(frames) == 2
+        assert [f.split(b"\r\n")[-3] for f in frames] == [b"data: 1", b"data: 50"]
+
+    asyncio.run(run())
+
+
+def test_critical_flushes_immediately():
+    async def run():
+        now = [100.0]
+        _, store, scheduler = make_scheduler(now)
+        scheduler.mark()
+        await scheduler.maybe_flush()
+        store.add(make_event(error="critical: boom"))
+        scheduler.mark(critical=True)
+        assert await scheduler.maybe_flush()
+        assert scheduler.publishes == 2
+
+    asyncio.run(run())
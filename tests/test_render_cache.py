@@ -0,0 +1,54 @@
+"""Metrics partial render cache tests."""
+from fastapi.testclient import TestClient
+
+from app.data import DataStore
+from app.main import app
+from app.render_cache import MetricsRenderCache
+from tests.test_data import make_event
+
+
+def fake_renderer(calls: list):
+    def render(name: str, context: dict) -> str:
+        calls.append(name)
+        return f"<div>{context['kpis']['throughput_1m']}</div>"
+    return render
+
+
+def test_render_once_per_version():
+    calls: list = []
+    cache = MetricsRenderCache(fake_renderer(calls), clock=lambda: 0.0)
+    store = DataStore(max_events=10)
+    store.add(make_event())
+    assert cache.html(store) == "<div>1</div>"
+    assert cache.html(store) == "<div>1</div>"
+    assert len(calls) == 1 and cache.hits == 1
+
+    store.add(make_event())
+    assert cache.html(store) == "<div>2</div>"
+    assert len(calls) == 2
+
+
+def test_render_refreshes_with_clock_and_extra():
+    now = [0.0]
+    calls: list = []
+    cache = MetricsRenderCache(fake_renderer(calls), max_age=1.0, clock=lambda: now[0])
+    store = DataStore(max_events=10)
+    cache.html(store)
+    now[0] = 1.5
+    cache.html(store)
+    cache.update_extra(sensor_latest={"temp_c": 21.0})
+    cache.html(store)
+    assert len(calls) == 3
+
+
+def test_partial_endpoint_etag_and_gzip():
+    client = TestClient(app)
+    response = client.get("/partials/metrics", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+
+    response = client.get("/partials/metrics", headers={"If-None-Match": etag})
+    assert response.status_code in (200, 304)
+    if response.status_code == 200:
+        assert response.headers["etag"] != etag
@@ -0,0 +1,16 @@
+"""Row template registry tests."""
+from app.main import templates
+from app.row_templates import RowTemplates
+
+
+def test_render_many_matches_single_renders():
+    rows_tpl = RowTemplates(templates.env).load()
+    rows = [
+        {"timestamp": "12:00:00", "bot_name": "arb-scout", "latency": 120, "error": None},
+        {"timestamp": "12:00:01", "bot_name": "<mev>", "latency": 80, "error": "critical: boom"},
+    ]
+    batch = rows_tpl.render_many("log_entry", rows)
+    assert batch == "".join(rows_tpl.render("log_entry", r) + "\n" for r in rows)
+    assert "&lt;mev&gt;" in batch
+    assert batch.count('class="log-entry') == 2
+    assert "critical: boom" in batch
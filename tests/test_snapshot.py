@@ -0,0 +1,82 @@
+"""DataStore snapshot/restore tests."""
+from app.data import DataStore
+from app.snapshot import load_snapshot, save_snapshot
+from tests.test_data import make_event
+
+
+def test_snapshot_roundtrip(tmp_path):
+    store = DataStore(max_events=3)
+    for i in range(5):
+        store.add(make_event(latency_ms=100 * (i + 1), bot_name=f"bot-{i % 2}",
+                             error="boom" if i == 4 else None, profit=0.01))
+    path = tmp_path / "store.snap"
+    save_snapshot(store, path, {"tail": {"path": "x.jsonl", "inode": 1, "offset": 42}})
+
+    restored = DataStore(max_events=3)
+    meta = load_snapshot(restored, path)
+    assert meta["tail"]["offset"] == 42
+    assert [e.model_dump() for e in restored.last_events(3)] == [e.model_dump() for e in store.last_events(3)]
+    assert restored.kpis() == store.kpis()
+    assert restored.bots.get("bot-0").total_count == 2
+    assert restored.throughput_series() == store.throughput_series()
+    # Aggregates come from the saved state, so they still cover evicted events
+    assert sum(b.count for b in restored.series("1m", 5)) == 5
+    assert restored.quantiles.window.window(5).count == 5
+    # The restored store keeps working, including eviction of restored rows.
+    restored.add(make_event(latency_ms=1, bot_name="bot-0"))
+    assert restored.events.start_seq == 3
+    assert restored.bots.get("bot-0").total_count == 2
+    assert restored.bots.get("bot-1").total_count == 1
+    assert restored.last_bot_event("bot-0").latency_ms == 1
+
+
+def test_snapshot_replays_into_different_capacity(tmp_path):
+    store = DataStore(max_events=4)
+    for i in range(4):
+        store.add(make_event(latency_ms=i))
+    path = tmp_path / "store.snap"
+    save_snapshot(store, path)
+    smaller = DataStore(max_events=2)
+    assert load_snapshot(smaller, path) == {}
+    assert [e.latency_ms for e in smaller.events] == [2, 3]
+    assert load_snapshot(smaller, tmp_path / "missing.snap") is None
+
+
+
+def test_snapshot_with_short_columns_is_ignored(tmp_path):
+    store = DataStore(max_events=4)
+    for i in range(4):
+        store.add(make_event(latency_ms=i))
+    path = tmp_path / "store.snap"
+    save_snapshot(store, path)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    restored = DataStore(max_events=4)
+    assert load_snapshot(restored, path) is None
+    assert len(restored.events) == 0
+
+
+def test_snapshot_replays_when_aggregate_state_is_unusable(tmp_path, monkeypatch):
+    import app.snapshot as snapshot
+
+    store = DataStore(max_events=2)
+    for i in range(4):
+        store.add(make_event(latency_ms=100 * (i + 1)))
+    path = tmp_path / "store.snap"
+    monkeypatch.setattr(snapshot, "STATE_VERSION", snapshot.STATE_VERSION + 1)
+    save_snapshot(store, path)
+    monkeypatch.undo()
+
+    restored = DataStore(max_events=2)
+    assert load_snapshot(restored, path) == {}
+    assert [e.latency_ms for e in restored.events] == [300, 400]
+    # Rebuilt from the two buffered events, not the four ingested ones
+    assert restored.kpis()["avg_latency_ms"] == store.kpis()["avg_latency_ms"] == 350
+    assert sum(b.count for b in restored.series("1m", 5)) == 2
+
+    monkeypatch.setattr(snapshot.RollupSet, "to_state", lambda self: {"1m": {"slots": 3}})
+    save_snapshot(store, path)
+    monkeypatch.undo()
+    restored = DataStore(max_events=2)
+    assert load_snapshot(restored, path) == {}
+    assert sum(b.count for b in restored.series("1m", 5)) == 2
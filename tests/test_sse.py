@@ -0,0 +1,132 @@
+"""SSE framing and broker tests."""
+import asyncio
+
+from app.sse import PING_READY, SSEBroker, client_event_stream, encode_frame
+
+
+def test_encode_frame_multiline():
+    frame = encode_frame("metrics_rows", "<tr>\n<td>1</td>\r\n</tr>", id=7)
+    assert frame == b"event: metrics_rows\r\nid: 7\r\ndata: <tr>\r\ndata: <td>1</td>\r\ndata: </tr>\r\n\r\n"
+
+
+def test_publish_shares_one_buffer():
+    async def run():
+        broker = SSEBroker()
+        subs = [await broker.subscribe() for _ in range(3)]
+        await broker.publish("<div>ü</div>")
+        frames = [broker.read(sub)[0][0] for sub in subs]
+        assert all(f is frames[0] for f in frames)
+        assert "data: <div>ü</div>".encode() in frames[0]
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_lags_instead_of_losing_random_frames():
+    async def run():
+        broker = SSEBroker(ring_size=4)
+        fast = await broker.subscribe()
+        slow = await broker.subscribe()
+        for i in range(3):
+            await broker.publish(str(i))
+        assert len(broker.read(fast)[0]) == 3
+        for i in range(3, 10):
+            await broker.publish(str(i))
+        assert broker.read(slow) == ([], True)
+        assert slow.cursor == broker.last_id
+        frames, lagged = broker.read(fast)
+        assert lagged and frames == []  # 7 behind with a ring of 4
+
+        await broker.publish("10")
+        frames, lagged = broker.read(slow)
+        assert not lagged and frames[0].endswith(b"data: 10\r\n\r\n")
+
+    asyncio.run(run())
+
+
+def test_stream_resends_snapshot_after_lag():
+    async def run():
+        broker = SSEBroker(ring_size=2)
+        snapshots = []
+
+        def snapshot():
+            snapshots.append(1)
+            return f"full-{len(snapshots)}"
+
+        stream = client_event_stream(None, broker, snapshot=snapshot)
+        assert await stream.__anext__() == PING_READY
+        assert b"full-1" in await stream.__anext__()
+        for i in range(5):
+            await broker.publish(str(i))
+        assert b"full-2" in await stream.__anext__()
+        await broker.publish("5")
+        assert b"data: 5" in await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(run())
+
+
+def test_resume_from_last_event_id():
+    async def run():
+        broker = SSEBroker(ring_size=8, first_id=100)
+        keeper = await broker.subscribe()  # keeps the channel occupied
+        client = client_event_stream(None, broker, snapshot=lambda: "full")
+        await client.__anext__()
+        snap = await client.__anext__()
+        assert snap.startswith(b"event: metrics_update\r\nid: 100\r\n")
+        await broker.publish("a")
+        assert b"data: a" in await client.__anext__()
+        await client.aclose()  # disconnect after id 101
+
+        await broker.publish("b")
+        await broker.publish("c")
+        resumed = client_event_stream(None, broker, snapshot=lambda: "full", last_event_id=101)
+        assert await resumed.__anext__() == PING_READY
+        assert b"data: b" in await resumed.__anext__()
+        assert b"data: c" in await resumed.__anext__()
+        await resumed.aclose()
+
+        # Too old, or from before a restart: one snapshot instead
+        for stale in (90, 50):
+            sub = await broker.subscribe(last_event_id=stale)
+            assert not sub.resumed and sub.cursor == broker.last_id
+        await broker.unsubscribe(keeper)
+
+    asyncio.run(run())
+
+
+def test_no_resume_across_an_empty_channel():
+    async def run():
+        broker = SSEBroker(first_id=0)
+        sub = await broker.subscribe()
+        await broker.publish("a")
+        await broker.unsubscribe(sub)
+        await broker.publish("dropped")  # nobody subscribed: not stored
+        assert not broker.resumable("html", 1)
+        assert not (await broker.subscribe(last_event_id=1)).resumed
+
+    asyncio.run(run())
+
+
+def test_publish_wakes_only_interested_subscribers():
+    async def run():
+        broker = SSEBroker(ring_size=4)
+        alpha = await broker.subscribe("json", ["bot:alpha"])
+        beta = await broker.subscribe("json", ["bot:beta"])
+        everything = await broker.subscribe("json")
+        assert broker.topics("json") == {"bot:alpha", "bot:beta"}
+        for i in range(10):
+            await broker.publish(str(i), event="bot:beta", channel="json")
+        await broker.publish("a", event="bot:alpha", channel="json")
+        assert alpha.pending == broker.last_id and beta.pending is not None
+        # Other bots' traffic neither wakes alpha nor pushes it out of the ring
+        frames, lagged = broker.read(alpha)
+        assert not lagged and len(frames) == 1 and frames[0].startswith(b"event: bot:alpha\r\n")
+        assert not await broker.wait(alpha, timeout=0.01)
+        assert broker.read(everything) == ([], True)
+
+        await broker.unsubscribe(beta)
+        assert broker.topics("json") == {"bot:alpha"}
+        assert not broker.resumable("json", broker.last_id - 1, ["bot:beta"])
+        assert broker.resumable("json", broker.last_id - 1, ["bot:alpha"])
+
+    asyncio.run(run())
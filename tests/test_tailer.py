@@ -0,0 +1,166 @@
+"""JSONL tailer tests."""
+import asyncio
+import os
+import time
+
+import pytest
+
+from app import tailer as tailer_module
+from app.tailer import InotifyWatcher, JsonlTailer, PollWatcher, watch
+
+
+def append(path, *lines: bytes) -> None:
+    with open(path, "ab") as f:
+        f.write(b"".join(lines))
+
+
+def test_reads_blocks_and_partial_lines(tmp_path):
+    path = tmp_path / "log.jsonl"
+    append(path, b"old\n")
+    cursor = {}
+
+    async def run():
+        tailer = JsonlTailer(path, cursor=cursor, block_size=8, watcher=PollWatcher(0.01))
+        assert await tailer.read_lines() == []  # starts at the end
+        append(path, b"one\ntwo\nthr")
+        lines = []
+        while batch := await tailer.read_lines():
+            lines += batch
+        assert lines == [b"one", b"two"]
+        assert cursor["offset"] == len(b"old\none\ntwo\n")
+        append(path, b"ee\n")
+        assert await tailer.read_lines() == [b"three"]
+        tailer.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("pread", [True, False], ids=["pread", "seek-read"])
+def test_follows_rename_and_copytruncate_rotation(tmp_path, monkeypatch, pread):
+    if not pread:
+        # As on Windows, which has no os.pread
+        monkeypatch.setattr(tailer_module, "_pread", None)
+    path = tmp_path / "log.jsonl"
+    append(path, b"")
+
+    async def run():
+        tailer = JsonlTailer(path, watcher=PollWatcher(0.01))
+        await tailer.read_lines()
+        append(path, b"a\n", b"b")
+        assert await tailer.read_lines() == [b"a"]
+        # logrotate: rename, then the writer reopens a new file under the old name
+        os.rename(path, tmp_path / "log.jsonl.1")
+        append(tmp_path / "log.jsonl.1", b"\n")
+        append(path, b"c\n")
+        assert await tailer.read_lines() == [b"b"]
+        assert await tailer.read_lines() == [b"c"]
+        # copytruncate: same inode, now shorter than what was read
+        os.truncate(path, 0)
+        assert await tailer.read_lines() == []
+        append(path, b"d\n")
+        assert await tailer.read_lines() == [b"d"]
+        assert tailer.rotations == 2
+        tailer.close()
+
+    asyncio.run(run())
+
+
+def test_oversized_line_offset(tmp_path, monkeypatch):
+    monkeypatch.setattr(tailer_module, "MAX_LINE_BYTES", 8)
+    path = tmp_path / "log.jsonl"
+    append(path, b"")
+    cursor = {}
+
+    async def run():
+        tailer = JsonlTailer(path, cursor=cursor, block_size=4, watcher=PollWatcher(0.01))
+        await tailer.read_lines()
+        append(path, b"ok\n" + b"x" * 20)
+        lines = []
+        for _ in range(10):
+            lines += await tailer.read_lines()
+        # Still inside the dropped line: the offset stays at its start
+        assert lines == [b"ok"] and cursor["offset"] == 3
+        append(path, b"x\nnext\n")
+        for _ in range(10):
+            lines += await tailer.read_lines()
+        assert lines == [b"ok", b"next"] and cursor["offset"] == os.stat(path).st_size
+        tailer.close()
+
+    asyncio.run(run())
+
+
+def test_resumes_from_cursor(tmp_path):
+    path = tmp_path / "log.jsonl"
+    append(path, b"a\nb\n")
+    cursor = {"path": str(path), "inode": os.stat(path).st_ino, "offset": 2}
+
+    async def run():
+        tailer = JsonlTailer(path, cursor=cursor)
+        assert await tailer.read_lines() == [b"b"]
+        tailer.close()
+
+    asyncio.run(run())
+
+
+def test_inotify_wakes_on_write(tmp_path):
+    path = tmp_path / "log.jsonl"
+    append(path, b"")
+
+    async def run():
+        watcher = watch(path)
+        if not isinstance(watcher, InotifyWatcher):
+            watcher.close()
+            return
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, append, path, b"x\n")
+        start = time.monotonic()
+        await watcher.wait(5.0)
+        assert time.monotonic() - start < 1.0
+        # Writes to other files in the directory do not wake it
+        loop.call_later(0.01, append, tmp_path / "other.jsonl", b"y\n")
+        start = time.monotonic()
+        await watcher.wait(0.2)
+        assert time.monotonic() - start >= 0.15
+        watcher.close()
+
+    asyncio.run(run())
+
+
+def test_tail_loop_survives_publish_errors(tmp_path, monkeypatch):
+    import json
+
+    from app.data import DataStore, tail_jsonl_and_broadcast
+    from app.publisher import PublishScheduler
+    from app.render_cache import MetricsRenderCache
+    from app.sse import SSEBroker
+
+    monkeypatch.setattr(asyncio, "sleep", _fast_sleep(asyncio.sleep))
+    path = tmp_path / "log.jsonl"
+    append(path, b"")
+    store = DataStore(max_events=10)
+    scheduler = PublishScheduler(SSEBroker(), store, MetricsRenderCache(lambda name, ctx: ""), frame_interval=0)
+    failures = [RuntimeError("render failed")]
+
+    async def flaky_flush():
+        if failures:
+            raise failures.pop()
+
+    scheduler.flush = flaky_flush
+
+    async def run():
+        task = asyncio.create_task(tail_jsonl_and_broadcast(path, None, store, None, scheduler=scheduler))
+        await asyncio.sleep(0.05)
+        for i in range(2):
+            append(path, json.dumps({"bot": "b", "latency_ms": i + 1}).encode() + b"\n")
+            await asyncio.sleep(0.3)
+        task.cancel()
+
+    asyncio.run(run())
+    assert not failures and len(store.events) == 2
+
+
+def _fast_sleep(sleep):
+    # The retry back-off is 1s; keep the test quick
+    async def fast(delay, *args):
+        await sleep(min(delay, 0.01), *args)
+    return fast